@@ -0,0 +1,408 @@
+#!/usr/bin/env python
+"""
+   Copyright 2021 NetApp, Inc
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import base64
+import functools
+import os
+import yaml
+from concurrent.futures import ThreadPoolExecutor
+from termcolor import colored
+
+try:
+    from . import astraBulk
+    from . import astraOutput
+    from . import astraSDK
+except ImportError:
+    import astraBulk
+    import astraOutput
+    import astraSDK
+
+# The operations an execution hook can run at, as toolkit.py create hook takes them
+hookOperations = ("pre-snapshot", "post-snapshot", "pre-backup", "post-backup", "post-restore")
+
+
+def loadSpec(path):
+    """The desired state in the YAML file at path, checked and filled out:
+
+    scripts:                    # hook sources, by name
+      - name: freeze
+        file: scripts/freeze.sh # relative to the spec file (or source: the script's text)
+        description: ...
+    schedules: [...]            # the protection policy of apps which don't give their own
+    apps:
+      - name: wordpress
+        cluster: prod-east      # name or ID
+        namespace: wordpress    # default: the app's name
+        labelSelector: app=wp   # optional
+        schedules: [...]        # the same schedules as a protectionpolicies file
+        hooks:
+          - name: mysql-freeze
+            script: freeze      # a script of the spec, or one already in Astra Control
+            operation: pre-snapshot
+            arguments: [-f]
+            containerRegex: mysql
+
+    Each script's source is returned base64 encoded, as the API holds it.  Raises ValueError
+    if the file can't be read or isn't valid."""
+    try:
+        with open(path) as f:
+            spec = astraOutput.yamlLoad(f)
+    except (OSError, yaml.YAMLError) as e:
+        raise ValueError(f"{path} not read: {e}")
+    if not isinstance(spec, dict):
+        raise ValueError(f"{path} must hold a mapping of scripts, schedules and apps")
+    unknown = set(spec) - {"scripts", "schedules", "apps"}
+    if unknown:
+        raise ValueError(f"unknown fields of {path}: {', '.join(sorted(unknown))}")
+
+    scripts = []
+    for script in spec.get("scripts") or []:
+        if not isinstance(script, dict) or not script.get("name"):
+            raise ValueError(f"each script of {path} needs a name")
+        if ("file" in script) == ("source" in script):
+            raise ValueError(f"script {script['name']} needs one of file or source")
+        source = script.get("source")
+        if "file" in script:
+            scriptPath = os.path.join(os.path.dirname(path), str(script["file"]))
+            try:
+                with open(scriptPath, encoding="utf8") as f:
+                    source = f.read()
+            except OSError as e:
+                raise ValueError(f"script {script['name']} not read: {e}")
+        scripts.append(
+            {
+                "name": str(script["name"]),
+                "source": base64.b64encode(str(source).rstrip().encode("utf-8")).decode("utf-8"),
+                "description": str(script.get("description") or ""),
+            }
+        )
+    if len({script["name"] for script in scripts}) < len(scripts):
+        raise ValueError(f"{path} has more than one script of the same name")
+
+    defaultSchedules = None
+    if spec.get("schedules") is not None:
+        defaultSchedules = astraBulk.policySchedules(spec["schedules"], f"{path} schedules")
+
+    apps = []
+    for app in spec.get("apps") or []:
+        if not isinstance(app, dict) or not app.get("name") or not app.get("cluster"):
+            raise ValueError(f"each app of {path} needs a name and a cluster")
+        name = str(app["name"])
+        unknown = set(app) - {"name", "cluster", "namespace", "labelSelector", "schedules", "hooks"}
+        if unknown:
+            raise ValueError(f"unknown fields of app {name}: {', '.join(sorted(unknown))}")
+        schedules = defaultSchedules or []
+        if app.get("schedules") is not None:
+            schedules = astraBulk.policySchedules(app["schedules"], f"app {name} schedules")
+        hooks = []
+        for hook in app.get("hooks") or []:
+            if not isinstance(hook, dict) or not hook.get("name") or not hook.get("script"):
+                raise ValueError(f"each hook of app {name} needs a name and a script")
+            if hook.get("operation") not in hookOperations:
+                raise ValueError(
+                    f"hook {hook['name']} operation must be one of {', '.join(hookOperations)}"
+                )
+            arguments = hook.get("arguments") or []
+            if not isinstance(arguments, list):
+                arguments = [arguments]
+            hooks.append(
+                {
+                    "name": str(hook["name"]),
+                    "script": str(hook["script"]),
+                    "stage": hook["operation"].split("-")[0],
+                    "action": hook["operation"].split("-")[1],
+                    "arguments": [str(argument) for argument in arguments],
+                    "containerRegex": hook.get("containerRegex"),
+                }
+            )
+        if len({hook["name"] for hook in hooks}) < len(hooks):
+            raise ValueError(f"app {name} has more than one hook of the same name")
+        apps.append(
+            {
+                "name": name,
+                "cluster": str(app["cluster"]),
+                "namespace": str(app.get("namespace") or name),
+                "labelSelector": app.get("labelSelector"),
+                "schedules": schedules,
+                "hooks": hooks,
+            }
+        )
+    if len({(app["name"], app["cluster"]) for app in apps}) < len(apps):
+        raise ValueError(f"{path} has more than one app of the same name on the same cluster")
+    return {"scripts": scripts, "apps": apps}
+
+
+class reconciler(astraSDK.SDKCommon):
+    """Brings Astra Control to a desired state (as loadSpec() returns it) of managed apps, their
+    schedules (protection policies) and execution hooks, and scripts (hook sources), making
+    only the calls needed to get there.
+
+    The current state is read once: the apps and scripts with a call each, then each of the
+    spec's managed apps' schedules and hooks, up to concurrency apps at a time.  It's diffed
+    against the spec, and the changes made in two waves of concurrent calls: the scripts
+    created or updated and the apps managed, then the schedules and hooks (which need the
+    IDs of those) created or updated.  Applying a spec the state already matches makes just
+    the reads.  Nothing which isn't in the spec is ever deleted.
+
+    apply = astraApply.reconciler(quiet=False, output="table")
+    apply.main(astraApply.loadSpec("desired.yaml"))
+    """
+
+    columns = (
+        ("kind", "kind"),
+        ("app", "app"),
+        ("name", "name"),
+        ("action", "action"),
+        ("state", "state"),
+    )
+
+    def __init__(self, quiet=True, verbose=False, output="json", concurrency=8):
+        """quiet: Will there be CLI output or just return (datastructure)
+        verbose: Print all of the ReST call info: URL, Method, Headers, Request Body
+        output: table: pretty print the data
+                json: (default) output in JSON
+                yaml: output in yaml
+                ndjson: one line of JSON per row
+                csv: comma separated values
+        concurrency: the most calls to make at once"""
+        self.quiet = quiet
+        self.verbose = verbose
+        self.output = output
+        self.concurrency = concurrency
+        super().__init__()
+
+    def call(self, method, endpoint, objType, data=None):
+        """Make a call of an astra-objType endpoint, returning the requests response"""
+        url = self.base + endpoint
+        headers = dict(self.headers)
+        headers["accept"] = f"application/astra-{objType}+json"
+        headers["Content-Type"] = f"application/astra-{objType}+json"
+        if data is not None:
+            data = dict(data, type=f"application/astra-{objType}", version="1.0")
+
+        if self.verbose:
+            print(colored(f"API URL: {url}", "green"))
+            print(colored(f"API Method: {method.upper()}", "green"))
+            print(colored(f"API data: {data}", "green"))
+
+        return super().apicall(method, url, data or {}, headers, {}, self.verifySSL, quiet=True)
+
+    def listHooks(self, appID):
+        """appID's execution hooks, or None if they couldn't be listed"""
+        ret = self.call("get", f"k8s/v1/apps/{appID}/executionHooks", "executionHook")
+        if not ret.ok:
+            return None
+        results = super().jsonifyResults(ret)
+        return None if results is None else results.get("items", [])
+
+    @staticmethod
+    def hookArgs(appID, hook, scriptID):
+        """The arguments of astraSDK.createHook().main() (and updateHook's after the hook's ID)
+        for hook (as loadSpec() returns it) of appID"""
+        return (
+            appID,
+            hook["name"],
+            scriptID,
+            hook["stage"],
+            hook["action"],
+            hook["arguments"],
+            hook["containerRegex"],
+        )
+
+    @staticmethod
+    def hookDiffers(current, body):
+        """Whether an existing execution hook differs from the body of a desired one"""
+        fields = ("action", "stage", "hookSourceID", "arguments")
+        if any(current.get(field) != body[field] for field in fields):
+            return True
+        if str(current.get("enabled")).lower() != "true":
+            return True
+        regexes = [c.get("value") for c in current.get("matchingCriteria") or []]
+        return regexes != [c["value"] for c in body.get("matchingCriteria", [])]
+
+    def main(self, spec, dryRun=False):
+        """spec: the desired state, as loadSpec() returns it
+        dryRun: only work out (and show) what would be created, updated and managed"""
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            apps = pool.submit(astraSDK.getApps(verbose=self.verbose).main)
+            scripts = pool.submit(astraSDK.getScripts(verbose=self.verbose).main)
+            apps, scripts = apps.result(), scripts.result()
+            if apps is False or scripts is False:
+                if not self.quiet:
+                    print("astraSDK.getApps() or astraSDK.getScripts() failed")
+                return False
+            # The spec's apps which are already managed, by (name, cluster name or ID)
+            self.appIDs = {}
+            for app in apps["items"]:
+                for cluster in (app["clusterName"], app["clusterID"]):
+                    self.appIDs.setdefault((app["name"], cluster), app["id"])
+            managed = list(
+                dict.fromkeys(
+                    self.appIDs[(app["name"], app["cluster"])]
+                    for app in spec["apps"]
+                    if (app["name"], app["cluster"]) in self.appIDs
+                )
+            )
+            lister = astraBulk.scheduleLister(self.verbose)
+            schedules = dict(zip(managed, pool.map(lister.main, managed)))
+            hooks = dict(zip(managed, pool.map(self.listHooks, managed)))
+        self.scriptIDs = {script["name"]: script["id"] for script in scripts["items"]}
+        clusters = {}
+        if any((app["name"], app["cluster"]) not in self.appIDs for app in spec["apps"]):
+            # Only an app which has to be managed needs its cluster's ID
+            listing = astraSDK.getClusters(verbose=self.verbose).main()
+            for cluster in listing["items"] if listing else []:
+                if cluster.get("managedState") == "managed":
+                    clusters[cluster["id"]] = clusters[cluster["name"]] = cluster["id"]
+
+        # Each wave is a list of (row, the call which makes the row's change)
+        rows, first, second = [], [], []
+        for script in spec["scripts"]:
+            row = self.row("script", None, script["name"], "create")
+            current = next((s for s in scripts["items"] if s["name"] == script["name"]), None)
+            if current is None:
+                first.append((row, functools.partial(self.createScript, script)))
+            elif (current.get("source"), current.get("description") or "") != (
+                script["source"],
+                script["description"],
+            ):
+                row["action"] = "update"
+                first.append((row, functools.partial(self.updateScript, current["id"], script)))
+            else:
+                row["action"], row["state"] = "none", "unchanged"
+            rows.append(row)
+        specScripts = {script["name"] for script in spec["scripts"]}
+
+        for app in spec["apps"]:
+            key = (app["name"], app["cluster"])
+            row = self.row("app", app["name"], app["namespace"], "manage")
+            appID = self.appIDs.get(key)
+            if appID is None:
+                if app["cluster"] in clusters:
+                    first.append((row, functools.partial(self.manage, app, clusters[key[1]])))
+                else:
+                    row["state"] = "noCluster"
+                currentSchedules, currentHooks = [], []
+            else:
+                row["action"], row["state"] = "none", "unchanged"
+                currentSchedules, currentHooks = schedules[appID], hooks[appID]
+                if currentSchedules is None or currentHooks is None:
+                    row["state"] = "listFailed"
+            rows.append(row)
+            if row["state"] in ("noCluster", "listFailed"):
+                continue
+
+            for schedule, action, scheduleID in astraBulk.policyApplier.diff(
+                currentSchedules, app["schedules"]
+            ):
+                row = self.row("schedule", app["name"], schedule["granularity"], action)
+                if action == "none":
+                    row["state"] = "unchanged"
+                else:
+                    second.append(
+                        (row, functools.partial(self.putSchedule, key, schedule, scheduleID))
+                    )
+                rows.append(row)
+
+            for hook in app["hooks"]:
+                row = self.row("hook", app["name"], hook["name"], "create")
+                current = next((h for h in currentHooks if h["name"] == hook["name"]), None)
+                if hook["script"] not in self.scriptIDs and hook["script"] not in specScripts:
+                    row["state"] = "noScript"
+                elif current is None:
+                    second.append((row, functools.partial(self.putHook, key, hook, None)))
+                elif hook["script"] in self.scriptIDs and not self.hookDiffers(
+                    current,
+                    astraSDK.createHook.body(
+                        *self.hookArgs(appID, hook, self.scriptIDs[hook["script"]])
+                    ),
+                ):
+                    row["action"], row["state"] = "none", "unchanged"
+                else:
+                    row["action"] = "update"
+                    second.append((row, functools.partial(self.putHook, key, hook, current["id"])))
+                rows.append(row)
+
+        if not dryRun:
+            # The scripts and apps first, as the schedules and hooks need their IDs
+            for wave in (first, second):
+                with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                    list(pool.map(self.run, wave))
+        results = {"items": rows}
+        if not self.quiet:
+            self.show(results)
+        return results
+
+    def run(self, step):
+        row, change = step
+        row["state"] = change()
+        if not self.quiet:
+            astraOutput.progress(f"{row['kind']} {row['app'] or ''} {row['name']}: {row['state']}")
+
+    def createScript(self, script):
+        results = astraSDK.createScript(verbose=self.verbose).main(
+            script["name"], script["source"], script["description"]
+        )
+        if not results:
+            return "failed"
+        self.scriptIDs[script["name"]] = results["id"]
+        return "created"
+
+    def updateScript(self, scriptID, script):
+        updated = astraSDK.updateScript(verbose=self.verbose).main(
+            scriptID, script["name"], script["source"], script["description"]
+        )
+        return "updated" if updated else "failed"
+
+    def manage(self, app, clusterID):
+        results = astraSDK.manageApp(verbose=self.verbose).main(
+            app["name"], app["namespace"], clusterID, app["labelSelector"]
+        )
+        if results is False:
+            return "failed"
+        self.appIDs[(app["name"], app["cluster"])] = results["id"]
+        return "managed"
+
+    def putSchedule(self, key, schedule, scheduleID):
+        appID = self.appIDs.get(key)
+        if appID is None:
+            # The app couldn't be managed
+            return "skipped"
+        if scheduleID is None:
+            created = astraBulk.createSchedules(appID, [schedule])
+            return "created" if created else "failed"
+        updater = astraBulk.policyApplier(verbose=self.verbose)
+        return "updated" if updater.updateSchedule(appID, scheduleID, schedule) else "failed"
+
+    def putHook(self, key, hook, hookID):
+        appID, scriptID = self.appIDs.get(key), self.scriptIDs.get(hook["script"])
+        if appID is None or scriptID is None:
+            # The app couldn't be managed, or the script created
+            return "skipped"
+        args = self.hookArgs(appID, hook, scriptID)
+        if hookID is None:
+            created = astraSDK.createHook(verbose=self.verbose).main(*args)
+            return "created" if created else "failed"
+        updated = astraSDK.updateHook(verbose=self.verbose).main(hookID, *args)
+        return "updated" if updated else "failed"
+
+    @staticmethod
+    def row(kind, app, name, action, state="planned"):
+        return {"kind": kind, "app": app, "name": name, "action": action, "state": state}
+
+    def show(self, results):
+        astraOutput.showResults(self.output, results, self.columns)
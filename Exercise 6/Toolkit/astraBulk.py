@@ -0,0 +1,1386 @@
+#!/usr/bin/env python
+"""
+   Copyright 2021 NetApp, Inc
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import collections
+import fnmatch
+import hashlib
+import os
+import threading
+import time
+import yaml
+from concurrent.futures import ThreadPoolExecutor
+from termcolor import colored
+
+try:
+    from . import astraInventory
+    from . import astraOutput
+    from . import astraSDK
+    from . import astraStore
+    from . import astraTime
+except ImportError:
+    import astraInventory
+    import astraOutput
+    import astraSDK
+    import astraStore
+    import astraTime
+
+# The granularities of a protection policy's schedules
+granularities = ("hourly", "daily", "weekly", "monthly")
+# The protection policy toolkit.py deploy gives each app it deploys (and manage apps --protect
+# each app it manages): a schedule of each granularity, keeping one snapshot and one backup
+defaultSchedules = tuple(
+    {
+        "granularity": granularity,
+        "dayOfWeek": dayOfWeek,
+        "dayOfMonth": dayOfMonth,
+        "hour": hour,
+        "minute": "0",
+        "snapshotRetention": "1",
+        "backupRetention": "1",
+    }
+    for granularity, dayOfWeek, dayOfMonth, hour in (
+        ("hourly", "*", "*", "*"),
+        ("daily", "*", "*", "2"),
+        ("weekly", "0", "*", "2"),
+        ("monthly", "*", "1", "2"),
+    )
+)
+
+# The fields of a schedule which a protection policy sets
+scheduleFields = (
+    "granularity",
+    "minute",
+    "hour",
+    "dayOfWeek",
+    "dayOfMonth",
+    "snapshotRetention",
+    "backupRetention",
+)
+
+
+def policySchedule(schedule):
+    """A schedule of a protection policy file checked (by the same rules as toolkit.py create
+    protectionpolicy) and filled out into createSchedules()'s form, with every field a string
+    and those the granularity doesn't use set to "*".  Raises ValueError if it's not valid."""
+    if not isinstance(schedule, dict):
+        raise ValueError(f"a schedule must be a mapping, not {schedule!r}")
+    unknown = set(schedule) - set(scheduleFields)
+    if unknown:
+        raise ValueError(f"unknown schedule fields: {', '.join(sorted(unknown))}")
+    granularity = schedule.get("granularity")
+    # field: (the granularities which require it, the granularities which allow it, range)
+    rules = {
+        "minute": ((), ("hourly", "daily", "weekly", "monthly"), range(60)),
+        "hour": (("daily", "weekly", "monthly"), ("daily", "weekly", "monthly"), range(24)),
+        "dayOfWeek": (("weekly",), ("weekly",), range(7)),
+        "dayOfMonth": (("monthly",), ("monthly",), range(1, 32)),
+        "snapshotRetention": (granularities, granularities, range(60)),
+        "backupRetention": (granularities, granularities, range(60)),
+    }
+    if granularity not in granularities:
+        raise ValueError(f"granularity must be one of {', '.join(granularities)}")
+    ret = {"granularity": granularity}
+    for field, (required, allowed, values) in rules.items():
+        value = schedule.get(field)
+        if value is None:
+            if granularity in required:
+                raise ValueError(f"{granularity} schedules require {field}")
+            ret[field] = "0" if field == "minute" else "*"
+            continue
+        if granularity not in allowed:
+            raise ValueError(f"{granularity} schedules must not specify {field}")
+        try:
+            valid = int(value) in values
+        except (TypeError, ValueError):
+            valid = False
+        if not valid:
+            raise ValueError(f"{field} must be from {values.start} to {values.stop - 1}")
+        ret[field] = str(int(value))
+    return ret
+
+
+def loadPolicy(path):
+    """The schedules of the protection policy file at path, a YAML list of schedules (or a
+    mapping with one under "schedules"), each a mapping of granularity and the other
+    scheduleFields.  Raises ValueError if the file can't be read or isn't valid."""
+    try:
+        with open(path) as f:
+            policy = astraOutput.yamlLoad(f)
+    except (OSError, yaml.YAMLError) as e:
+        raise ValueError(f"{path} not read: {e}")
+    if isinstance(policy, dict):
+        policy = policy.get("schedules")
+    return policySchedules(policy, path)
+
+
+def policySchedules(policy, source):
+    """policy, a list of schedules read from source, each checked by policySchedule(), with no
+    two of the same granularity.  Raises ValueError if it isn't valid."""
+    if not isinstance(policy, list) or not policy:
+        raise ValueError(f"{source} must hold a list of schedules")
+    schedules = [policySchedule(schedule) for schedule in policy]
+    seen = [schedule["granularity"] for schedule in schedules]
+    if len(set(seen)) < len(seen):
+        raise ValueError(f"{source} has more than one schedule of the same granularity")
+    return schedules
+
+
+def createSchedules(appID, schedules, creator=None):
+    """Create each of schedules (dicts of astraSDK.createProtectionpolicy's arguments, such as
+    defaultSchedules) on appID, returning the number which were created"""
+    if creator is None:
+        creator = astraSDK.createProtectionpolicy(quiet=True)
+    created = 0
+    for schedule in schedules:
+        ret = creator.main(
+            schedule["granularity"],
+            schedule["backupRetention"],
+            schedule["snapshotRetention"],
+            schedule["dayOfWeek"],
+            schedule["dayOfMonth"],
+            schedule["hour"],
+            schedule["minute"],
+            appID,
+        )
+        if ret is not False:
+            created += 1
+    return created
+
+
+def scheduleMinutes(schedule):
+    """The minutes of the day (0 to 1439) a schedule starts at, on the days it runs"""
+    try:
+        minute = int(schedule.get("minute"))
+        if schedule.get("granularity") == "hourly":
+            return [hour * 60 + minute for hour in range(24)]
+        return [int(schedule.get("hour")) * 60 + minute]
+    except (TypeError, ValueError):
+        return []
+
+
+class schedulePlanner:
+    """Picks the minute each app's schedules start at (and, over a window of hours from the
+    schedule's own hour, the hour), so that a fleet's snapshots and backups don't all start
+    at once, as they would if every app got the same schedule.
+
+    method hash picks from the slots (minutes of the window) by a hash of the appID and
+    granularity: it needs nothing but the app, and always picks the same slot for the same
+    app.  method balance picks the slot where the fewest schedules start, counting every
+    schedule added to the load (with addLoad(), or planned) so far; ties go by the hash.  An
+    app's current schedule of the same granularity is kept where it is, if it's inside the
+    window, so that balancing again doesn't move schedules around.  method none leaves the
+    schedules as they are.
+
+    planner = astraBulk.schedulePlanner("hash", window=4)
+    schedules = planner.plan(appID, astraBulk.defaultSchedules)
+    """
+
+    methods = ("hash", "balance", "none")
+
+    def __init__(self, method="hash", window=1):
+        """method: hash, balance or none
+        window: the number of hours, from a daily, weekly or monthly schedule's own hour, its
+                start can be moved to (1 moves just the minute)"""
+        if method not in self.methods:
+            raise ValueError(f"method must be one of {', '.join(self.methods)}")
+        self.method = method
+        self.window = window
+        # The number of schedules which start at each minute of the day
+        self.load = [0] * 1440
+
+    def addLoad(self, schedules, count=1):
+        """Count schedules (dicts of at least granularity, hour and minute) in the load"""
+        for schedule in schedules:
+            for minute in scheduleMinutes(schedule):
+                self.load[minute] += count
+
+    def slots(self, schedule):
+        """The (hour, minute) slots schedule can be moved to, hour "*" for hourly schedules"""
+        if schedule["granularity"] == "hourly":
+            return [("*", minute) for minute in range(60)]
+        first = int(schedule["hour"])
+        return [
+            ((first + offset) % 24, minute) for offset in range(self.window) for minute in range(60)
+        ]
+
+    @staticmethod
+    def slotOf(schedule):
+        """The (hour, minute) slot of an existing schedule, or None"""
+        try:
+            minute = int(schedule.get("minute"))
+            if schedule.get("granularity") == "hourly":
+                return "*", minute
+            return int(schedule.get("hour")), minute
+        except (TypeError, ValueError):
+            return None
+
+    def choose(self, appID, schedule):
+        slots = self.slots(schedule)
+        digest = hashlib.sha256(f"{appID}/{schedule['granularity']}".encode()).digest()
+        start = int.from_bytes(digest[:8], "big") % len(slots)
+        if self.method == "hash":
+            return slots[start]
+        # Going round from the hashed slot, so apps with equal loads don't all take the first
+        best = None
+        for i in range(len(slots)):
+            hour, minute = slots[(start + i) % len(slots)]
+            minutes = scheduleMinutes(
+                {"granularity": schedule["granularity"], "hour": hour, "minute": minute}
+            )
+            cost = max(self.load[m] for m in minutes)
+            if best is None or cost < best[0]:
+                best = (cost, hour, minute)
+        return best[1], best[2]
+
+    def plan(self, appID, schedules, current=()):
+        """schedules (dicts as createSchedules() takes them) with the minute and hour appID's
+        should start at, counted in the load.  current: appID's existing schedules, which are
+        taken out of the load (as they're replaced), and kept where they are if balancing."""
+        if self.method == "none":
+            return list(schedules)
+        self.addLoad(current, -1)
+        ret = []
+        for schedule in schedules:
+            kept = None
+            if self.method == "balance":
+                slots = set(self.slots(schedule))
+                kept = next(
+                    (
+                        self.slotOf(c)
+                        for c in current
+                        if c.get("granularity") == schedule["granularity"]
+                        and self.slotOf(c) in slots
+                    ),
+                    None,
+                )
+            hour, minute = kept or self.choose(appID, schedule)
+            planned = dict(schedule, hour=str(hour), minute=str(minute))
+            self.addLoad([planned])
+            ret.append(planned)
+        return ret
+
+
+def selectApps(apps, cluster=None, labels=None):
+    """The apps (dicts, as astraSDK.getApps() returns them) of cluster (a name or ID), which
+    carry every one of labels, each either "name=value" or just "name" (with any value)"""
+    wanted = []
+    for label in labels or []:
+        name, sep, value = label.partition("=")
+        wanted.append((name, value if sep else None))
+    ret = []
+    for app in apps:
+        if cluster is not None and cluster not in (app.get("clusterID"), app.get("clusterName")):
+            continue
+        appLabels = {
+            label.get("name"): label.get("value")
+            for label in (app.get("metadata") or {}).get("labels") or []
+        }
+        if all(
+            name in appLabels and (value is None or appLabels[name] == value)
+            for name, value in wanted
+        ):
+            ret.append(app)
+    return ret
+
+
+class protectionWaiter(astraSDK.SDKCommon):
+    """Waits for many snapshots (or backups) of many apps to finish, with a single poller,
+    rather than a loop per snapshot each listing every snapshot of every app.
+
+    Each round lists just the apps with a snapshot still in progress (up to concurrency of
+    them at a time), filtered server side to the snapshot's name where it can be, and picks
+    out every snapshot which has completed or failed.
+
+    waiter = astraBulk.protectionWaiter("snapshot")
+    waiter.add(appID, snapID, snapName)
+    finished = waiter.wait(timeout=600)  # {snapID: "completed"}
+    """
+
+    collections = {"snapshot": "appSnaps", "backup": "appBackups"}
+    finalStates = ("completed", "failed")
+
+    def __init__(self, protectionType="snapshot", concurrency=8, interval=5, verbose=False):
+        """protectionType: snapshot or backup
+        concurrency: the most apps to list at once
+        interval: seconds between rounds
+        verbose: Print all of the ReST call info: URL, Method, Headers, Request Body"""
+        self.protectionType = protectionType
+        self.concurrency = concurrency
+        self.interval = interval
+        self.verbose = verbose
+        super().__init__()
+        # appID: {objID: name} of the objects still in progress
+        self.pending = {}
+
+    def add(self, appID, objID, name=None):
+        """Wait for appID's snapshot or backup objID (named name, if known) too"""
+        self.pending.setdefault(appID, {})[objID] = name
+
+    def check(self, appID):
+        """{objID: state} of appID's pending objects which have finished, or None if they
+        couldn't be listed"""
+        objects = self.pending[appID]
+        endpoint = f"k8s/v1/apps/{appID}/{self.collections[self.protectionType]}"
+        url = self.base + endpoint
+        data = {}
+        names = set(objects.values())
+        params = {}
+        if len(names) == 1 and None not in names:
+            params["filter"] = f"name eq '{names.pop()}'"
+
+        if self.verbose:
+            print(colored(f"API URL: {url}", "green"))
+            print(colored("API Method: GET", "green"))
+            print(colored(f"API params: {params}", "green"))
+
+        ret = super().getList(url, data, params)
+        if not ret.ok:
+            return None
+        results = super().jsonifyResults(ret)
+        if results is None:
+            return None
+        return {
+            obj["id"]: obj["state"]
+            for obj in results.get("items", [])
+            if obj.get("id") in objects and obj.get("state") in self.finalStates
+        }
+
+    def poll(self):
+        """A single round, returning {objID: state} of the objects which finished in it"""
+        appIDs = list(self.pending)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            results = list(pool.map(self.check, appIDs))
+        finished = {}
+        for appID, states in zip(appIDs, results):
+            for objID, state in (states or {}).items():
+                del self.pending[appID][objID]
+                finished[objID] = state
+            if not self.pending[appID]:
+                del self.pending[appID]
+        return finished
+
+    def wait(self, timeout=None, onFinish=None):
+        """Poll until every object has finished, or timeout seconds have passed, calling
+        onFinish(objID, state) as each one finishes.  Returns {objID: state} of those which
+        finished; any others are left in pending."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        finished = {}
+        while self.pending:
+            for objID, state in self.poll().items():
+                finished[objID] = state
+                if onFinish:
+                    onFinish(objID, state)
+            if not self.pending or (deadline is not None and time.monotonic() >= deadline):
+                break
+            time.sleep(self.interval)
+        return finished
+
+
+class bulkProtect:
+    """Snapshots (or backs up) many apps at once, with at most concurrency requests to take
+    one in flight at a time, then waits for all of them with a single protectionWaiter.
+    Apps whose snapshot couldn't be started, or failed, are tried again (up to retries more
+    times), without taking another snapshot of the apps which succeeded.
+
+    The result has a row per app of its final state, the ID of its snapshot, how many
+    attempts it took, and how many seconds its last attempt took to complete.
+
+    Given an astraJournal.journal, each app's snapshot is recorded in it as it's planned,
+    submitted and finished.  A journal which is being resumed has the apps whose snapshot
+    completed left alone, and those whose snapshot was submitted waited on, rather than
+    taking another snapshot of either.
+
+    apps = astraBulk.selectApps(astraSDK.getApps().main()["items"], cluster="prod-east")
+    astraBulk.bulkProtect("snapshot", quiet=False, output="table").main(apps, "pre-maint")
+    """
+
+    columns = (
+        ("appName", "appName"),
+        ("appID", "appID"),
+        ("clusterName", "clusterName"),
+        ("state", "state"),
+        ("protectionID", "protectionID"),
+        ("attempts", "attempts"),
+        ("seconds", "seconds"),
+    )
+    # States of an app's row which are tried again
+    retryStates = ("failed", "submitFailed")
+
+    def __init__(
+        self,
+        protectionType="snapshot",
+        quiet=True,
+        verbose=False,
+        output="json",
+        concurrency=8,
+        interval=5,
+        journal=None,
+    ):
+        """protectionType: snapshot or backup
+        quiet: Will there be CLI output or just return (datastructure)
+        verbose: Print all of the ReST call info: URL, Method, Headers, Request Body
+        output: table: pretty print the data
+                json: (default) output in JSON
+                yaml: output in yaml
+                ndjson: one line of JSON per row
+                csv: comma separated values
+        concurrency: the most requests to take a snapshot (or list them) in flight at once
+        interval: seconds between checks on the snapshots in progress
+        journal: an astraJournal.journal to record (and resume) each app's snapshot in"""
+        self.protectionType = protectionType
+        self.quiet = quiet
+        self.verbose = verbose
+        self.output = output
+        self.concurrency = concurrency
+        self.interval = interval
+        self.journal = journal
+
+    def resume(self, apps, rows):
+        """Set the rows of apps the journal has a snapshot of as it left them, returning
+        ({appID: (protectionID, name)} of the snapshots submitted but not finished, the apps
+        still to be snapshotted).  Without a journal, every app is still to be snapshotted."""
+        if self.journal is None:
+            return {}, list(apps)
+        submitted = {}
+        todo = []
+        for app in apps:
+            entry = self.journal.entry(app["id"])
+            if entry is None or entry["event"] in ("planned", "failed"):
+                if entry is None:
+                    self.journal.record(app["id"], "planned")
+                todo.append(app)
+                continue
+            row = rows[app["id"]]
+            row["protectionID"] = entry["id"]
+            row["attempts"] = entry.get("attempts", 1)
+            if entry["event"] == "completed":
+                row["state"] = "completed"
+            elif entry["id"] is None:
+                # Submitted, but the API didn't return an ID to wait on
+                row["state"] = "submitted"
+            else:
+                row["state"] = "pending"
+                submitted[app["id"]] = (entry["id"], entry.get("name"))
+        return submitted, todo
+
+    def record(self, row, event, name=None):
+        """Record the latest event of row's app in the journal, if there is one"""
+        if self.journal is not None:
+            self.journal.record(
+                row["appID"], event, row["protectionID"], name=name, attempts=row["attempts"]
+            )
+
+    def main(self, apps, name, retries=1, timeout=None, background=False):
+        """apps: the apps (dicts, as astraSDK.getApps() returns them) to protect
+        name: the name of each app's snapshot, retries have -retryN appended
+        retries: how many more times to try apps which failed
+        timeout: seconds to wait for every snapshot in all, by default for as long as it takes
+        background: don't wait for the snapshots to complete (nor retry any)"""
+        if self.protectionType == "backup":
+            taker = astraSDK.takeBackup(verbose=self.verbose)
+        else:
+            taker = astraSDK.takeSnap(verbose=self.verbose)
+        rows = {
+            app["id"]: {
+                "appName": app["name"],
+                "appID": app["id"],
+                "clusterName": app.get("clusterName"),
+                "state": None,
+                "protectionID": None,
+                "attempts": 0,
+                "seconds": None,
+            }
+            for app in apps
+        }
+        deadline = None if timeout is None else time.monotonic() + timeout
+        resumed, todo = self.resume(apps, rows)
+        for attempt in range(retries + 1):
+            if not todo and not resumed:
+                break
+            attemptName = name if attempt == 0 else f"{name}-retry{attempt}"
+
+            # Each row is set (and journaled) as soon as its request returns, so that the
+            # journal has every snapshot taken, even if main() is cut short
+            def submit(app):
+                start = time.monotonic()
+                protectionID = taker.main(app["id"], attemptName)
+                row = rows[app["id"]]
+                row["attempts"] += 1
+                row["seconds"] = None
+                if protectionID is False:
+                    row["state"] = "submitFailed"
+                    row["protectionID"] = None
+                    self.record(row, "failed", attemptName)
+                else:
+                    row["state"] = "pending"
+                    row["protectionID"] = None if protectionID is True else protectionID
+                    self.record(row, "submitted", attemptName)
+                return app, start, protectionID
+
+            waiter = protectionWaiter(
+                self.protectionType, self.concurrency, self.interval, self.verbose
+            )
+            # protectionID: (the app's row, when its request was made)
+            started = {}
+            # The snapshots a resumed journal had submitted are waited on with the first ones
+            for appID, (protectionID, resumedName) in resumed.items():
+                if not background:
+                    waiter.add(appID, protectionID, resumedName)
+                    started[protectionID] = (rows[appID], time.monotonic())
+                else:
+                    rows[appID]["state"] = "submitted"
+            resumed = {}
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                for app, start, protectionID in pool.map(submit, todo):
+                    row = rows[app["id"]]
+                    if protectionID is False:
+                        continue
+                    if protectionID is True or background:
+                        # Either the API didn't return an ID to wait on, or we aren't waiting
+                        row["state"] = "submitted"
+                    else:
+                        waiter.add(app["id"], protectionID, attemptName)
+                        started[protectionID] = (row, start)
+            if background:
+                break
+
+            def finish(objID, state):
+                row, start = started[objID]
+                row["state"] = state
+                row["seconds"] = round(time.monotonic() - start, 1)
+                self.record(row, state)
+                if not self.quiet:
+                    astraOutput.progress(f"{row['appName']}: {state} in {row['seconds']}s")
+
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            waiter.wait(remaining, finish)
+            for appID in waiter.pending:
+                rows[appID]["state"] = "timedOut"
+            todo = [app for app in apps if rows[app["id"]]["state"] in self.retryStates]
+
+        results = {"items": list(rows.values())}
+        if not self.quiet:
+            self.show(results)
+        return results
+
+    def show(self, results):
+        astraOutput.showResults(self.output, results, self.columns)
+
+
+class backupScheduler(bulkProtect):
+    """Backs up many apps while keeping the load on the object store and the clusters'
+    networks in check: at most maxInFlight backups at once, at most perCluster of them from
+    any one cluster, and, given a rate, starting no more than rate apps an hour.
+
+    Apps are backed up largest first, going by their number of persistent volume claims (from
+    getAppAssets), so that the longest backups don't start last and hold up the end of the
+    run.  Every backup in flight is tracked by a single protectionWaiter, and as each one
+    finishes its slot goes to the next app whose cluster has room.  Apps whose backup couldn't
+    be started or failed go back on the end of the queue, up to retries more times.
+
+    rate, maxInFlight and perCluster can be changed while main() runs, either from another
+    thread, or through the control file, which is read again whenever it's modified.  It holds
+    either just a number (the rate), or a YAML mapping of any of the three.
+
+    As with bulkProtect, given a journal which is being resumed, the backups it had submitted
+    are waited on (and count towards the caps) rather than being started again.
+
+    scheduler = astraBulk.backupScheduler(maxInFlight=20, perCluster=4, rate=120)
+    scheduler.main(apps, "nightly")
+    """
+
+    columns = (
+        ("appName", "appName"),
+        ("appID", "appID"),
+        ("clusterName", "clusterName"),
+        ("pvcs", "pvcs"),
+        ("state", "state"),
+        ("protectionID", "protectionID"),
+        ("attempts", "attempts"),
+        ("seconds", "seconds"),
+    )
+    # Settings which can be changed while a run is under way
+    controlFields = ("rate", "maxInFlight", "perCluster")
+
+    def __init__(
+        self,
+        quiet=True,
+        verbose=False,
+        output="json",
+        maxInFlight=10,
+        perCluster=3,
+        rate=None,
+        control=None,
+        concurrency=8,
+        interval=5,
+        journal=None,
+    ):
+        """quiet: Will there be CLI output or just return (datastructure)
+        verbose: Print all of the ReST call info: URL, Method, Headers, Request Body
+        output: table: pretty print the data
+                json: (default) output in JSON
+                yaml: output in yaml
+                ndjson: one line of JSON per row
+                csv: comma separated values
+        maxInFlight: the most backups in progress at once (None for no limit)
+        perCluster: the most backups in progress at once from any one cluster (None for no
+                    limit)
+        rate: the most backups to start an hour (None for no limit)
+        control: a file to read new rate, maxInFlight and perCluster settings from
+        concurrency: the most requests to list app assets (or backups) in flight at once
+        interval: seconds between checks on the backups in progress
+        journal: an astraJournal.journal to record (and resume) each app's backup in"""
+        super().__init__("backup", quiet, verbose, output, concurrency, interval, journal)
+        self.maxInFlight = maxInFlight
+        self.perCluster = perCluster
+        self.rate = rate
+        self.control = control
+        self.controlStamp = None
+
+    def pvcCounts(self, apps):
+        """{appID: its number of persistent volume claims, or None if its assets couldn't be
+        listed}, listing the assets of up to concurrency apps at a time"""
+        assets = astraSDK.getAppAssets(verbose=self.verbose)
+
+        def count(app):
+            ret = assets.main(app["id"], where="assetType=PersistentVolumeClaim")
+            return app["id"], len(ret["items"]) if isinstance(ret, dict) else None
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            return dict(pool.map(count, apps))
+
+    def readControl(self):
+        """Apply the settings in the control file, if it's been modified since it was last
+        read"""
+        if not self.control:
+            return
+        try:
+            stamp = os.stat(self.control).st_mtime_ns
+        except OSError:
+            return
+        if stamp == self.controlStamp:
+            return
+        self.controlStamp = stamp
+        try:
+            with open(self.control) as f:
+                settings = astraOutput.yamlLoad(f)
+        except (OSError, yaml.YAMLError) as e:
+            astraOutput.progress(f"{self.control} not read: {e}")
+            return
+        if isinstance(settings, (int, float)):
+            settings = {"rate": settings}
+        if not isinstance(settings, dict):
+            return
+        for field in self.controlFields:
+            if field in settings and getattr(self, field) != settings[field]:
+                setattr(self, field, settings[field])
+                if not self.quiet:
+                    astraOutput.progress(f"{field} set to {settings[field]}")
+
+    def main(self, apps, name, retries=1, timeout=None):
+        """apps: the apps (dicts, as astraSDK.getApps() returns them) to back up
+        name: the name of each app's backup, retries have -retryN appended
+        retries: how many more times to try apps which failed
+        timeout: seconds to run for in all, by default for as long as it takes"""
+        taker = astraSDK.takeBackup(verbose=self.verbose)
+        pvcs = self.pvcCounts(apps)
+        rows = {
+            app["id"]: {
+                "appName": app["name"],
+                "appID": app["id"],
+                "clusterName": app.get("clusterName"),
+                "pvcs": pvcs[app["id"]],
+                "state": "queued",
+                "protectionID": None,
+                "attempts": 0,
+                "seconds": None,
+            }
+            for app in apps
+        }
+        resumed, todo = self.resume(apps, rows)
+        # Largest first, apps whose assets couldn't be listed last
+        queue = collections.deque(
+            sorted(
+                todo,
+                key=lambda app: -1 if pvcs[app["id"]] is None else pvcs[app["id"]],
+                reverse=True,
+            )
+        )
+        waiter = protectionWaiter("backup", self.concurrency, self.interval, self.verbose)
+        # protectionID: (app, when its backup was started)
+        started = {}
+        clusterLoad = collections.Counter()
+        for app in apps:
+            if app["id"] in resumed:
+                protectionID, resumedName = resumed[app["id"]]
+                waiter.add(app["id"], protectionID, resumedName)
+                started[protectionID] = (app, time.monotonic())
+                clusterLoad[app.get("clusterID")] += 1
+        deadline = None if timeout is None else time.monotonic() + timeout
+        nextStart = nextPoll = time.monotonic()
+
+        def requeue(app):
+            if rows[app["id"]]["attempts"] <= retries:
+                queue.append(app)
+                return True
+            return False
+
+        while queue or started:
+            self.readControl()
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                break
+
+            # Start as many backups as the caps and the rate allow
+            blocked = False
+            while queue and now >= nextStart:
+                if self.maxInFlight is not None and len(started) >= self.maxInFlight:
+                    blocked = True
+                    break
+                app = next(
+                    (
+                        app
+                        for app in queue
+                        if self.perCluster is None
+                        or clusterLoad[app.get("clusterID")] < self.perCluster
+                    ),
+                    None,
+                )
+                if app is None:
+                    blocked = True
+                    break
+                queue.remove(app)
+                row = rows[app["id"]]
+                row["attempts"] += 1
+                row["seconds"] = None
+                attemptName = name if row["attempts"] == 1 else f"{name}-retry{row['attempts'] - 1}"
+                protectionID = taker.main(app["id"], attemptName)
+                if protectionID is False:
+                    row["state"] = "submitFailed"
+                    row["protectionID"] = None
+                    self.record(row, "failed", attemptName)
+                    requeue(app)
+                elif protectionID is True:
+                    # The API didn't return an ID to wait on
+                    row["state"] = "submitted"
+                    row["protectionID"] = None
+                    self.record(row, "submitted", attemptName)
+                else:
+                    row["state"] = "pending"
+                    row["protectionID"] = protectionID
+                    self.record(row, "submitted", attemptName)
+                    waiter.add(app["id"], protectionID, attemptName)
+                    started[protectionID] = (app, now)
+                    clusterLoad[app.get("clusterID")] += 1
+                if self.rate:
+                    nextStart = max(nextStart, now) + 3600 / self.rate
+
+            if started and now >= nextPoll:
+                for objID, state in waiter.poll().items():
+                    app, start = started.pop(objID)
+                    clusterLoad[app.get("clusterID")] -= 1
+                    row = rows[app["id"]]
+                    row["state"] = state
+                    row["seconds"] = round(time.monotonic() - start, 1)
+                    self.record(row, state)
+                    if not self.quiet:
+                        astraOutput.progress(f"{row['appName']}: {state} in {row['seconds']}s")
+                    if state == "failed":
+                        requeue(app)
+                nextPoll = time.monotonic() + self.interval
+
+            # Sleep until the next poll, or the next start if one could happen before then
+            wake = nextPoll if started else None
+            if queue and not blocked:
+                wake = nextStart if wake is None else min(wake, nextStart)
+            if wake is not None:
+                time.sleep(max(wake - time.monotonic(), 0))
+            elif queue:
+                # Nothing in flight, yet nothing can start (a cap of 0), until the control
+                # file says otherwise
+                time.sleep(self.interval)
+
+        for app, _ in started.values():
+            rows[app["id"]]["state"] = "timedOut"
+        for app in queue:
+            if not rows[app["id"]]["attempts"]:
+                rows[app["id"]]["state"] = "notStarted"
+
+        results = {"items": list(rows.values())}
+        if not self.quiet:
+            self.show(results)
+        return results
+
+
+def retentionPlan(inv, kind, keepLast=None, keepDays=None, apps=None, now=None):
+    """The objects of kind (snapshots or backups) in the astraInventory.inventory inv which a
+    retention policy doesn't keep, oldest first.  Of each of apps' (by default every app's)
+    objects, the keepLast youngest completed ones are kept, and so is every one created within
+    the last keepDays days (as of now); with both, an object either keeps is kept.  Failed
+    objects never count towards keepLast, and objects still in progress are always kept."""
+    if keepLast is None and keepDays is None:
+        raise ValueError("a retention policy needs keepLast, keepDays or both")
+    if now is None:
+        now = astraTime.currentEpoch()
+    cutoff = None if keepDays is None else now - keepDays * 86400
+    if apps is None:
+        apps = inv.find("apps")
+    plan = []
+    for app in apps:
+        kept = set()
+        if keepLast is not None:
+            kept.update(
+                obj.id for obj in inv.byAge(kind, limit=keepLast, appID=app.id, state="completed")
+            )
+        for obj in inv.find(kind, appID=app.id):
+            if obj.state not in ("completed", "failed") or obj.id in kept:
+                continue
+            if cutoff is not None and (obj.createdEpoch is None or obj.createdEpoch >= cutoff):
+                continue
+            plan.append(obj)
+    plan.sort(key=lambda obj: obj.createdEpoch or 0)
+    return plan
+
+
+class rateLimiter:
+    """Spaces out calls made from any number of threads to at most rate a second: each call
+    to wait() takes the next free slot, and sleeps until it comes round.
+
+    limiter = astraBulk.rateLimiter(5)
+    limiter.wait()
+    """
+
+    def __init__(self, rate=None):
+        """rate: the most calls a second (None for no limit)"""
+        self.rate = rate
+        self.lock = threading.Lock()
+        self.nextSlot = 0.0
+
+    def wait(self):
+        if not self.rate:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.nextSlot, now)
+            self.nextSlot = slot + 1 / self.rate
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class pruner(astraSDK.SDKCommon):
+    """Deletes the snapshots and backups a retention policy (see retentionPlan()) doesn't
+    keep: every snapshot or backup but the last keepLast of each app, or older than keepDays.
+
+    The policy is worked out against the inventory (the shared astraInventory.inventory, or,
+    given database, a local astraStore SQLite file), without an API call per app.  With
+    dryRun the plan is only shown, otherwise its DELETEs are made up to concurrency at a time,
+    and no more than rate a second, oldest first, with progress printed to stderr.
+
+    Pruning can be stopped (with Ctrl-C) and run again at any point: the objects not yet
+    deleted are reported as notStarted, and as the plan is made from the objects that are
+    left, the next run picks up where this one stopped.  An object which turns out to have
+    been deleted already (as when planning from a database that's behind) counts as gone
+    rather than failed.
+
+    Given an astraJournal.journal, each DELETE is recorded in it as it's made and finished, and
+    a journal which is being resumed has the objects it had already deleted reported as such
+    rather than deleted again, even when the inventory they're planned from is behind.
+
+    prune = astraBulk.pruner(quiet=False, output="table")
+    prune.main(["snapshots"], keepLast=7, cluster="prod-east", dryRun=True)
+    """
+
+    columns = (
+        ("kind", "kind"),
+        ("appName", "appName"),
+        ("name", "name"),
+        ("id", "id"),
+        ("created", "created"),
+        ("ageDays", "ageDays"),
+        ("state", "state"),
+    )
+    # kind: (collection, the type of its objects)
+    collections = {
+        "snapshots": ("appSnaps", "application/astra-appSnap"),
+        "backups": ("appBackups", "application/astra-appBackup"),
+    }
+
+    def __init__(
+        self,
+        inventory=None,
+        database=None,
+        quiet=True,
+        verbose=False,
+        output="json",
+        concurrency=8,
+        rate=None,
+        journal=None,
+    ):
+        """inventory: the astraInventory.inventory to plan from (default: the shared one)
+        database: plan from this astraStore SQLite file (see toolkit.py sync) instead
+        quiet: Will there be CLI output or just return (datastructure)
+        verbose: Print all of the ReST call info: URL, Method, Headers, Request Body
+        output: table: pretty print the data
+                json: (default) output in JSON
+                yaml: output in yaml
+                ndjson: one line of JSON per row
+                csv: comma separated values
+        concurrency: the most DELETEs in flight at once
+        rate: the most DELETEs to start a second (None for no limit)
+        journal: an astraJournal.journal to record (and resume) the DELETEs in"""
+        self.inventory = inventory
+        self.database = database
+        self.quiet = quiet
+        self.verbose = verbose
+        self.output = output
+        self.concurrency = concurrency
+        self.limiter = rateLimiter(rate)
+        self.journal = journal
+        self.stopping = threading.Event()
+        super().__init__()
+
+    def loadInventory(self, kinds):
+        """The inventory holding the apps and kinds, or False on failure"""
+        if self.database is not None:
+            inv = astraInventory.inventory()
+            astraStore.inventoryStore(self.database).loadInventory(inv, ("apps",) + tuple(kinds))
+            return inv
+        inv = self.inventory or astraInventory.getInventory()
+        for kind in ("apps",) + tuple(kinds):
+            if not inv.ensure(kind):
+                return False
+        return inv
+
+    def delete(self, kind, obj):
+        """DELETE a single snapshot or backup, returning its row's new state"""
+        if self.stopping.is_set():
+            return "notStarted"
+        self.limiter.wait()
+        if self.journal is not None:
+            self.journal.record(f"{kind}/{obj.id}", "submitted", obj.id)
+        collection, objType = self.collections[kind]
+        endpoint = f"k8s/v1/apps/{obj.appID}/{collection}/{obj.id}"
+        url = self.base + endpoint
+        headers = dict(self.headers, accept=objType + "+json")
+        headers["Content-Type"] = objType + "+json"
+        data = {"type": objType, "version": "1.1"}
+
+        if self.verbose:
+            print(colored(f"API URL: {url}", "green"))
+            print(colored("API Method: DELETE", "green"))
+
+        ret = super().apicall("delete", url, data, headers, {}, self.verifySSL, quiet=True)
+        if ret.ok:
+            return "deleted"
+        if ret.status_code == 404:
+            return "gone"
+        if not self.quiet:
+            astraOutput.progress(
+                f"{obj.name} ({obj.id}): API HTTP Status Code: {ret.status_code} - {ret.reason}"
+            )
+        return "failed"
+
+    def main(self, kinds, keepLast=None, keepDays=None, cluster=None, app=None, dryRun=False):
+        """kinds: which of snapshots and backups to prune
+        keepLast: keep the youngest keepLast completed ones of each app
+        keepDays: keep every one created within this many days
+        cluster: only prune the apps of this cluster (name or ID)
+        app: only prune this app (name or ID)
+        dryRun: only work out (and show) what would be deleted"""
+        inv = self.loadInventory(kinds)
+        if inv is False:
+            if not self.quiet:
+                print("Failed to load the apps, snapshots and backups")
+            return False
+        apps = [
+            a
+            for a in inv.find("apps")
+            if (cluster is None or cluster in (a.clusterID, a.clusterName))
+            and (app is None or app in (a.id, a.name))
+        ]
+        appNames = {a.id: a.name for a in apps}
+        now = astraTime.currentEpoch()
+        plan = []
+        for kind in kinds:
+            plan.extend(
+                (kind, obj) for obj in retentionPlan(inv, kind, keepLast, keepDays, apps, now)
+            )
+        plan.sort(key=lambda entry: entry[1].createdEpoch or 0)
+        rows = [
+            {
+                "kind": kind[:-1],
+                "appName": appNames[obj.appID],
+                "appID": obj.appID,
+                "name": obj.name,
+                "id": obj.id,
+                "created": obj.creationTimestamp,
+                "ageDays": (
+                    None if obj.createdEpoch is None else round((now - obj.createdEpoch) / 86400, 1)
+                ),
+                "state": "planned",
+            }
+            for kind, obj in plan
+        ]
+        if not dryRun and self.journal is not None:
+            for (kind, obj), row in zip(plan, rows):
+                entry = self.journal.entry(f"{kind}/{obj.id}")
+                if entry is None:
+                    self.journal.record(f"{kind}/{obj.id}", "planned", obj.id)
+                elif entry["event"] == "completed":
+                    row["state"] = entry["state"]
+                    inv.remove(kind, obj.id)
+        if not dryRun and plan:
+            self.run(inv, plan, rows)
+        results = {"items": rows}
+        if not self.quiet:
+            self.show(results)
+        return results
+
+    def run(self, inv, plan, rows):
+        """Make the DELETEs of plan (those of its rows still planned), setting the state of
+        each of its rows"""
+        self.stopping.clear()
+        counts = collections.Counter()
+        lastReport = 0
+        todo = [i for i, row in enumerate(rows) if row["state"] == "planned"]
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = [pool.submit(self.delete, *plan[i]) for i in todo]
+            for n, (i, future) in enumerate(zip(todo, futures)):
+                try:
+                    state = future.result()
+                except KeyboardInterrupt:
+                    # Let the DELETEs in flight finish, but start no more
+                    self.stopping.set()
+                    state = future.result()
+                rows[i]["state"] = state
+                counts[state] += 1
+                kind, obj = plan[i]
+                if state in ("deleted", "gone"):
+                    inv.remove(kind, obj.id)
+                if self.journal is not None and state != "notStarted":
+                    event = "failed" if state == "failed" else "completed"
+                    self.journal.record(f"{kind}/{obj.id}", event, obj.id, state=state)
+                now = time.monotonic()
+                if not self.quiet and (now - lastReport >= 1 or n == len(todo) - 1):
+                    lastReport = now
+                    astraOutput.progress(
+                        f"pruned {counts['deleted'] + counts['gone']} of {len(todo)}"
+                        + (f", {counts['failed']} failed" if counts["failed"] else "")
+                    )
+
+    def show(self, results):
+        astraOutput.showResults(self.output, results, self.columns, self.summary)
+
+    @staticmethod
+    def summary(items):
+        """The state counts and the number of apps pruned, below the table"""
+        if not items:
+            return "Nothing to prune"
+        apps = len({row["appID"] for row in items})
+        return f"{astraOutput.stateCounts(items)} ({apps} apps)"
+
+
+class bulkManage:
+    """Manages many of a cluster's discovered namespaces as apps, such as when onboarding a
+    new cluster, from a single listing of its namespaces, rather than one listing (and
+    manage app) per namespace.  Each namespace whose name matches any of the patterns (shell
+    style, such as "team-*") and which isn't part of an app already becomes an app of the same
+    name, with up to concurrency requests in flight at a time.
+
+    With protect, each app is also given defaultSchedules (the protection policy toolkit.py
+    deploy gives the apps it deploys) as soon as it's been managed, by the same worker, moved
+    to minutes of the app's own by a schedulePlanner.
+
+    manage = astraBulk.bulkManage(quiet=False, output="table")
+    manage.main("prod-east", ["team-*", "shop"], protect=True)
+    """
+
+    columns = (
+        ("namespace", "namespace"),
+        ("appID", "appID"),
+        ("state", "state"),
+        ("schedules", "schedules"),
+    )
+
+    def __init__(self, quiet=True, verbose=False, output="json", concurrency=8):
+        """quiet: Will there be CLI output or just return (datastructure)
+        verbose: Print all of the ReST call info: URL, Method, Headers, Request Body
+        output: table: pretty print the data
+                json: (default) output in JSON
+                yaml: output in yaml
+                ndjson: one line of JSON per row
+                csv: comma separated values
+        concurrency: the most apps to manage (and protect) at once"""
+        self.quiet = quiet
+        self.verbose = verbose
+        self.output = output
+        self.concurrency = concurrency
+
+    def main(self, cluster, matches=None, protect=False, dryRun=False):
+        """cluster: the managed cluster (name or ID) whose namespaces to manage
+        matches: shell style patterns of the namespaces to manage (default: every one)
+        protect: give each new app defaultSchedules
+        dryRun: only work out (and show) which namespaces would be managed"""
+        namespaces = astraSDK.getNamespaces(verbose=self.verbose)
+        clusterID = next(
+            (
+                c["id"]
+                for c in namespaces.clusters["items"]
+                if cluster in (c["id"], c["name"]) and c["managedState"] == "managed"
+            ),
+            None,
+        )
+        if clusterID is None:
+            if not self.quiet:
+                print(f"{cluster} is not a managed cluster")
+            return False
+        listing = namespaces.main(clusterID=clusterID)
+        if listing is False:
+            if not self.quiet:
+                print("astraSDK.getNamespaces().main() failed")
+            return False
+        selected = [
+            ns["name"]
+            for ns in listing["items"]
+            if ns["namespaceState"] == "discovered"
+            and not ns["associatedApps"]
+            and any(fnmatch.fnmatchcase(ns["name"], pattern) for pattern in matches or ["*"])
+        ]
+        rows = [
+            {"namespace": name, "appID": None, "state": "planned", "schedules": 0}
+            for name in selected
+        ]
+        if not dryRun:
+            manager = astraSDK.manageApp(verbose=self.verbose)
+            creator = astraSDK.createProtectionpolicy(verbose=self.verbose) if protect else None
+
+            def manage(row):
+                app = manager.main(row["namespace"], row["namespace"], clusterID)
+                if app is False:
+                    row["state"] = "failed"
+                else:
+                    row["appID"] = app["id"]
+                    row["state"] = "managed"
+                    if protect:
+                        schedules = schedulePlanner().plan(app["id"], defaultSchedules)
+                        row["schedules"] = createSchedules(app["id"], schedules, creator)
+                        if row["schedules"] < len(schedules):
+                            row["state"] = "protectFailed"
+                if not self.quiet:
+                    astraOutput.progress(f"{row['namespace']}: {row['state']}")
+
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                list(pool.map(manage, rows))
+        results = {"items": rows}
+        if not self.quiet:
+            self.show(results)
+        return results
+
+    def show(self, results):
+        astraOutput.showResults(
+            self.output,
+            results,
+            self.columns,
+            lambda items: astraOutput.stateCounts(items) or "No namespaces to manage",
+        )
+
+
+class scheduleLister(astraSDK.SDKCommon):
+    """Lists the schedules (protection policies) of many apps, up to concurrency at a time.
+
+    schedules = astraBulk.scheduleLister().many(apps)  # {appID: [schedule, ...]}
+    """
+
+    def __init__(self, verbose=False):
+        """verbose: Print all of the ReST call info: URL, Method, Headers, Request Body"""
+        self.verbose = verbose
+        super().__init__()
+        self.headers["accept"] = "application/astra-schedule+json"
+
+    def main(self, appID):
+        """appID's schedules, or None if they couldn't be listed"""
+        endpoint = f"k8s/v1/apps/{appID}/schedules"
+        url = self.base + endpoint
+
+        if self.verbose:
+            print(colored(f"API URL: {url}", "green"))
+            print(colored("API Method: GET", "green"))
+
+        ret = super().apicall("get", url, {}, self.headers, {}, self.verifySSL, quiet=True)
+        if not ret.ok:
+            return None
+        results = super().jsonifyResults(ret)
+        return None if results is None else results.get("items", [])
+
+    def many(self, apps, concurrency=8):
+        """{appID: its schedules, or None if they couldn't be listed} of each of apps"""
+        appIDs = list(dict.fromkeys(app["id"] for app in apps))
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            return dict(zip(appIDs, pool.map(self.main, appIDs)))
+
+
+class policyApplier(astraSDK.SDKCommon):
+    """Applies a protection policy (a list of schedules, as loadPolicy() returns them) to many
+    apps, with at most concurrency apps in progress at once.
+
+    Each app's existing schedules are listed and compared against the policy, one schedule of
+    each granularity, and only what's missing is created (with a POST) and what's changed
+    updated (with a PUT), so applying the same policy again makes no changes at all.  An
+    app's schedules of granularities the policy doesn't have are left as they are.
+
+    applier = astraBulk.policyApplier(quiet=False, output="table")
+    applier.main(apps, astraBulk.loadPolicy("policy.yaml"))
+    """
+
+    columns = (
+        ("appName", "appName"),
+        ("appID", "appID"),
+        ("granularity", "granularity"),
+        ("hour", "hour"),
+        ("minute", "minute"),
+        ("action", "action"),
+        ("state", "state"),
+    )
+
+    def __init__(self, quiet=True, verbose=False, output="json", concurrency=8):
+        """quiet: Will there be CLI output or just return (datastructure)
+        verbose: Print all of the ReST call info: URL, Method, Headers, Request Body
+        output: table: pretty print the data
+                json: (default) output in JSON
+                yaml: output in yaml
+                ndjson: one line of JSON per row
+                csv: comma separated values
+        concurrency: the most apps to list (and update) the schedules of at once"""
+        self.quiet = quiet
+        self.verbose = verbose
+        self.output = output
+        self.concurrency = concurrency
+        super().__init__()
+        self.headers["accept"] = "application/astra-schedule+json"
+        self.headers["Content-Type"] = "application/astra-schedule+json"
+
+    def updateSchedule(self, appID, scheduleID, schedule):
+        """Replace appID's schedule scheduleID with schedule, returning whether it worked"""
+        endpoint = f"k8s/v1/apps/{appID}/schedules/{scheduleID}"
+        url = self.base + endpoint
+        data = dict(
+            schedule,
+            type="application/astra-schedule",
+            version="1.2",
+            enabled="true",
+            name=f"{schedule['granularity']} schedule",
+        )
+
+        if self.verbose:
+            print(colored(f"API URL: {url}", "green"))
+            print(colored("API Method: PUT", "green"))
+            print(colored(f"API data: {data}", "green"))
+
+        ret = super().apicall("put", url, data, self.headers, {}, self.verifySSL, quiet=True)
+        return ret.ok
+
+    @staticmethod
+    def diff(existing, schedules):
+        """[(schedule, action, the ID of the existing schedule to update)] of each of
+        schedules, against an app's existing schedules: "create" if it has none of that
+        granularity, "update" if it has one that's different, else "none"."""
+        byGranularity = {}
+        for current in existing:
+            byGranularity.setdefault(current.get("granularity"), []).append(current)
+        ret = []
+        for schedule in schedules:
+            currents = byGranularity.get(schedule["granularity"])
+            if not currents:
+                ret.append((schedule, "create", None))
+                continue
+            same = any(
+                all(str(current.get(field)) == schedule[field] for field in scheduleFields)
+                and str(current.get("enabled")).lower() == "true"
+                for current in currents
+            )
+            ret.append((schedule, "none" if same else "update", currents[0].get("id")))
+        return ret
+
+    def main(self, apps, schedules, dryRun=False, planner=None, loadApps=()):
+        """apps: the apps (dicts, as astraSDK.getApps() returns them) to apply the policy to
+        schedules: the policy's schedules, as loadPolicy() returns them
+        dryRun: only work out (and show) what would be created and updated
+        planner: a schedulePlanner to move each app's schedules to their own minutes (and
+                 hours) with, rather than give every app the policy's as they are
+        loadApps: other apps whose schedules the planner should balance against too"""
+        creator = astraSDK.createProtectionpolicy(verbose=self.verbose)
+        # Every app's schedules are listed before any are planned, so that the planner can
+        # balance against all of them
+        existing = scheduleLister(self.verbose).many(list(apps) + list(loadApps), self.concurrency)
+        if planner is not None:
+            for current in existing.values():
+                planner.addLoad(current or ())
+        plans = []
+        for app in apps:
+            current = existing[app["id"]]
+            if current is None:
+                plans.append((app, None))
+                continue
+            appSchedules = schedules
+            if planner is not None:
+                appSchedules = planner.plan(app["id"], schedules, current)
+            plans.append((app, self.diff(current, appSchedules)))
+
+        def apply(plan):
+            app, changes = plan
+            if changes is None:
+                return [
+                    self.row(app, schedule["granularity"], None, "listFailed")
+                    for schedule in schedules
+                ]
+            rows = []
+            for schedule, action, scheduleID in changes:
+                if action == "none":
+                    state = "unchanged"
+                elif dryRun:
+                    state = "planned"
+                elif action == "create":
+                    ok = createSchedules(app["id"], [schedule], creator)
+                    state = "created" if ok else "failed"
+                else:
+                    ok = self.updateSchedule(app["id"], scheduleID, schedule)
+                    state = "updated" if ok else "failed"
+                row = self.row(app, schedule["granularity"], action, state)
+                row["hour"], row["minute"] = schedule["hour"], schedule["minute"]
+                rows.append(row)
+            return rows
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            results = {"items": [row for rows in pool.map(apply, plans) for row in rows]}
+        if not self.quiet:
+            self.show(results)
+        return results
+
+    @staticmethod
+    def row(app, granularity, action, state):
+        return {
+            "appName": app["name"],
+            "appID": app["id"],
+            "granularity": granularity,
+            "hour": None,
+            "minute": None,
+            "action": action,
+            "state": state,
+        }
+
+    def show(self, results):
+        astraOutput.showResults(self.output, results, self.columns)
@@ -0,0 +1,410 @@
+#!/usr/bin/env python
+"""
+   Copyright 2021 NetApp, Inc
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import argparse
+import fnmatch
+import heapq
+import operator
+import re
+
+try:
+    from . import astraTime
+except ImportError:
+    import astraTime
+
+
+class filterExpression:
+    """A filter over the objects returned by the SDK's list classes, compiled once from a small
+    expression language into a single predicate function.
+
+    An expression is one or more terms, combined with "and", "or", "not" and parentheses:
+        state=ready and clusterName~prod* and age<2h
+    Each term is a field, an operator, and a value (which may be quoted):
+        =, !=          equal, not equal
+        ~, !~          matches, doesn't match a glob pattern (*, ? and [...])
+        <, <=, >, >=   ordering, numeric if the field's value is a number
+    A field is a top level key of the object, or a dotted path such as
+    metadata.creationTimestamp.  If the field's value is a list (such as an app's namespaces),
+    the term is true if any element matches.  age is the time since the object's
+    creationTimestamp, compared against a duration like 90s, 30m, 2h, 7d or 2w.
+
+    The top level "and" terms which compare a field the server can filter on are also
+    available as a filter param for the API (see serverFilter()), so fewer objects are sent
+    in the first place.  The predicate still checks every term, so that's only ever an
+    optimization.
+    """
+
+    tokenPattern = re.compile(
+        r"""\s*(?:(?P<paren>[()])
+                 |(?P<field>[A-Za-z_][\w.]*)\s*(?P<op>==|!=|!~|<=|>=|=|~|<|>)\s*
+                  (?:'(?P<squoted>[^']*)'|"(?P<dquoted>[^"]*)"|(?P<bare>[^\s()'"=<>!~][^\s()'"]*))
+                 |(?P<word>[A-Za-z]+))""",
+        re.VERBOSE,
+    )
+    durationPattern = re.compile(r"^(\d+(?:\.\d+)?)([smhdw])$")
+    durationUnits = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+    comparisons = {
+        "=": operator.eq,
+        "==": operator.eq,
+        "<": operator.lt,
+        "<=": operator.le,
+        ">": operator.gt,
+        ">=": operator.ge,
+    }
+    # Not "!=", as objects without the field at all would likely be filtered out by the server
+    serverOps = {"=": "eq", "==": "eq", "<": "lt", "<=": "le", ">": "gt", ">=": "ge"}
+    # The age term is a comparison of creationTimestamp, with the operator flipped
+    ageOps = {"<": ">", "<=": ">=", ">": "<", ">=": "<="}
+
+    def __init__(self, text, now=None):
+        """text: the expression
+        now: the epoch time ages are relative to (default: the time of compiling)"""
+        self.text = text
+        self.now = astraTime.currentEpoch() if now is None else now
+        self.tokens = self.tokenize(text)
+        self.position = 0
+        # The top level "and" terms as (field, op, value), for serverFilter()
+        self.conjuncts = []
+        # The constants and helper functions the generated source refers to
+        self.namespace = {}
+        if self.tokens:
+            self.source = self.parseOr(topLevel=True)
+            if self.position != len(self.tokens):
+                raise ValueError(
+                    f"unexpected {self.describe(self.tokens[self.position])} in filter '{text}'"
+                )
+        else:
+            self.source = "True"
+        del self.tokens
+        self.predicate = eval(f"lambda obj: {self.source}", self.namespace)
+
+    def __call__(self, obj):
+        return self.predicate(obj)
+
+    def __repr__(self):
+        return f"filterExpression({self.text!r})"
+
+    def tokenize(self, text):
+        tokens = []
+        position = 0
+        text = text.rstrip()
+        while position < len(text):
+            match = self.tokenPattern.match(text, position)
+            if not match:
+                raise ValueError(f"can't parse '{text[position:].strip()}' in filter '{text}'")
+            position = match.end()
+            if match.group("paren"):
+                tokens.append(("paren", match.group("paren")))
+            elif match.group("field"):
+                for group in ("squoted", "dquoted", "bare"):
+                    if match.group(group) is not None:
+                        value = match.group(group)
+                        break
+                tokens.append(("term", (match.group("field"), match.group("op"), value)))
+            elif match.group("word").lower() in ("and", "or", "not"):
+                tokens.append(("word", match.group("word").lower()))
+            else:
+                raise ValueError(f"expected a term like field=value, not '{match.group('word')}'")
+        return tokens
+
+    @staticmethod
+    def describe(token):
+        return f"'{token[1]}'" if token[0] != "term" else f"term '{''.join(token[1])}'"
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def parseOr(self, topLevel=False):
+        sources = [self.parseAnd(topLevel)]
+        while self.peek() == ("word", "or"):
+            self.position += 1
+            sources.append(self.parseAnd())
+        if len(sources) > 1 and topLevel:
+            # Only terms that every match must satisfy can be pushed down
+            self.conjuncts = []
+        return sources[0] if len(sources) == 1 else f"({' or '.join(sources)})"
+
+    def parseAnd(self, topLevel=False):
+        sources = [self.parseNot(topLevel)]
+        while self.peek() == ("word", "and"):
+            self.position += 1
+            sources.append(self.parseNot(topLevel))
+        return sources[0] if len(sources) == 1 else f"({' and '.join(sources)})"
+
+    def parseNot(self, topLevel=False):
+        kind, value = self.peek()
+        if (kind, value) == ("word", "not"):
+            self.position += 1
+            return f"(not {self.parseNot()})"
+        if (kind, value) == ("paren", "("):
+            self.position += 1
+            source = self.parseOr()
+            if self.peek() != ("paren", ")"):
+                raise ValueError(f"missing ')' in filter '{self.text}'")
+            self.position += 1
+            return source
+        if kind == "term":
+            self.position += 1
+            return self.compileTerm(*value, topLevel=topLevel)
+        if kind is None:
+            raise ValueError(f"filter '{self.text}' ends too soon")
+        raise ValueError(f"unexpected {self.describe((kind, value))} in filter '{self.text}'")
+
+    def constant(self, value):
+        """The name the generated source refers to value by"""
+        name = f"_{len(self.namespace)}"
+        self.namespace[name] = value
+        return name
+
+    @staticmethod
+    def getter(field):
+        """A function returning the value of field (possibly a dotted path) of an object"""
+        path = field.split(".")
+
+        def get(obj):
+            for key in path:
+                if not isinstance(obj, dict):
+                    return None
+                obj = obj.get(key)
+            return obj
+
+        return get
+
+    def getterSource(self, field):
+        """Source for the value of field (possibly a dotted path) of obj"""
+        path = field.split(".")
+        if len(path) == 1:
+            return f"obj.get({self.constant(field)})"
+        if len(path) == 2:
+            outer, inner = (self.constant(key) for key in path)
+            return f"(m.get({inner}) if type(m := obj.get({outer})) is dict else None)"
+        return f"{self.constant(self.getter(field))}(obj)"
+
+    def compileTerm(self, field, op, value, topLevel=False):
+        """Source testing a single term.  Strings are compared inline, anything else (lists,
+        numbers, booleans and missing fields) by a function built here."""
+        if field == "age":
+            match = self.durationPattern.match(value)
+            if op not in self.ageOps or not match:
+                raise ValueError(
+                    f"age must be compared with <, <=, > or >= to a duration like 2h, not "
+                    f"'{op}{value}'"
+                )
+            seconds = float(match.group(1)) * self.durationUnits[match.group(2)]
+            field = "metadata.creationTimestamp"
+            op = self.ageOps[op]
+            value = timestamp(self.now - seconds)
+
+        if topLevel and op in self.serverOps:
+            self.conjuncts.append((field, op, value))
+
+        negate = op in ("!=", "!~")
+        if op in ("~", "!~"):
+            # fnmatch.translate() is anchored at the end, match() anchors the start
+            match = re.compile(fnmatch.translate(value)).match
+            literal = value.rstrip("*")
+            if not any(c in literal for c in "*?["):
+                # A plain prefix (or the whole string) needs no regular expression
+                if literal == value:
+                    strSource = f"v == {self.constant(value)}"
+                else:
+                    strSource = f"v.startswith({self.constant(literal)})"
+            else:
+                strSource = f"{self.constant(match)}(v) is not None"
+
+            def test(v):
+                return v is not None and match(v if type(v) is str else str(v)) is not None
+
+        else:
+            compare = self.comparisons["=" if negate else op]
+            pyOp = {"!=": "==", "=": "=="}.get(op, op)
+            strSource = f"v {pyOp} {self.constant(value)}"
+            try:
+                number = float(value)
+            except ValueError:
+                number = None
+            boolean = {"true": True, "false": False}.get(value.lower())
+
+            def test(v):
+                if type(v) is str:
+                    return compare(v, value)
+                if v is None:
+                    return False
+                if type(v) is bool:
+                    return boolean is not None and compare(v, boolean)
+                if isinstance(v, (int, float)):
+                    return number is not None and compare(v, number)
+                return compare(str(v), value)
+
+        def otherTest(v):
+            if type(v) is list:
+                return any(test(element) for element in v)
+            return test(v)
+
+        source = (
+            f"({strSource} if type(v := {self.getterSource(field)}) is str "
+            f"else {self.constant(otherTest)}(v))"
+        )
+        return f"(not {source})" if negate else source
+
+    def serverFilter(self, fields):
+        """The API filter param for the top level "and" terms on any of fields (or on
+        metadata timestamps, which every object has), or None if there aren't any"""
+        terms = []
+        for field, op, value in self.conjuncts:
+            if field in fields or field in (
+                "metadata.creationTimestamp",
+                "metadata.modificationTimestamp",
+            ):
+                if op in ("<", "<=", ">", ">=") and not field.startswith("metadata."):
+                    # The API compares strings, which only orders timestamps correctly
+                    continue
+                terms.append(f"{field} {self.serverOps[op]} '{value}'")
+        return " and ".join(terms) or None
+
+
+def timestamp(epoch):
+    """An epoch time in the format of the API's timestamps"""
+    return astraTime.formatTimestamp(epoch)
+
+
+def compileFilter(where, now=None):
+    """A filterExpression for where, which may be the expression text or already compiled"""
+    if where is None or isinstance(where, filterExpression):
+        return where
+    return filterExpression(where, now=now)
+
+
+def argType(text):
+    """argparse type for a filter expression argument, so it's compiled (and any error in it
+    reported) as the arguments are parsed"""
+    try:
+        return filterExpression(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+class descending:
+    """Wraps a sort key so that it sorts in reverse, within a tuple of keys"""
+
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+
+def sortFields(sortBy):
+    """(getter, reverse) for each of a comma separated list of fields to sort by, each of
+    which is in ascending order unless suffixed with ":desc" (or prefixed with "-", which
+    argparse would take for an option on the command line).  age sorts by creationTimestamp,
+    youngest first."""
+    keys = []
+    for field in sortBy.split(","):
+        field = field.strip()
+        reverse = field.startswith("-")
+        field = field.lstrip("-+")
+        field, _, order = field.partition(":")
+        if order not in ("", "asc", "desc"):
+            raise ValueError(f"sort order of {field} must be asc or desc, not '{order}'")
+        reverse = reverse != (order == "desc")
+        if field == "age":
+            field = "metadata.creationTimestamp"
+            reverse = not reverse
+        if not field:
+            raise ValueError(f"empty field in sort '{sortBy}'")
+        keys.append((filterExpression.getter(field), reverse))
+    return keys
+
+
+def sortArgType(text):
+    """argparse type for a sort argument, so any error in it is reported as the arguments are
+    parsed"""
+    try:
+        sortFields(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return text
+
+
+def typeName(v):
+    """The name a value's type sorts by, so that values of different types (such as a field
+    which is a number on some objects and a string on others) sort by type rather than raising
+    TypeError.  Numbers of either type sort together."""
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return "number"
+    return type(v).__name__
+
+
+def sortKey(sortBy):
+    """A key function for sortBy (see sortFields()), for sorting in ascending order.  Objects
+    without a field sort after those with it."""
+    keys = sortFields(sortBy)
+
+    def key(obj):
+        ret = []
+        for get, reverse in keys:
+            v = get(obj)
+            if v is None:
+                ret.append((True, None))
+            elif reverse:
+                ret.append((False, descending((typeName(v), v))))
+            else:
+                ret.append((False, (typeName(v), v)))
+        return tuple(ret)
+
+    return key
+
+
+def select(items, where=None, sortBy=None, limit=None):
+    """The items (a list of objects) matching where, ordered by sortBy, and at most limit of
+    them.  With both sortBy and limit, a heap picks out the top limit items rather than sorting
+    them all."""
+    where = compileFilter(where)
+    if where is not None:
+        items = [obj for obj in items if where.predicate(obj)]
+    if sortBy:
+        keys = sortFields(sortBy)
+        reverse = False
+        if len(keys) == 1:
+            # A single field can be compared directly, with no per object wrapper for reversing
+            get, reverse = keys[0]
+            if reverse:
+
+                def key(obj):
+                    v = get(obj)
+                    return (v is not None, typeName(v), v)
+
+            else:
+
+                def key(obj):
+                    v = get(obj)
+                    return (v is None, typeName(v), v)
+
+        else:
+            key = sortKey(sortBy)
+        if limit is not None and limit < len(items):
+            return (heapq.nlargest if reverse else heapq.nsmallest)(limit, items, key=key)
+        return sorted(items, key=key, reverse=reverse)
+    if limit is not None:
+        return list(items[:limit])
+    return items
@@ -0,0 +1,507 @@
+#!/usr/bin/env python
+"""
+   Copyright 2021 NetApp, Inc
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+
+def timestamp(epoch):
+    """Return an Astra formatted timestamp for a unix epoch"""
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class astraFleet:
+    """Generates a synthetic but realistic Astra Control account: clouds, clusters, storage
+    classes, namespaces, managed apps, and each app's snapshots, backups, execution hooks and
+    assets, all in the same JSON shape the API returns.  The output is deterministic for a
+    given seed, and is consumed by astraMock.py as well as directly by benchmarks.
+
+    apps / clusters / clouds / scripts: number of each object to generate
+    namespacesPerCluster: unmanaged namespaces per cluster (each app also gets a namespace)
+    snapshotsPerApp / backupsPerApp / hooksPerApp / assetsPerApp: the mean number of each
+        child object per app, with the per-app count drawn from distribution
+    distribution: fixed: every app gets exactly the mean
+                  uniform: between 0 and twice the mean
+                  poisson: poisson distributed around the mean
+                  zipf: a long tail, where a few apps own most of the objects
+    failedRate / pendingRate: fraction of snapshots and backups in the failed / pending state
+    ageDays: snapshots, backups and namespaces are spread out over this many days
+    payloadSize: bytes of filler added to every object's metadata
+    """
+
+    cloudTypes = ["GCP", "Azure", "AWS", "private"]
+    clusterTypes = {
+        "GCP": "gke",
+        "Azure": "aks",
+        "AWS": "eks",
+        "private": "openshift",
+    }
+    storageClassNames = {
+        "GCP": ["netapp-cvs-perf-premium", "netapp-cvs-perf-standard", "standard-rwo"],
+        "Azure": ["netapp-anf-perf-premium", "netapp-anf-perf-standard", "managed-csi"],
+        "AWS": ["netapp-fsxn-nas", "netapp-fsxn-san", "gp2"],
+        "private": ["ontap-gold", "ontap-silver", "ontap-bronze"],
+    }
+    appWords = [
+        "wordpress",
+        "mysql",
+        "postgres",
+        "mongodb",
+        "jenkins",
+        "gitlab",
+        "redis",
+        "elasticsearch",
+        "kafka",
+        "cassandra",
+        "nginx",
+        "pytorch",
+    ]
+    assetTypes = [
+        "Pod",
+        "Service",
+        "PersistentVolumeClaim",
+        "Deployment",
+        "StatefulSet",
+        "ConfigMap",
+        "Secret",
+        "ReplicaSet",
+    ]
+    appStateTransitions = [
+        {"to": ["pending"]},
+        {"to": ["provisioning"]},
+        {"from": "pending", "to": ["discovering", "failed"]},
+        {"from": "discovering", "to": ["ready", "failed"]},
+        {"from": "ready", "to": ["discovering", "restoring", "unavailable", "failed"]},
+        {"from": "unavailable", "to": ["ready", "restoring"]},
+        {"from": "provisioning", "to": ["discovering", "failed"]},
+        {"from": "restoring", "to": ["discovering", "failed"]},
+    ]
+
+    def __init__(
+        self,
+        apps=10,
+        clusters=2,
+        clouds=2,
+        namespacesPerCluster=5,
+        snapshotsPerApp=2,
+        backupsPerApp=2,
+        hooksPerApp=1,
+        assetsPerApp=5,
+        scripts=1,
+        distribution="fixed",
+        failedRate=0.0,
+        pendingRate=0.0,
+        ageDays=7,
+        payloadSize=0,
+        seed=0,
+    ):
+        self.distribution = distribution
+        self.failedRate = failedRate
+        self.pendingRate = pendingRate
+        self.ageSeconds = int(ageDays * 86400)
+        self.payloadSize = payloadSize
+        self.random = random.Random(seed)
+
+        self.clouds = {}
+        self.clusters = {}
+        self.storageClasses = {}
+        self.namespaces = {}
+        self.apps = {}
+        self.snaps = {}
+        self.backups = {}
+        self.hooks = {}
+        self.assets = {}
+        self.schedules = {}
+        self.scripts = {}
+
+        for counter in range(clouds):
+            cloudType = self.cloudTypes[counter % len(self.cloudTypes)]
+            self.addCloud(cloudType if counter < len(self.cloudTypes) else f"{cloudType}-{counter}")
+        cloudIDs = list(self.clouds)
+        for counter in range(clusters):
+            self.addCluster(f"cluster-{counter}", cloudIDs[counter % len(cloudIDs)])
+        clusterIDs = list(self.clusters)
+        for clusterID in clusterIDs:
+            for nsName in ["kube-system", "kube-public", "kube-node-lease", "trident"]:
+                self.addNamespace(nsName, clusterID, systemType="kubernetes", age=self.ageSeconds)
+            for counter in range(namespacesPerCluster):
+                self.addNamespace(f"unmanaged-{counter}", clusterID, age=self.randomAge())
+        scriptIDs = [
+            self.addScript(f"script-{counter}", "ZWNobyBoZWxsbw==")["id"]
+            for counter in range(scripts)
+        ]
+
+        for counter in range(apps):
+            clusterID = clusterIDs[counter % len(clusterIDs)] if clusterIDs else self.newID()
+            name = f"{self.appWords[counter % len(self.appWords)]}-{counter}"
+            self.addNamespace(name, clusterID, state="managed", age=self.ageSeconds)
+            app = self.addApp(name, name, clusterID, age=self.ageSeconds)
+            appID = app["id"]
+            for kind, mean, add in [
+                ("hourly", snapshotsPerApp, self.addSnap),
+                ("daily", backupsPerApp, self.addBackup),
+            ]:
+                count = self.childCount(mean)
+                # Spread the protection objects out evenly (oldest first) over ageDays
+                for childCounter in range(count):
+                    age = int(self.ageSeconds * (count - childCounter) / (count + 1))
+                    add(appID, f"{kind}-{self.suffix()}", self.randomState(), age)
+            if self.backups[appID]:
+                app["protectionState"] = "protected"
+            for hookCounter in range(self.childCount(hooksPerApp)):
+                self.addHook(
+                    appID,
+                    f"{name}-hook-{hookCounter}",
+                    self.random.choice(scriptIDs) if scriptIDs else self.newID(),
+                    stage=self.random.choice(["pre", "post"]),
+                    action=self.random.choice(["snapshot", "backup"]),
+                )
+            for assetCounter in range(self.childCount(assetsPerApp)):
+                self.addAsset(appID, name, assetCounter)
+
+    ######
+    # Random helpers
+    ######
+    def newID(self):
+        return str(uuid.UUID(int=self.random.getrandbits(128), version=4))
+
+    def suffix(self):
+        """Random suffix in the style of scheduled protection names, like "hourly-a1b2c-d3e4f" """
+        bits = self.random.getrandbits(40)
+        return f"{bits >> 20:05x}-{bits & 0xFFFFF:05x}"
+
+    def randomAge(self):
+        return self.random.randint(0, self.ageSeconds)
+
+    def randomState(self):
+        roll = self.random.random()
+        if roll < self.failedRate:
+            return "failed"
+        elif roll < self.failedRate + self.pendingRate:
+            return "pending"
+        return "completed"
+
+    def childCount(self, mean):
+        """Number of children for one app, drawn from self.distribution"""
+        if not mean:
+            return 0
+        if self.distribution == "uniform":
+            return self.random.randint(0, 2 * mean)
+        elif self.distribution == "poisson":
+            # Knuth's algorithm is fine for small means, fall back to a normal approximation
+            if mean > 30:
+                return max(0, int(round(self.random.gauss(mean, math.sqrt(mean)))))
+            limit, count, product = math.exp(-mean), 0, self.random.random()
+            while product > limit:
+                count += 1
+                product *= self.random.random()
+            return count
+        elif self.distribution == "zipf":
+            # Pareto with alpha=1.5 has a mean of 3 * xm
+            return int(self.random.paretovariate(1.5) * mean / 3)
+        return mean
+
+    def metadata(self, age=0):
+        created = timestamp(int(time.time()) - age)
+        meta = {
+            "labels": [],
+            "creationTimestamp": created,
+            "modificationTimestamp": created,
+            "createdBy": "system",
+        }
+        if self.payloadSize:
+            meta["labels"].append({"name": "astra.mock/padding", "value": "x" * self.payloadSize})
+        return meta
+
+    ######
+    # Object constructors, also used by astraMock.py for objects created through the API
+    ######
+    def addCloud(self, name, cloudType=None):
+        cloudType = cloudType or name.split("-")[0]
+        cloud = {
+            "type": "application/astra-cloud",
+            "version": "1.0",
+            "id": self.newID(),
+            "name": name,
+            "cloudType": cloudType,
+            "metadata": self.metadata(self.ageSeconds),
+        }
+        self.clouds[cloud["id"]] = cloud
+        return cloud
+
+    def addCluster(self, name, cloudID, managedState="managed"):
+        cloudType = self.clouds[cloudID]["cloudType"] if cloudID in self.clouds else "GCP"
+        cluster = {
+            "type": "application/astra-cluster",
+            "version": "1.1",
+            "id": self.newID(),
+            "name": name,
+            "clusterType": self.clusterTypes.get(cloudType, "kubernetes"),
+            "managedState": managedState,
+            "cloudID": cloudID,
+            "metadata": self.metadata(self.ageSeconds),
+        }
+        self.clusters[cluster["id"]] = cluster
+        self.storageClasses[cluster["id"]] = [
+            {
+                "type": "application/astra-storageClass",
+                "version": "1.1",
+                "id": self.newID(),
+                "name": scName,
+                "provisioner": "csi.trident.netapp.io",
+                "isDefault": "true" if counter == 0 else "false",
+            }
+            for counter, scName in enumerate(self.storageClassNames.get(cloudType, ["standard"]))
+        ]
+        return cluster
+
+    def addNamespace(self, name, clusterID, state="discovered", systemType=None, age=0):
+        namespace = {
+            "type": "application/astra-namespace",
+            "version": "1.1",
+            "id": self.newID(),
+            "name": name,
+            "namespaceState": state,
+            "clusterID": clusterID,
+            "metadata": self.metadata(age),
+        }
+        if systemType:
+            namespace["systemType"] = systemType
+        self.namespaces[namespace["id"]] = namespace
+        return namespace
+
+    def addApp(self, name, namespace, clusterID, state="ready", age=0):
+        cluster = self.clusters.get(clusterID, {})
+        app = {
+            "type": "application/astra-app",
+            "version": "2.0",
+            "id": self.newID(),
+            "name": name,
+            "namespaceScopedResources": [{"namespace": namespace, "labelSelectors": []}],
+            "state": state,
+            "lastResourceCollectionTimestamp": timestamp(int(time.time())),
+            "stateTransitions": self.appStateTransitions,
+            "stateDetails": [],
+            "protectionState": "none",
+            "protectionStateDetails": [],
+            "namespaces": [namespace],
+            "clusterName": cluster.get("name", ""),
+            "clusterID": clusterID,
+            "clusterType": cluster.get("clusterType", "gke"),
+            "metadata": self.metadata(age),
+        }
+        appID = app["id"]
+        self.apps[appID] = app
+        self.snaps[appID] = {}
+        self.backups[appID] = {}
+        self.schedules[appID] = {}
+        self.assets.setdefault(appID, [])
+        return app
+
+    def addSnap(self, appID, name, state, age=0):
+        snap = {
+            "type": "application/astra-appSnap",
+            "version": "1.1",
+            "id": self.newID(),
+            "name": name,
+            "state": state,
+            "stateUnready": [],
+            "metadata": self.metadata(age),
+        }
+        self.snaps[appID][snap["id"]] = snap
+        return snap
+
+    def addBackup(self, appID, name, state, age=0):
+        backup = {
+            "type": "application/astra-appBackup",
+            "version": "1.1",
+            "id": self.newID(),
+            "name": name,
+            "bucketID": "mock-bucket",
+            "state": state,
+            "stateUnready": [],
+            "metadata": self.metadata(age),
+        }
+        self.backups[appID][backup["id"]] = backup
+        return backup
+
+    def addHook(
+        self,
+        appID,
+        name,
+        scriptID,
+        stage="pre",
+        action="snapshot",
+        arguments=None,
+        matchingCriteria=None,
+    ):
+        hook = {
+            "type": "application/astra-executionHook",
+            "version": "1.0",
+            "id": self.newID(),
+            "name": name,
+            "hookType": "custom",
+            "action": action,
+            "stage": stage,
+            "hookSourceID": scriptID,
+            "arguments": arguments or [],
+            "appID": appID,
+            "matchingImages": [],
+            "matchingCriteria": matchingCriteria or [],
+            "enabled": "true",
+            "metadata": self.metadata(),
+        }
+        self.hooks[hook["id"]] = hook
+        return hook
+
+    def addAsset(self, appID, namespace, counter):
+        assetType = self.assetTypes[counter % len(self.assetTypes)]
+        asset = {
+            "type": "application/astra-appAsset",
+            "version": "1.1",
+            "id": self.newID(),
+            "assetName": f"{namespace}-{assetType.lower()}-{counter}",
+            "assetType": assetType,
+            "namespace": namespace,
+        }
+        self.assets[appID].append(asset)
+        return asset
+
+    def addScript(self, name, source, description=None):
+        script = {
+            "type": "application/astra-hookSource",
+            "version": "1.0",
+            "id": self.newID(),
+            "name": name,
+            "source": source,
+            "sourceType": "script",
+            "description": description or "",
+            "metadata": self.metadata(),
+        }
+        self.scripts[script["id"]] = script
+        return script
+
+    ######
+    # Output helpers
+    ######
+    def listing(self, kind):
+        """Return {"items": [...]} for kind, matching what astraSDK's get* classes return, for
+        example the custom appID key which getSnaps() and getBackups() add to each item"""
+        if kind in ("snapshots", "backups"):
+            children = self.snaps if kind == "snapshots" else self.backups
+            items = []
+            for appID, objects in children.items():
+                for obj in objects.values():
+                    item = dict(obj)
+                    item["appID"] = appID
+                    items.append(item)
+        elif kind == "storageClasses":
+            items = [sc for scList in self.storageClasses.values() for sc in scList]
+        elif kind == "assets":
+            items = [asset for assetList in self.assets.values() for asset in assetList]
+        else:
+            items = list(getattr(self, kind).values())
+        return {"items": items, "metadata": {}}
+
+    def counts(self):
+        return {
+            "clouds": len(self.clouds),
+            "clusters": len(self.clusters),
+            "storageClasses": sum(len(v) for v in self.storageClasses.values()),
+            "namespaces": len(self.namespaces),
+            "apps": len(self.apps),
+            "snapshots": sum(len(v) for v in self.snaps.values()),
+            "backups": sum(len(v) for v in self.backups.values()),
+            "hooks": len(self.hooks),
+            "assets": sum(len(v) for v in self.assets.values()),
+            "scripts": len(self.scripts),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Astra Control fleet")
+    parser.add_argument("-a", "--apps", default=100, type=int)
+    parser.add_argument("-c", "--clusters", default=4, type=int)
+    parser.add_argument("--clouds", default=2, type=int)
+    parser.add_argument("--namespacesPerCluster", default=10, type=int)
+    parser.add_argument("--snapshotsPerApp", default=10, type=int)
+    parser.add_argument("--backupsPerApp", default=5, type=int)
+    parser.add_argument("--hooksPerApp", default=1, type=int)
+    parser.add_argument("--assetsPerApp", default=10, type=int)
+    parser.add_argument("--scripts", default=2, type=int)
+    parser.add_argument(
+        "-d", "--distribution", default="poisson", choices=["fixed", "uniform", "poisson", "zipf"]
+    )
+    parser.add_argument("--failedRate", default=0.02, type=float)
+    parser.add_argument("--pendingRate", default=0.01, type=float)
+    parser.add_argument("--ageDays", default=30, type=float)
+    parser.add_argument("--payloadSize", default=0, type=int)
+    parser.add_argument("--seed", default=0, type=int)
+    parser.add_argument(
+        "-k",
+        "--kind",
+        default=None,
+        choices=[
+            "clouds",
+            "clusters",
+            "storageClasses",
+            "namespaces",
+            "apps",
+            "snapshots",
+            "backups",
+            "hooks",
+            "assets",
+            "scripts",
+        ],
+        help="print the JSON listing of this kind of object, rather than a summary",
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    fleet = astraFleet(
+        apps=args.apps,
+        clusters=args.clusters,
+        clouds=args.clouds,
+        namespacesPerCluster=args.namespacesPerCluster,
+        snapshotsPerApp=args.snapshotsPerApp,
+        backupsPerApp=args.backupsPerApp,
+        hooksPerApp=args.hooksPerApp,
+        assetsPerApp=args.assetsPerApp,
+        scripts=args.scripts,
+        distribution=args.distribution,
+        failedRate=args.failedRate,
+        pendingRate=args.pendingRate,
+        ageDays=args.ageDays,
+        payloadSize=args.payloadSize,
+        seed=args.seed,
+    )
+    if args.kind:
+        json.dump(fleet.listing(args.kind), sys.stdout)
+    else:
+        counts = fleet.counts()
+        counts["generationSeconds"] = round(time.perf_counter() - start, 3)
+        print(json.dumps(counts, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+"""
+   Copyright 2021 NetApp, Inc
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+try:
+    from . import astraModels
+    from . import astraSDK
+    from . import astraTime
+except ImportError:
+    import astraModels
+    import astraSDK
+    import astraTime
+
+
+class inventory:
+    """An in-memory store of Astra Control objects (as astraModels models), with hash indexes
+    so that looking an object up by its ID, or finding every object with a given name, app,
+    cluster or state, doesn't mean scanning a list.
+
+    Each kind of object is fetched through the SDK the first time it's needed (or can be
+    loaded from an existing SDK result with load()), and can then be kept up to date with
+    upsert() and remove() rather than fetched again.
+
+    inv = astraInventory.getInventory()
+    app = inv.first("apps", name="wordpress")
+    for backup in inv.find("backups", appID=app.id, state="completed"):
+        ...
+    """
+
+    # The attributes each kind of object is indexed on, in addition to its id
+    indexFields = {
+        "apps": ("name", "clusterID", "namespace", "state"),
+        "snapshots": ("name", "appID", "state"),
+        "backups": ("name", "appID", "state"),
+        "clusters": ("name", "managedState", "cloudID"),
+        "clouds": ("name",),
+        "namespaces": ("name", "clusterID", "namespaceState"),
+        "hooks": ("name", "appID"),
+        "scripts": ("name",),
+    }
+
+    def __init__(self, quiet=True):
+        """quiet: passed through to the SDK classes used to fetch objects"""
+        self.quiet = quiet
+        self.objects = {kind: {} for kind in self.indexFields}
+        # kind -> field -> value -> {id: object}.  A dict is used for each value's objects
+        # rather than a set so find() returns objects in the order the API listed them.
+        self.indexes = {
+            kind: {field: {} for field in fields} for kind, fields in self.indexFields.items()
+        }
+        self.loaded = set()
+        # kind -> (list of objects, astraTime.column() of their createdEpoch), see byAge()
+        self.epochColumns = {}
+
+    def fetcher(self, kind):
+        """The SDK call which lists every object of kind"""
+        return {
+            "apps": lambda: astraSDK.getApps(quiet=self.quiet).main(),
+            "snapshots": lambda: astraSDK.getSnaps(quiet=self.quiet).main(),
+            "backups": lambda: astraSDK.getBackups(quiet=self.quiet).main(),
+            "clusters": lambda: astraSDK.getClusters(quiet=self.quiet).main(),
+            "clouds": lambda: astraSDK.getClouds(quiet=self.quiet).main(),
+            "namespaces": lambda: astraSDK.getNamespaces(quiet=self.quiet).main(),
+            "hooks": lambda: astraSDK.getHooks(quiet=self.quiet).main(),
+            "scripts": lambda: astraSDK.getScripts(quiet=self.quiet).main(),
+        }[kind]
+
+    def fetch(self, kind):
+        """(Re)load every object of kind from Astra Control, returning False on failure"""
+        listing = self.fetcher(kind)()
+        if not isinstance(listing, dict):
+            return False
+        self.load(kind, listing)
+        return True
+
+    def ensure(self, kind):
+        """Fetch kind if it hasn't been loaded yet"""
+        if kind not in self.loaded:
+            return self.fetch(kind)
+        return True
+
+    def load(self, kind, listing):
+        """Replace every object of kind with those in listing, an SDK result or list of
+        objects (either dicts or models)"""
+        self.objects[kind] = {}
+        self.indexes[kind] = {field: {} for field in self.indexFields[kind]}
+        self.epochColumns.pop(kind, None)
+        items = listing.get("items", []) if isinstance(listing, dict) else listing
+        model = astraModels.models[kind]
+        for obj in items:
+            self.upsert(kind, obj if isinstance(obj, model) else model.fromJSON(obj))
+        self.loaded.add(kind)
+
+    def upsert(self, kind, obj):
+        """Add or replace a single object, keeping the indexes up to date"""
+        if isinstance(obj, dict):
+            obj = astraModels.models[kind].fromJSON(obj)
+        if obj.id in self.objects[kind]:
+            self.remove(kind, obj.id)
+        self.objects[kind][obj.id] = obj
+        self.epochColumns.pop(kind, None)
+        for field, index in self.indexes[kind].items():
+            index.setdefault(getattr(obj, field), {})[obj.id] = obj
+        return obj
+
+    def remove(self, kind, objID):
+        """Remove a single object, returning it (or None if it wasn't there)"""
+        obj = self.objects[kind].pop(objID, None)
+        if obj is None:
+            return None
+        self.epochColumns.pop(kind, None)
+        for field, index in self.indexes[kind].items():
+            value = getattr(obj, field)
+            bucket = index.get(value)
+            if bucket is not None:
+                bucket.pop(objID, None)
+                if not bucket:
+                    del index[value]
+        return obj
+
+    def get(self, kind, objID):
+        """The object of kind with objID, or None"""
+        self.ensure(kind)
+        return self.objects[kind].get(objID)
+
+    def find(self, kind, **criteria):
+        """Every object of kind whose attributes equal all of criteria.  The most selective
+        indexed criterion narrows down the candidates, any others are then checked directly."""
+        self.ensure(kind)
+        indexes = self.indexes[kind]
+        candidates = None
+        narrowedBy = None
+        for field, value in criteria.items():
+            if field == "id":
+                obj = self.objects[kind].get(value)
+                bucket = {value: obj} if obj else {}
+            elif field in indexes:
+                bucket = indexes[field].get(value, {})
+            else:
+                continue
+            if candidates is None or len(bucket) < len(candidates):
+                candidates = bucket
+                narrowedBy = field
+        if candidates is None:
+            candidates = self.objects[kind]
+        # Every candidate already matches the criterion its index was looked up by
+        rest = [(field, value) for field, value in criteria.items() if field != narrowedBy]
+        if not rest:
+            return list(candidates.values())
+        return [
+            obj
+            for obj in candidates.values()
+            if all(getattr(obj, field) == value for field, value in rest)
+        ]
+
+    def first(self, kind, **criteria):
+        """The first object of kind matching criteria, or None"""
+        found = self.find(kind, **criteria)
+        return found[0] if found else None
+
+    def ids(self, kind, **criteria):
+        """The IDs of every object of kind matching criteria"""
+        if not criteria:
+            self.ensure(kind)
+            return list(self.objects[kind])
+        return [obj.id for obj in self.find(kind, **criteria)]
+
+    def resolve(self, kind, nameOrID, **criteria):
+        """The object of kind whose ID or name is nameOrID, or None"""
+        obj = self.get(kind, nameOrID)
+        if obj and all(getattr(obj, field) == value for field, value in criteria.items()):
+            return obj
+        return self.first(kind, name=nameOrID, **criteria)
+
+    def epochColumn(self, kind):
+        """(every object of kind, astraTime.column() of their createdEpoch), built the first
+        time it's needed and kept until an object of kind is next added or removed"""
+        self.ensure(kind)
+        if kind not in self.epochColumns:
+            objects = list(self.objects[kind].values())
+            self.epochColumns[kind] = (
+                objects,
+                astraTime.column([obj.createdEpoch for obj in objects]),
+            )
+        return self.epochColumns[kind]
+
+    def byAge(
+        self, kind, minAge=None, maxAge=None, youngestFirst=True, limit=None, now=None, **criteria
+    ):
+        """The objects of kind created at least minAge and at most maxAge seconds ago (as of
+        now, by default the time of the call), youngest first unless youngestFirst is False,
+        and at most limit of them.  Any criteria are matched as they are by find().
+
+        Rather than compare each object in turn, the ages are filtered and sorted a whole
+        column of epochs at a time (with NumPy, if it's installed), which for every object of
+        kind is built once and kept."""
+        if criteria:
+            objects = self.find(kind, **criteria)
+            epochs = astraTime.column([obj.createdEpoch for obj in objects])
+        else:
+            objects, epochs = self.epochColumn(kind)
+        if minAge is None and maxAge is None:
+            positions = None
+        else:
+            positions = astraTime.ageMask(epochs, minAge, maxAge, now)
+        order = astraTime.ageOrder(epochs, positions, youngestFirst, limit)
+        return [objects[i] for i in order]
+
+    def appOf(self, kind, objID):
+        """The app that a snapshot, backup or hook belongs to, or None"""
+        obj = self.get(kind, objID)
+        if obj is None:
+            return None
+        return self.get("apps", obj.appID)
+
+
+sharedInventory = None
+
+
+def getInventory(quiet=True):
+    """The inventory shared by everything running in this process"""
+    global sharedInventory
+    if sharedInventory is None:
+        sharedInventory = inventory(quiet=quiet)
+    return sharedInventory
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+"""
+   Copyright 2021 NetApp, Inc
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import os
+import threading
+
+try:
+    from . import astraOutput
+    from . import astraTime
+except ImportError:
+    import astraOutput
+    import astraTime
+
+
+class journal:
+    """An append-only journal of the operations of a long bulk job (such as snapshotting or
+    pruning many apps), so that a job which is cut short, by a CI timeout, a SystemExit or a
+    laptop going to sleep, can be resumed without repeating what it had already done.
+
+    The journal is a file of one line of JSON per event.  The first line is the job itself (a
+    mapping of the command and its arguments), and each line after it an event of one of
+    the job's operations (such as the snapshot of an app, keyed by the appID): planned,
+    submitted (with the ID of the object the request created), then completed or failed.
+    Each line is flushed as soon as it's written, so the journal holds every event up to the
+    moment the job stopped, and a line cut short by the job stopping mid-write is ignored.
+
+    Opening a journal which already holds events raises ValueError, unless resume is given,
+    in which case the events are read back (and must be of the same job), and appended to.
+
+    log = astraJournal.journal("snapshots.journal", {"command": "create snapshots"}, resume=True)
+    if log.event(appID) != "completed":
+        log.record(appID, "submitted", snapID)
+    """
+
+    events = ("planned", "submitted", "completed", "failed")
+
+    def __init__(self, path, job, resume=False):
+        """path: the journal file
+        job: a mapping (of JSON types) which identifies the job
+        resume: carry on from the events already in the file, if there are any"""
+        self.path = path
+        # As it reads back from the file, with any tuples as lists
+        self.job = astraOutput.jsonLoads(astraOutput.jsonDumps(job))
+        self.lock = threading.Lock()
+        # key: the latest event of the operation, with its ID and any extra fields
+        self.latest = {}
+        lines = []
+        if os.path.exists(path):
+            with open(path, encoding="utf8") as f:
+                lines = [line for line in f.read().splitlines() if line.strip()]
+        if lines and not resume:
+            raise ValueError(f"{path} already holds a journal, resume it or remove it")
+        if lines:
+            self.load(lines)
+        self.file = open(path, "a", encoding="utf8")
+        if not lines:
+            self.write({"job": self.job})
+
+    def load(self, lines):
+        """Read the events of an existing journal"""
+        try:
+            header = astraOutput.jsonLoads(lines[0])
+        except ValueError:
+            header = None
+        if not isinstance(header, dict) or header.get("job") != self.job:
+            raise ValueError(f"{self.path} is the journal of a different job")
+        for line in lines[1:]:
+            try:
+                entry = astraOutput.jsonLoads(line)
+            except ValueError:
+                # A line cut short by the job stopping as it was written
+                continue
+            if isinstance(entry, dict) and entry.get("event") in self.events:
+                self.latest[entry["key"]] = entry
+
+    def write(self, entry):
+        with self.lock:
+            self.file.write(astraOutput.jsonDumps(entry) + "\n")
+            self.file.flush()
+
+    def record(self, key, event, objID=None, **extra):
+        """Append an event of the operation key, with the ID of its object and any extra
+        fields (of JSON types)"""
+        if event not in self.events:
+            raise ValueError(f"event must be one of {', '.join(self.events)}")
+        entry = dict(extra, key=key, event=event, id=objID, time=astraTime.currentEpoch())
+        self.latest[key] = entry
+        self.write(entry)
+
+    def event(self, key):
+        """The latest event of the operation key, or None if it has none"""
+        entry = self.latest.get(key)
+        return None if entry is None else entry["event"]
+
+    def entry(self, key):
+        """The latest event of the operation key as it was recorded (with its id and any extra
+        fields), or None"""
+        return self.latest.get(key)
+
+    def counts(self):
+        """{event: the number of operations whose latest event it is}"""
+        ret = {}
+        for entry in self.latest.values():
+            ret[entry["event"]] = ret.get(entry["event"], 0) + 1
+        return ret
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,721 @@
+#!/usr/bin/env python
+"""
+   Copyright 2021 NetApp, Inc
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import argparse
+import json
+import operator
+import os
+import random
+import re
+import socket
+import struct
+import sys
+import threading
+import time
+import yaml
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+try:
+    from . import astraFleet
+except ImportError:
+    import astraFleet
+
+try:
+    import pytest
+except ImportError:
+    pytest = None
+
+
+class astraMockHandler(BaseHTTPRequestHandler):
+    """Routes a single HTTP request to the owning astraMock instance.  The handler itself is
+    stateless, all state lives on self.server.mock"""
+
+    # Quiet the default per-request stderr logging, benchmarks make thousands of calls
+    def log_message(self, format, *args):
+        if self.server.mock.logRequests:
+            super().log_message(format, *args)
+
+    def handleAny(self, method):
+        mock = self.server.mock
+        length = int(self.headers.get("Content-Length") or 0)
+        body = None
+        if length:
+            try:
+                body = json.loads(self.rfile.read(length))
+            except ValueError:
+                body = None
+        parsed = urlparse(self.path)
+        path = parsed.path
+        params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        prefix = f"/accounts/{mock.uid}/"
+        if not path.startswith(prefix):
+            return self.reply(404, {"title": "account not found"})
+        mock.delay()
+        fault = mock.pickFault(method)
+        if fault == "reset":
+            return self.reset()
+        if fault == "slow":
+            time.sleep(mock.faults.get("slowSeconds", 2))
+        if fault == "throttle":
+            return self.reply(
+                429,
+                {"title": "Too Many Requests"},
+                {"Retry-After": str(mock.faults.get("retryAfter", 1))},
+            )
+        if fault in ("502", "503"):
+            return self.reply(int(fault), {"title": "mock injected failure"})
+        status, payload = mock.dispatch(method, path[len(prefix) :], body, params)
+        if fault == "lost":
+            return self.reset()
+        self.reply(status, payload, truncate=(fault == "truncate"))
+
+    def reply(self, status, payload, headers=None, truncate=False):
+        data = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        if truncate and data:
+            # A well formed HTTP response with a body that isn't valid JSON
+            data = data[: len(data) // 2]
+        self.send_response(status)
+        if data:
+            self.send_header("Content-Type", "application/json")
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if data:
+            self.wfile.write(data)
+
+    def reset(self):
+        """Abort the connection with a TCP RST rather than an orderly close"""
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+        self.close_connection = True
+        self.connection.close()
+
+    def do_GET(self):
+        self.handleAny("get")
+
+    def do_POST(self):
+        self.handleAny("post")
+
+    def do_PUT(self):
+        self.handleAny("put")
+
+    def do_DELETE(self):
+        self.handleAny("delete")
+
+
+class astraMockHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # socketserver's default backlog of 5 drops the connections of concurrent clients, which
+    # then wait a second to retry
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address):
+        # Injected connection resets routinely cause broken pipes, those aren't worth a traceback
+        if not isinstance(sys.exc_info()[1], OSError):
+            super().handle_error(request, client_address)
+
+
+class astraMock:
+    """A self-contained, in-memory stand-in for the subset of the Astra Control API that
+    astraSDK.py makes use of.  It's intended for offline development and benchmarking, so
+    that the SDK can be exercised at scale without touching a real Astra Control instance.
+
+    apps: number of managed apps to generate
+    clusters: number of managed clusters (spread across two clouds)
+    snapshotsPerApp / backupsPerApp / hooksPerApp / assetsPerApp: seeded children per app
+    namespacesPerCluster: unmanaged namespaces per cluster, in addition to app namespaces
+    latency: seconds to sleep before answering each request, jitter adds up to that many
+             more seconds at random
+    payloadSize: number of bytes of filler to add to every object's metadata, to mimic
+                 larger real world payloads
+    snapSeconds / backupSeconds / restoreSeconds / cloneSeconds: how long newly created
+                 objects stay in their transitional state before completing
+    fleet: an astraFleet.astraFleet to serve, for more control over the generated objects
+           than the apps/clusters/...PerApp arguments provide (which are then ignored)
+    faults: either the name of an entry in faultProfiles, or a dict of the same form, which
+            sets the rate (0 to 1) at which each kind of failure is injected:
+                throttle: 429 Too Many Requests, with a Retry-After of retryAfter seconds
+                error: a 502 or 503, followed by burst more consecutive 502/503s
+                slow: the response is held back for slowSeconds before the first byte
+                truncate: the response body is cut in half (invalid JSON)
+                reset: the TCP connection is reset without any response
+                lost: a POST is carried out, but its connection is reset before the
+                      response is sent (as when the response to a POST times out)
+    """
+
+    faultProfiles = {
+        "none": {},
+        "throttled": {"throttle": 0.2, "retryAfter": 1},
+        "flaky": {"error": 0.05, "burst": 3},
+        "slow": {"slow": 0.1, "slowSeconds": 2},
+        "corrupt": {"truncate": 0.05},
+        "reset": {"reset": 0.05},
+        "lost": {"lost": 0.2},
+        "hostile": {
+            "throttle": 0.05,
+            "retryAfter": 1,
+            "error": 0.02,
+            "burst": 3,
+            "slow": 0.02,
+            "slowSeconds": 2,
+            "truncate": 0.01,
+            "reset": 0.01,
+        },
+    }
+    faultKinds = ["throttle", "error", "slow", "truncate", "reset", "lost"]
+
+    # List calls accept a filter param of one or more "<field> <op> '<value>'" terms joined by
+    # "and" (field can be a dotted path like metadata.creationTimestamp), as well as an include
+    # param of comma separated fields, which returns each item as a list of just those values.
+    filterTerm = re.compile(r"([\w.]+)\s+(eq|ne|gt|lt|ge|le)\s+'([^']*)'$")
+    filterOps = {
+        "eq": operator.eq,
+        "ne": operator.ne,
+        "gt": operator.gt,
+        "lt": operator.lt,
+        "ge": operator.ge,
+        "le": operator.le,
+    }
+
+    routes = [
+        ("get", r"k8s/v2/apps", "listApps"),
+        ("post", r"k8s/v2/apps", "createApp"),
+        ("put", r"k8s/v2/apps/(?P<appID>[^/]+)", "restoreApp"),
+        ("delete", r"k8s/v2/apps/(?P<appID>[^/]+)", "deleteApp"),
+        ("get", r"k8s/v1/apps/(?P<appID>[^/]+)/appSnaps", "listSnaps"),
+        ("post", r"k8s/v1/apps/(?P<appID>[^/]+)/appSnaps", "createSnap"),
+        ("delete", r"k8s/v1/apps/(?P<appID>[^/]+)/appSnaps/(?P<objID>[^/]+)", "deleteSnap"),
+        ("get", r"k8s/v1/apps/(?P<appID>[^/]+)/appBackups", "listBackups"),
+        ("post", r"k8s/v1/apps/(?P<appID>[^/]+)/appBackups", "createBackup"),
+        ("delete", r"k8s/v1/apps/(?P<appID>[^/]+)/appBackups/(?P<objID>[^/]+)", "deleteBackup"),
+        ("get", r"k8s/v1/apps/(?P<appID>[^/]+)/executionHooks", "listAppHooks"),
+        ("get", r"k8s/v1/apps/(?P<appID>[^/]+)/appAssets", "listAssets"),
+        ("get", r"k8s/v1/apps/(?P<appID>[^/]+)/schedules", "listSchedules"),
+        ("post", r"k8s/v1/apps/(?P<appID>[^/]+)/schedules", "createSchedule"),
+        ("put", r"k8s/v1/apps/(?P<appID>[^/]+)/schedules/(?P<objID>[^/]+)", "updateSchedule"),
+        ("get", r"topology/v1/clouds", "listClouds"),
+        ("get", r"topology/v1/clouds/(?P<cloudID>[^/]+)/clusters", "listClusters"),
+        (
+            "get",
+            r"topology/v1/clouds/(?P<cloudID>[^/]+)/clusters/(?P<clusterID>[^/]+)/storageClasses",
+            "listStorageClasses",
+        ),
+        ("get", r"topology/v1/namespaces", "listNamespaces"),
+        ("get", r"topology/v1/clusters/(?P<clusterID>[^/]+)/namespaces", "listNamespaces"),
+        ("post", r"topology/v1/managedClusters", "manageCluster"),
+        ("delete", r"topology/v1/managedClusters/(?P<clusterID>[^/]+)", "unmanageCluster"),
+        ("get", r"core/v1/hookSources", "listScripts"),
+        ("post", r"core/v1/hookSources", "createScript"),
+        ("put", r"core/v1/hookSources/(?P<objID>[^/]+)", "updateScript"),
+        ("delete", r"core/v1/hookSources/(?P<objID>[^/]+)", "deleteScript"),
+        ("post", r"core/v1/executionHooks", "createHook"),
+        ("put", r"core/v1/executionHooks/(?P<objID>[^/]+)", "updateHook"),
+        ("delete", r"core/v1/executionHooks/(?P<objID>[^/]+)", "deleteHook"),
+    ]
+
+    def __init__(
+        self,
+        apps=10,
+        clusters=2,
+        snapshotsPerApp=2,
+        backupsPerApp=2,
+        hooksPerApp=1,
+        assetsPerApp=5,
+        namespacesPerCluster=5,
+        latency=0,
+        jitter=0,
+        payloadSize=0,
+        snapSeconds=0,
+        backupSeconds=0,
+        restoreSeconds=0,
+        cloneSeconds=0,
+        seed=0,
+        faults=None,
+        fleet=None,
+        host="127.0.0.1",
+        port=0,
+        uid="00000000-0000-0000-0000-000000000000",
+        logRequests=False,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.payloadSize = payloadSize
+        self.snapSeconds = snapSeconds
+        self.backupSeconds = backupSeconds
+        self.restoreSeconds = restoreSeconds
+        self.cloneSeconds = cloneSeconds
+        self.host = host
+        self.port = port
+        self.uid = uid
+        self.logRequests = logRequests
+        self.random = random.Random(seed)
+        self.faults = self.faultProfiles[faults] if isinstance(faults, str) else (faults or {})
+        # Number of remaining 502/503 responses in the current error burst
+        self.burstRemaining = 0
+        self.faultCounts = {}
+        self.lock = threading.Lock()
+        self.compiledRoutes = [
+            (method, re.compile(pattern + "$"), handler) for method, pattern, handler in self.routes
+        ]
+        # {objectID: (deadline, object, newState)} for objects mid state transition
+        self.pending = {}
+        self.requestCount = 0
+        # Query params of the request being dispatched
+        self.params = {}
+        self.httpd = None
+        self.thread = None
+
+        self.fleet = fleet or astraFleet.astraFleet(
+            apps=apps,
+            clusters=clusters,
+            snapshotsPerApp=snapshotsPerApp,
+            backupsPerApp=backupsPerApp,
+            hooksPerApp=hooksPerApp,
+            assetsPerApp=assetsPerApp,
+            namespacesPerCluster=namespacesPerCluster,
+            payloadSize=payloadSize,
+            seed=seed,
+        )
+        self.clouds = self.fleet.clouds
+        self.clusters = self.fleet.clusters
+        self.storageClasses = self.fleet.storageClasses
+        self.namespaces = self.fleet.namespaces
+        self.apps = self.fleet.apps
+        self.snaps = self.fleet.snaps
+        self.backups = self.fleet.backups
+        self.hooks = self.fleet.hooks
+        self.assets = self.fleet.assets
+        self.schedules = self.fleet.schedules
+        self.scripts = self.fleet.scripts
+
+    ######
+    # Request handling
+    ######
+    def delay(self):
+        if self.latency or self.jitter:
+            time.sleep(self.latency + self.random.uniform(0, self.jitter))
+
+    def pickFault(self, method):
+        """Decide which (if any) fault to inject into the current request"""
+        if not self.faults:
+            return None
+        with self.lock:
+            if self.burstRemaining:
+                self.burstRemaining -= 1
+                fault = self.random.choice(["502", "503"])
+            else:
+                fault = None
+                for kind in self.faultKinds:
+                    if kind == "lost" and method != "post":
+                        continue
+                    if self.random.random() < self.faults.get(kind, 0):
+                        fault = kind
+                        break
+                if fault == "error":
+                    self.burstRemaining = self.faults.get("burst", 0)
+                    fault = self.random.choice(["502", "503"])
+            if fault:
+                self.faultCounts[fault] = self.faultCounts.get(fault, 0) + 1
+            return fault
+
+    def transition(self, obj, state, seconds):
+        """Move obj to state, either now or after seconds have elapsed"""
+        if seconds:
+            self.pending[obj["id"]] = (time.monotonic() + seconds, obj, state)
+        else:
+            obj["state"] = state
+            self.touch(obj)
+
+    @staticmethod
+    def touch(obj):
+        """Bump an object's modificationTimestamp, as the API does on every change"""
+        obj["metadata"]["modificationTimestamp"] = astraFleet.timestamp(time.time())
+
+    def tick(self):
+        """Apply any state transitions whose time has come"""
+        if not self.pending:
+            return
+        now = time.monotonic()
+        for objID in [k for k, v in self.pending.items() if v[0] <= now]:
+            _, obj, state = self.pending.pop(objID)
+            obj["state"] = state
+            self.touch(obj)
+
+    def dispatch(self, method, endpoint, body, params=None):
+        """Returns a tuple of (HTTP status code, JSON serializable payload or None)"""
+        for routeMethod, pattern, handler in self.compiledRoutes:
+            if routeMethod != method:
+                continue
+            match = pattern.match(endpoint)
+            if match:
+                with self.lock:
+                    self.requestCount += 1
+                    self.params = params or {}
+                    self.tick()
+                    status, payload = getattr(self, handler)(body or {}, **match.groupdict())
+                    if method == "post" and status == 201 and isinstance(body, dict):
+                        # As the API does, the labels given for a new object are kept
+                        labels = body.get("metadata", {}).get("labels", [])
+                        payload["metadata"].setdefault("labels", []).extend(labels)
+                    return status, payload
+        return 404, {"title": f"{method.upper()} {endpoint} not found"}
+
+    @staticmethod
+    def lookup(obj, path):
+        """The value at a list of nested keys, or None"""
+        for key in path:
+            if not isinstance(obj, dict):
+                return None
+            obj = obj.get(key)
+        return obj
+
+    def compileFilter(self, expression):
+        """Parse a filter param into a list of (path, operator, value), raising ValueError if
+        it isn't valid"""
+        terms = []
+        for term in re.split(r"\s+and\s+", expression.strip()):
+            match = self.filterTerm.match(term)
+            if not match:
+                raise ValueError(f"invalid filter term: {term}")
+            path, op, value = match.groups()
+            terms.append((path.split("."), self.filterOps[op], value))
+        return terms
+
+    def listing(self, items):
+        """A list response, with the filter and include params of the request applied"""
+        if self.params.get("filter"):
+            try:
+                terms = self.compileFilter(self.params["filter"])
+            except ValueError as e:
+                return 400, {"title": str(e)}
+            items = [
+                item
+                for item in items
+                if all(
+                    (value := self.lookup(item, path)) is not None and op(str(value), operand)
+                    for path, op, operand in terms
+                )
+            ]
+        if self.params.get("include"):
+            fields = [field.split(".") for field in self.params["include"].split(",")]
+            items = [[self.lookup(item, field) for field in fields] for item in items]
+        return 200, {"items": list(items), "metadata": {}}
+
+    def listApps(self, body):
+        return self.listing(self.apps.values())
+
+    def createApp(self, body):
+        clusterID = body.get("clusterID")
+        if clusterID not in self.clusters:
+            return 400, {"title": "invalid clusterID"}
+        namespace = body.get("namespaceScopedResources", [{}])[0].get("namespace") or body["name"]
+        isClone = body.get("sourceAppID") or body.get("backupID") or body.get("snapshotID")
+        app = self.fleet.addApp(body["name"], namespace, clusterID, state="provisioning")
+        self.transition(app, "ready", self.cloneSeconds if isClone else 0)
+        for ns in self.namespaces.values():
+            if ns["name"] == namespace and ns["clusterID"] == clusterID:
+                ns["namespaceState"] = "managed"
+                self.touch(ns)
+        return 201, app
+
+    def restoreApp(self, body, appID):
+        app = self.apps.get(appID)
+        if app is None:
+            return 404, {"title": "app not found"}
+        app["state"] = "restoring"
+        self.touch(app)
+        self.transition(app, "ready", self.restoreSeconds)
+        return 204, None
+
+    def deleteApp(self, body, appID):
+        if self.apps.pop(appID, None) is None:
+            return 404, {"title": "app not found"}
+        for collection in [self.snaps, self.backups, self.schedules, self.assets]:
+            collection.pop(appID, None)
+        return 204, None
+
+    def listChildren(self, collection, appID):
+        if appID not in self.apps:
+            return 404, {"title": "app not found"}
+        return self.listing(collection[appID].values())
+
+    def listSnaps(self, body, appID):
+        return self.listChildren(self.snaps, appID)
+
+    def listBackups(self, body, appID):
+        return self.listChildren(self.backups, appID)
+
+    def listSchedules(self, body, appID):
+        return self.listChildren(self.schedules, appID)
+
+    def createSnap(self, body, appID):
+        if appID not in self.apps:
+            return 404, {"title": "app not found"}
+        snap = self.fleet.addSnap(appID, body.get("name"), "pending")
+        self.transition(snap, "completed", self.snapSeconds)
+        return 201, snap
+
+    def createBackup(self, body, appID):
+        if appID not in self.apps:
+            return 404, {"title": "app not found"}
+        backup = self.fleet.addBackup(appID, body.get("name"), "pending")
+        self.transition(backup, "completed", self.backupSeconds)
+        return 201, backup
+
+    def deleteChild(self, collection, appID, objID):
+        if collection.get(appID, {}).pop(objID, None) is None:
+            return 404, {"title": "not found"}
+        self.pending.pop(objID, None)
+        return 204, None
+
+    def deleteSnap(self, body, appID, objID):
+        return self.deleteChild(self.snaps, appID, objID)
+
+    def deleteBackup(self, body, appID, objID):
+        return self.deleteChild(self.backups, appID, objID)
+
+    def createSchedule(self, body, appID):
+        if appID not in self.apps:
+            return 404, {"title": "app not found"}
+        schedule = dict(body)
+        schedule["id"] = self.fleet.newID()
+        schedule["metadata"] = self.fleet.metadata()
+        self.schedules[appID][schedule["id"]] = schedule
+        return 201, schedule
+
+    def updateSchedule(self, body, appID, objID):
+        schedule = self.schedules.get(appID, {}).get(objID)
+        if schedule is None:
+            return 404, {"title": "schedule not found"}
+        schedule.update((k, v) for k, v in body.items() if k not in ("id", "metadata"))
+        self.touch(schedule)
+        return 204, None
+
+    def listAppHooks(self, body, appID):
+        if appID not in self.apps:
+            return 404, {"title": "app not found"}
+        return self.listing(h for h in self.hooks.values() if h["appID"] == appID)
+
+    def listAssets(self, body, appID):
+        if appID not in self.apps:
+            return 404, {"title": "app not found"}
+        return self.listing(self.assets[appID])
+
+    def listClouds(self, body):
+        return self.listing(self.clouds.values())
+
+    def listClusters(self, body, cloudID):
+        return self.listing(c for c in self.clusters.values() if c["cloudID"] == cloudID)
+
+    def listStorageClasses(self, body, cloudID, clusterID):
+        if clusterID not in self.clusters:
+            return 404, {"title": "cluster not found"}
+        return self.listing(self.storageClasses[clusterID])
+
+    def listNamespaces(self, body, clusterID=None):
+        return self.listing(
+            ns for ns in self.namespaces.values() if not clusterID or ns["clusterID"] == clusterID
+        )
+
+    def manageCluster(self, body):
+        cluster = self.clusters.get(body.get("id"))
+        if cluster is None:
+            return 404, {"title": "cluster not found"}
+        cluster["managedState"] = "managed"
+        self.touch(cluster)
+        return 201, cluster
+
+    def unmanageCluster(self, body, clusterID):
+        cluster = self.clusters.get(clusterID)
+        if cluster is None:
+            return 404, {"title": "cluster not found"}
+        cluster["managedState"] = "unmanaged"
+        self.touch(cluster)
+        return 204, None
+
+    def listScripts(self, body):
+        return self.listing(self.scripts.values())
+
+    def createScript(self, body):
+        return 201, self.fleet.addScript(
+            body.get("name"), body.get("source"), body.get("description")
+        )
+
+    def updateScript(self, body, objID):
+        script = self.scripts.get(objID)
+        if script is None:
+            return 404, {"title": "script not found"}
+        script.update((k, v) for k, v in body.items() if k not in ("id", "metadata"))
+        self.touch(script)
+        return 204, None
+
+    def deleteScript(self, body, objID):
+        if self.scripts.pop(objID, None) is None:
+            return 404, {"title": "script not found"}
+        return 204, None
+
+    def createHook(self, body):
+        if body.get("appID") not in self.apps:
+            return 404, {"title": "app not found"}
+        return 201, self.fleet.addHook(
+            body["appID"],
+            body.get("name"),
+            body.get("hookSourceID"),
+            body.get("stage"),
+            body.get("action"),
+            body.get("arguments"),
+            body.get("matchingCriteria"),
+        )
+
+    def updateHook(self, body, objID):
+        hook = self.hooks.get(objID)
+        if hook is None:
+            return 404, {"title": "hook not found"}
+        hook.update((k, v) for k, v in body.items() if k not in ("id", "metadata"))
+        self.touch(hook)
+        return 204, None
+
+    def deleteHook(self, body, objID):
+        if self.hooks.pop(objID, None) is None:
+            return 404, {"title": "hook not found"}
+        return 204, None
+
+    ######
+    # Server lifecycle
+    ######
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def config(self):
+        """Return a config.yaml compatible dict pointing astraSDK at this server"""
+        return {
+            "headers": {"Authorization": "Bearer mock-token"},
+            "uid": self.uid,
+            "astra_project": self.url,
+        }
+
+    def writeConfig(self, directory):
+        """Write a config.yaml into directory which points astraSDK at this server"""
+        with open(os.path.join(directory, "config.yaml"), "w") as f:
+            yaml.dump(self.config(), f)
+
+    def start(self):
+        self.httpd = astraMockHTTPServer((self.host, self.port), astraMockHandler)
+        self.httpd.mock = self
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if pytest:
+
+    @pytest.fixture
+    def astraMockServer(request, tmp_path, monkeypatch):
+        """pytest fixture which starts an astraMock server and points astraSDK at it.
+
+        Enable it with 'pytest_plugins = ["astraMock"]' in a conftest.py, and pass
+        astraMock() arguments through indirect parametrization if the defaults don't fit:
+            @pytest.mark.parametrize("astraMockServer", [{"apps": 1000}], indirect=True)
+        """
+        mock = astraMock(**getattr(request, "param", {}))
+        mock.start()
+        mock.writeConfig(tmp_path)
+        # getConfig() looks next to sys.argv[0] first, which takes precedence over any
+        # config.yaml in ~/.config or /etc
+        monkeypatch.setattr(sys, "argv", [str(tmp_path / "toolkit.py")])
+        yield mock
+        mock.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Astra Control API")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("-p", "--port", default=8080, type=int, help="port to listen on")
+    parser.add_argument("-a", "--apps", default=10, type=int, help="number of managed apps")
+    parser.add_argument("-c", "--clusters", default=2, type=int, help="number of clusters")
+    parser.add_argument("--snapshotsPerApp", default=2, type=int)
+    parser.add_argument("--backupsPerApp", default=2, type=int)
+    parser.add_argument("--hooksPerApp", default=1, type=int)
+    parser.add_argument("--assetsPerApp", default=5, type=int)
+    parser.add_argument("--namespacesPerCluster", default=5, type=int)
+    parser.add_argument("-l", "--latency", default=0, type=float, help="seconds per request")
+    parser.add_argument("-j", "--jitter", default=0, type=float, help="max extra random latency")
+    parser.add_argument("--payloadSize", default=0, type=int, help="filler bytes per object")
+    parser.add_argument("--snapSeconds", default=5, type=float)
+    parser.add_argument("--backupSeconds", default=10, type=float)
+    parser.add_argument("--restoreSeconds", default=10, type=float)
+    parser.add_argument("--cloneSeconds", default=10, type=float)
+    parser.add_argument("--seed", default=0, type=int)
+    parser.add_argument(
+        "-F",
+        "--faults",
+        default=None,
+        choices=list(astraMock.faultProfiles),
+        help="inject failures according to this fault profile",
+    )
+    parser.add_argument("-w", "--writeConfig", default=None, help="write a config.yaml here")
+    parser.add_argument("-v", "--verbose", default=False, action="store_true")
+    args = parser.parse_args()
+
+    mock = astraMock(
+        apps=args.apps,
+        clusters=args.clusters,
+        snapshotsPerApp=args.snapshotsPerApp,
+        backupsPerApp=args.backupsPerApp,
+        hooksPerApp=args.hooksPerApp,
+        assetsPerApp=args.assetsPerApp,
+        namespacesPerCluster=args.namespacesPerCluster,
+        latency=args.latency,
+        jitter=args.jitter,
+        payloadSize=args.payloadSize,
+        snapSeconds=args.snapSeconds,
+        backupSeconds=args.backupSeconds,
+        restoreSeconds=args.restoreSeconds,
+        cloneSeconds=args.cloneSeconds,
+        seed=args.seed,
+        faults=args.faults,
+        host=args.host,
+        port=args.port,
+        logRequests=args.verbose,
+    )
+    if args.writeConfig:
+        mock.writeConfig(args.writeConfig)
+    print(f"Serving mock Astra Control API at {mock.url}/accounts/{mock.uid}/")
+    mock.start()
+    try:
+        mock.thread.join()
+    except KeyboardInterrupt:
+        mock.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+"""
+   Copyright 2021 NetApp, Inc
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import sys
+
+try:
+    from . import astraOutput
+    from . import astraTime
+except ImportError:
+    import astraOutput
+    import astraTime
+
+
+class astraModel:
+    """Compact, read-only view of a single Astra Control object.
+
+    The SDK classes return the API's JSON as nested dicts, which costs well over a kilobyte per
+    object, much of it in fields which are never looked at (stateTransitions, stateUnready,
+    etc.).  Models copy out only the fields in jsonFields into __slots__, interning the low
+    cardinality ones (states, types, and the IDs of parent objects) so every copy shares a
+    single string.
+
+    The complete object is still available through the raw property.  When built with
+    keepRaw=True (the default) the object is kept as a compact JSON string, and only turned
+    back into a dict when raw is accessed.  With keepRaw=False nothing else is kept, and raw
+    returns just the copied fields.
+    """
+
+    # (attribute name, top level JSON key, intern the value)
+    jsonFields = (
+        ("id", "id", False),
+        ("name", "name", False),
+    )
+    # Copied out of the "metadata" dict, present on nearly every object
+    metadataFields = ("creationTimestamp", "modificationTimestamp")
+    # The metadata timestamps as epochs (int seconds, or None), parsed once as the model is
+    # built so that ages can be compared and sorted without parsing anything again
+    epochFields = ("createdEpoch", "modifiedEpoch")
+    __slots__ = ("_raw",) + tuple(f[0] for f in jsonFields) + metadataFields + epochFields
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Split the field list up front, so fromJSON() does no per-field branching
+        cls.plainFields = tuple((attr, key) for attr, key, intern in cls.jsonFields if not intern)
+        cls.internFields = tuple((attr, key) for attr, key, intern in cls.jsonFields if intern)
+
+    @classmethod
+    def fromJSON(cls, obj, keepRaw=True, text=None):
+        """Build a model from a single object as returned by the API (or the SDK).  If the
+        JSON text obj was decoded from is at hand, passing it as text saves re-encoding obj."""
+        self = cls.__new__(cls)
+        get = obj.get
+        parseTimestamp = astraTime.parseTimestamp
+        for attr, key in cls.plainFields:
+            setattr(self, attr, get(key))
+        intern = sys.intern
+        for attr, key in cls.internFields:
+            value = get(key)
+            setattr(self, attr, intern(value) if type(value) is str else value)
+        metadata = get("metadata") or {}
+        self.creationTimestamp = created = metadata.get("creationTimestamp")
+        self.modificationTimestamp = modified = metadata.get("modificationTimestamp")
+        self.createdEpoch = parseTimestamp(created)
+        self.modifiedEpoch = parseTimestamp(modified)
+        if keepRaw:
+            self._raw = text or astraOutput.jsonDumps(obj)
+        else:
+            self._raw = None
+        self.postJSON(obj)
+        return self
+
+    @classmethod
+    def fromList(cls, listing, keepRaw=True):
+        """Build a list of models from an SDK result ({"items": [...]}) or a list of objects"""
+        if isinstance(listing, dict):
+            listing = listing.get("items", [])
+        fromJSON = cls.fromJSON
+        return [fromJSON(obj, keepRaw) for obj in listing]
+
+    def postJSON(self, obj):
+        """Overridden by models with fields that aren't a simple top level key"""
+        pass
+
+    def asDict(self):
+        """The copied fields, in the same shape as the API's JSON"""
+        ret = {key: getattr(self, attr) for attr, key, _ in self.jsonFields}
+        ret["metadata"] = {
+            "creationTimestamp": self.creationTimestamp,
+            "modificationTimestamp": self.modificationTimestamp,
+        }
+        return ret
+
+    @property
+    def raw(self):
+        """The object exactly as the API returned it if it was kept, otherwise asDict()"""
+        if self._raw is None:
+            return self.asDict()
+        return astraOutput.jsonLoads(self._raw)
+
+    @property
+    def rawJSON(self):
+        """The same as raw, as compact JSON text (which is how it's kept)"""
+        if self._raw is None:
+            return astraOutput.jsonDumps(self.asDict())
+        return self._raw
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.id == other.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f"{type(self).__name__}(id={self.id!r}, name={self.name!r})"
+
+
+class App(astraModel):
+    jsonFields = astraModel.jsonFields + (
+        ("state", "state", True),
+        ("protectionState", "protectionState", True),
+        ("clusterID", "clusterID", True),
+        ("clusterName", "clusterName", True),
+        ("clusterType", "clusterType", True),
+    )
+    __slots__ = tuple(f[0] for f in jsonFields[2:]) + ("namespaces",)
+
+    def postJSON(self, obj):
+        namespaces = obj.get("namespaces")
+        if not namespaces:
+            namespaces = [nsr["namespace"] for nsr in obj.get("namespaceScopedResources", [])]
+        self.namespaces = tuple(sys.intern(ns) for ns in namespaces)
+
+    @property
+    def namespace(self):
+        """The namespace of a single namespace app (nearly all of them)"""
+        return self.namespaces[0] if self.namespaces else None
+
+    def asDict(self):
+        ret = super().asDict()
+        ret["namespaces"] = list(self.namespaces)
+        ret["namespaceScopedResources"] = [
+            {"namespace": ns, "labelSelectors": []} for ns in self.namespaces
+        ]
+        return ret
+
+
+class Snapshot(astraModel):
+    # appID isn't returned by the API, but is added by getSnaps()
+    jsonFields = astraModel.jsonFields + (
+        ("state", "state", True),
+        ("appID", "appID", True),
+    )
+    __slots__ = tuple(f[0] for f in jsonFields[2:])
+
+
+class Backup(astraModel):
+    # appID isn't returned by the API, but is added by getBackups()
+    jsonFields = astraModel.jsonFields + (
+        ("state", "state", True),
+        ("appID", "appID", True),
+        ("bucketID", "bucketID", True),
+        ("snapshotID", "snapshotID", False),
+    )
+    __slots__ = tuple(f[0] for f in jsonFields[2:])
+
+
+class Cluster(astraModel):
+    jsonFields = astraModel.jsonFields + (
+        ("clusterType", "clusterType", True),
+        ("managedState", "managedState", True),
+        ("cloudID", "cloudID", True),
+    )
+    __slots__ = tuple(f[0] for f in jsonFields[2:])
+
+
+class Cloud(astraModel):
+    jsonFields = astraModel.jsonFields + (("cloudType", "cloudType", True),)
+    __slots__ = tuple(f[0] for f in jsonFields[2:])
+
+
+class StorageClass(astraModel):
+    # cloudID, cloudType, clusterID and clusterName are added by getStorageClasses()
+    jsonFields = astraModel.jsonFields + (
+        ("provisioner", "provisioner", True),
+        ("isDefault", "isDefault", True),
+        ("cloudID", "cloudID", True),
+        ("cloudType", "cloudType", True),
+        ("clusterID", "clusterID", True),
+        ("clusterName", "clusterName", True),
+    )
+    __slots__ = tuple(f[0] for f in jsonFields[2:])
+
+
+class Namespace(astraModel):
+    jsonFields = astraModel.jsonFields + (
+        ("namespaceState", "namespaceState", True),
+        ("clusterID", "clusterID", True),
+        ("systemType", "systemType", True),
+    )
+    __slots__ = tuple(f[0] for f in jsonFields[2:]) + ("associatedApps",)
+
+    def postJSON(self, obj):
+        # associatedApps is added by getNamespaces()
+        self.associatedApps = tuple(obj.get("associatedApps", ()))
+
+    def asDict(self):
+        ret = super().asDict()
+        ret["associatedApps"] = list(self.associatedApps)
+        return ret
+
+
+class Hook(astraModel):
+    jsonFields = astraModel.jsonFields + (
+        ("appID", "appID", True),
+        ("hookSourceID", "hookSourceID", True),
+        ("action", "action", True),
+        ("stage", "stage", True),
+        ("enabled", "enabled", True),
+    )
+    __slots__ = tuple(f[0] for f in jsonFields[2:]) + ("arguments", "matchingImages")
+
+    def postJSON(self, obj):
+        self.arguments = tuple(obj.get("arguments", ()))
+        self.matchingImages = tuple(obj.get("matchingImages", ()))
+
+    def asDict(self):
+        ret = super().asDict()
+        ret["arguments"] = list(self.arguments)
+        ret["matchingImages"] = list(self.matchingImages)
+        return ret
+
+
+class Script(astraModel):
+    # The source is usually the bulk of a script, so it's left in raw rather than copied
+    jsonFields = astraModel.jsonFields + (
+        ("sourceType", "sourceType", True),
+        ("description", "description", False),
+    )
+    __slots__ = tuple(f[0] for f in jsonFields[2:])
+
+
+# The model for each kind of object, keyed the same way as the SDK's list classes
+models = {
+    "apps": App,
+    "snapshots": Snapshot,
+    "backups": Backup,
+    "clusters": Cluster,
+    "clouds": Cloud,
+    "storageClasses": StorageClass,
+    "namespaces": Namespace,
+    "hooks": Hook,
+    "scripts": Script,
+}
+
+
+def fromList(kind, listing, keepRaw=True):
+    """Build models of the given kind (a key of models) from an SDK list result"""
+    return models[kind].fromList(listing, keepRaw)
@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+"""
+   Copyright 2021 NetApp, Inc
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import collections
+import csv
+import json
+import operator
+import os
+import sys
+import threading
+import yaml
+from tabulate import tabulate
+
+# orjson (when it's installed) decodes and encodes JSON several times faster than the json
+# module, which is the fallback.  ASTRATOOLKITS_JSON=json forces the json module.
+orjson = None
+if os.environ.get("ASTRATOOLKITS_JSON", "orjson") == "orjson":
+    try:
+        import orjson
+    except ImportError:
+        pass
+
+# libyaml's C loader and dumper (when PyYAML was built with it) are several times faster than
+# the pure Python ones, which are the fallback
+try:
+    from yaml import CSafeDumper as yamlDumper
+    from yaml import CSafeLoader as yamlLoader
+except ImportError:
+    from yaml import SafeDumper as yamlDumper
+    from yaml import SafeLoader as yamlLoader
+
+# Output formats which are always streamed, rather than built up and printed at the end
+streamFormats = ("ndjson", "csv")
+
+# Held while a line of progress is written, so lines from different threads don't interleave
+progressLock = threading.Lock()
+
+
+if orjson:
+    jsonBackend = "orjson"
+
+    def jsonLoads(text):
+        """Decode JSON text, which may be str or (UTF-8) bytes"""
+        return orjson.loads(text)
+
+    def jsonDumps(obj):
+        """Encode obj as compact JSON text"""
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+else:
+    jsonBackend = "json"
+    jsonLoads = json.loads
+    # json.dumps() with any arguments builds a new encoder on every call
+    jsonDumps = json.JSONEncoder(separators=(",", ":")).encode
+
+
+def yamlDump(data, stream=None, **kwargs):
+    """yaml.dump() with the fastest safe dumper available"""
+    return yaml.dump(data, stream, Dumper=yamlDumper, **kwargs)
+
+
+def yamlLoad(stream):
+    """yaml.safe_load() with the fastest safe loader available"""
+    return yaml.load(stream, Loader=yamlLoader)
+
+
+class streamRenderer:
+    """Prints a listing a batch of objects at a time, as the batches arrive (for instance one
+    app's snapshots at a time), rather than once every object is known.
+
+    output: ndjson: one compact JSON object per line
+            csv: a header row and one row per object, of columns
+            table: a grid, like tabulate's "grid" format, of columns.  The width of each
+                   column is set by the first batch with any objects in it (up to maxWidth).
+                   That width is a floor: a longer value later on is printed in full, pushing
+                   the rest of its row out of line rather than being cut short.
+            yaml: a multi-document YAML stream, one document per object
+    columns: (header, function returning the column's value for an object) for csv and table
+    ordered: when batches are written with a sequence number (see write()), print them in that
+             order, holding back any which arrive early.  With ordered=False they're printed
+             as they arrive.
+
+    with astraOutput.streamRenderer("table", columns) as renderer:
+        for app in apps:
+            renderer.write(listSnapshots(app))
+    """
+
+    # The widest a column is padded to
+    maxWidth = 60
+
+    def __init__(self, output, columns=None, out=None, ordered=True):
+        self.output = output
+        self.columns = columns or []
+        self.out = out or sys.stdout
+        self.ordered = ordered
+        self.pending = {}
+        self.nextSeq = 0
+        self.widths = None
+        self.count = 0
+        if output == "csv":
+            self.csvWriter = csv.writer(self.out, lineterminator="\n")
+            self.csvWriter.writerow([header for header, _ in self.columns])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, items, seq=None):
+        """Print a batch of objects.  seq is the batch's position (from 0) in the listing, and
+        only matters if batches may be written out of order."""
+        if seq is None or not self.ordered:
+            self.emit(items)
+            return
+        self.pending[seq] = items
+        while self.nextSeq in self.pending:
+            self.emit(self.pending.pop(self.nextSeq))
+            self.nextSeq += 1
+
+    def close(self):
+        """Print any batches still held back, then anything which ends the output"""
+        for seq in sorted(self.pending):
+            self.emit(self.pending.pop(seq))
+        if self.output == "table" and self.widths is None:
+            # Just the header, as tabulate prints for no rows
+            self.header([])
+        self.out.flush()
+
+    def cells(self, obj):
+        ret = []
+        for _, get in self.columns:
+            value = get(obj)
+            ret.append("" if value is None else value)
+        return ret
+
+    def border(self, char):
+        return "+" + "+".join(char * (width + 2) for width in self.widths) + "+\n"
+
+    def header(self, rows):
+        """Set the widths of the columns from rows, and print the header"""
+        self.widths = [
+            min(max([len(header)] + [len(str(row[i])) for row in rows]), self.maxWidth)
+            for i, (header, _) in enumerate(self.columns)
+        ]
+        self.out.write(self.border("-"))
+        self.out.write(self.tableRow([header for header, _ in self.columns]))
+        self.out.write(self.border("="))
+
+    def tableRow(self, cells):
+        text = []
+        for cell, width in zip(cells, self.widths):
+            value = str(cell)
+            if isinstance(cell, (int, float)) and not isinstance(cell, bool):
+                text.append(value.rjust(width))
+            else:
+                text.append(value.ljust(width))
+        return "| " + " | ".join(text) + " |\n"
+
+    def emit(self, items):
+        write = self.out.write
+        if self.output == "ndjson":
+            write("".join([jsonDumps(obj) + "\n" for obj in items]))
+        elif self.output == "csv":
+            self.csvWriter.writerows(self.cells(obj) for obj in items)
+        elif self.output == "yaml":
+            if items:
+                write(yaml.dump_all(items, Dumper=yamlDumper, explicit_start=True))
+        elif self.output == "table":
+            rows = [self.cells(obj) for obj in items]
+            if self.widths is None and rows:
+                # An empty batch (such as an app with no snapshots) says nothing of the widths
+                self.header(rows)
+            for row in rows:
+                write(self.tableRow(row))
+                write(self.border("-"))
+        else:
+            raise ValueError(f"{self.output} output can't be streamed")
+        self.count += len(items)
+        self.out.flush()
+
+
+def render(output, items, columns=None, out=None):
+    """Print items all at once with a streamRenderer"""
+    with streamRenderer(output, columns, out=out) as renderer:
+        renderer.write(items)
+
+
+def progress(line):
+    """Write a line of progress to stderr (so it doesn't get mixed into json or csv output) in
+    a single write, which can be called from any number of threads at once"""
+    with progressLock:
+        sys.stderr.write(line + "\n")
+        sys.stderr.flush()
+
+
+def stateCounts(items):
+    """How many of items are in each state, as "3 created, 1 failed" ("" for no items)"""
+    states = collections.Counter(item["state"] for item in items)
+    return ", ".join(f"{count} {state}" for state, count in states.items())
+
+
+def showResults(output, results, columns, summary=stateCounts):
+    """Print the results ({"items": [...], ...}) of a bulk operation, report or query in
+    output's format.
+
+    columns: (header, key) pairs, the fields of each item shown in table and stream formats,
+             where a key can also be a function of the item
+    summary: a function of the items returning the line printed below the table (or None for
+             no line), by default the count of items in each state, or None for no line at all
+    """
+    getters = [
+        (header, key if callable(key) else operator.itemgetter(key)) for header, key in columns
+    ]
+    if output in streamFormats:
+        render(output, results["items"], getters)
+    elif output == "json":
+        print(json.dumps(results))
+    elif output == "yaml":
+        print(yamlDump(results))
+    elif output == "table":
+        tabHeader = [header for header, _ in getters]
+        tabData = [[get(row) for _, get in getters] for row in results["items"]]
+        print(tabulate(tabData, tabHeader, tablefmt="grid"))
+        line = summary(results["items"]) if summary else None
+        if line is not None:
+            print(line)
+        print()
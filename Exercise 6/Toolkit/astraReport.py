@@ -0,0 +1,431 @@
+#!/usr/bin/env python
+"""
+   Copyright 2021 NetApp, Inc
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import time
+from array import array
+from termcolor import colored
+
+try:
+    from . import astraBulk
+    from . import astraInventory
+    from . import astraOutput
+    from . import astraSDK
+    from . import astraStore
+    from . import astraTime
+except ImportError:
+    import astraBulk
+    import astraInventory
+    import astraOutput
+    import astraSDK
+    import astraStore
+    import astraTime
+
+# NumPy (when it's installed) does each group-by over every snapshot and backup at once
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def intColumn(values):
+    """A column of ints: a NumPy int64 array if NumPy is installed, else an array of int64"""
+    if numpy is not None:
+        return numpy.array(values, dtype=numpy.int64)
+    return array("q", values)
+
+
+def groupStats(groups, epochs, count, since):
+    """For each of count groups, from columns of the group (0 to count - 1) and the epoch of
+    every point: the number of points, the latest epoch (-1 if there are none), and the
+    largest gap in seconds between consecutive points at or after since (0 if there are fewer
+    than two)"""
+    if numpy is not None:
+        counts = numpy.bincount(groups, minlength=count)
+        latest = numpy.full(count, -1, dtype=numpy.int64)
+        numpy.maximum.at(latest, groups, epochs)
+        gaps = numpy.zeros(count, dtype=numpy.int64)
+        recent = epochs >= since
+        recentGroups, recentEpochs = groups[recent], epochs[recent]
+        # Sorting by group, then epoch, puts each group's consecutive points side by side
+        order = numpy.lexsort((recentEpochs, recentGroups))
+        recentGroups, recentEpochs = recentGroups[order], recentEpochs[order]
+        same = recentGroups[1:] == recentGroups[:-1]
+        numpy.maximum.at(gaps, recentGroups[1:][same], numpy.diff(recentEpochs)[same])
+        return counts.tolist(), latest.tolist(), gaps.tolist()
+    counts = [0] * count
+    latest = [-1] * count
+    recent = [[] for _ in range(count)]
+    for group, epoch in zip(groups, epochs):
+        counts[group] += 1
+        if epoch > latest[group]:
+            latest[group] = epoch
+        if epoch >= since:
+            recent[group].append(epoch)
+    gaps = [0] * count
+    for group, points in enumerate(recent):
+        if len(points) > 1:
+            points.sort()
+            gaps[group] = max(b - a for a, b in zip(points, points[1:]))
+    return counts, latest, gaps
+
+
+def hourHistogram(groups, epochs, count):
+    """For each of count groups, the number of its points in each hour of the day (UTC), as a
+    list of 24 counts"""
+    if numpy is not None:
+        cells = groups * 24 + (epochs // 3600) % 24
+        return numpy.bincount(cells, minlength=count * 24).reshape(count, 24).tolist()
+    hist = [[0] * 24 for _ in range(count)]
+    for group, epoch in zip(groups, epochs):
+        hist[group][epoch // 3600 % 24] += 1
+    return hist
+
+
+class rpoReport:
+    """The recovery point objective (RPO) each app is actually getting: how long ago its
+    latest completed snapshot and backup were taken, the longest stretch without either over
+    a recent window, how many of each it has, and at what hours of the day its backups run.
+
+    Every completed snapshot and backup of the report's apps is loaded into columns of (app,
+    creation epoch), and the figures for every app are worked out with a handful of group-bys
+    over those columns, vectorized with NumPy when it's installed, rather than by walking each
+    app's snapshots and backups in turn.
+
+    The objects come from an astraInventory.inventory (by default the shared one, which
+    fetches them from Astra Control), or, given database, a local astraStore SQLite file,
+    which takes no API calls at all.
+
+    report = astraReport.rpoReport()
+    report.main(target=24, window=7)
+    report.main(cluster="prod-east", hours=True)
+    """
+
+    # header, key of each app's row
+    columns = (
+        ("appName", "appName"),
+        ("appID", "appID"),
+        ("clusterName", "clusterName"),
+        ("snapshots", "snapshots"),
+        ("backups", "backups"),
+        ("lastSnapshot", "lastSnapshot"),
+        ("lastBackup", "lastBackup"),
+        ("rpoHours", "rpoHours"),
+        ("maxGapHours", "maxGapHours"),
+        ("compliant", "compliant"),
+    )
+    hourColumns = (
+        ("hour", "hour"),
+        ("snapshots", "snapshots"),
+        ("backups", "backups"),
+        ("appsBackedUp", "appsBackedUp"),
+    )
+
+    def __init__(self, inventory=None, database=None, quiet=True, verbose=False, output="json"):
+        """inventory: the astraInventory.inventory to report on (default: the shared one)
+        database: report on this astraStore SQLite file (see toolkit.py sync) instead
+        quiet: Will there be CLI output or just return (datastructure)
+        verbose: Print how long loading and working out the figures took
+        output: table: pretty print the data
+                json: (default) output in JSON
+                yaml: output in yaml
+                ndjson: one line of JSON per row
+                csv: comma separated values"""
+        self.inventory = inventory
+        self.database = database
+        self.quiet = quiet
+        self.verbose = verbose
+        self.output = output
+
+    def loadInventory(self):
+        """The inventory holding the apps, snapshots and backups, or False on failure"""
+        kinds = ("apps", "snapshots", "backups")
+        if self.database is not None:
+            inv = astraInventory.inventory()
+            astraStore.inventoryStore(self.database).loadInventory(inv, kinds)
+            return inv
+        inv = self.inventory or astraInventory.getInventory()
+        for kind in kinds:
+            if not inv.ensure(kind):
+                return False
+        return inv
+
+    @staticmethod
+    def points(inv, kind, appIndex):
+        """Columns of (position in appIndex, creation epoch) of kind's completed objects which
+        belong to one of appIndex's apps"""
+        groups = []
+        epochs = []
+        for obj in inv.find(kind, state="completed"):
+            group = appIndex.get(obj.appID)
+            if group is not None and obj.createdEpoch is not None:
+                groups.append(group)
+                epochs.append(obj.createdEpoch)
+        return intColumn(groups), intColumn(epochs)
+
+    def main(self, cluster=None, target=24, window=7, hours=False, now=None):
+        """cluster: only report on the apps of this cluster (name or ID)
+        target: the RPO in hours each app's latest snapshot or backup must be within
+        window: the number of days to look for gaps between snapshots and backups over
+        hours: rather than a row per app, a row per hour of the day (UTC), of the fleet's
+               snapshots and backups, and how many apps are backed up during it
+        now: the epoch to measure from, by default the time of the call"""
+        start = time.perf_counter()
+        inv = self.loadInventory()
+        if inv is False:
+            if not self.quiet:
+                print("Failed to load the apps, snapshots and backups")
+            return False
+        apps = [
+            app
+            for app in inv.find("apps")
+            if cluster is None or cluster in (app.clusterID, app.clusterName)
+        ]
+        appIndex = {app.id: group for group, app in enumerate(apps)}
+        snapGroups, snapEpochs = self.points(inv, "snapshots", appIndex)
+        backupGroups, backupEpochs = self.points(inv, "backups", appIndex)
+        loaded = time.perf_counter()
+
+        if hours:
+            results = self.hourRows(len(apps), snapGroups, snapEpochs, backupGroups, backupEpochs)
+            columns = self.hourColumns
+        else:
+            results = self.appRows(
+                apps, snapGroups, snapEpochs, backupGroups, backupEpochs, target, window, now
+            )
+            columns = self.columns
+        if self.verbose:
+            print(
+                colored(
+                    f"report: {len(apps)} apps, {len(snapEpochs)} snapshots and "
+                    f"{len(backupEpochs)} backups loaded in {loaded - start:.3f}s, figures "
+                    f"worked out in {time.perf_counter() - loaded:.3f}s "
+                    f"({'numpy' if numpy is not None else 'pure Python'})",
+                    "green",
+                )
+            )
+        if not self.quiet:
+            self.show(results, columns)
+        return results
+
+    @staticmethod
+    def appRows(apps, snapGroups, snapEpochs, backupGroups, backupEpochs, target, window, now):
+        if now is None:
+            now = astraTime.currentEpoch()
+        since = now - window * 86400
+        count = len(apps)
+        snapCounts, snapLatest, _ = groupStats(snapGroups, snapEpochs, count, since)
+        backupCounts, backupLatest, _ = groupStats(backupGroups, backupEpochs, count, since)
+        # Gaps are between recovery points of either kind
+        if numpy is not None:
+            bothGroups = numpy.concatenate((snapGroups, backupGroups))
+            bothEpochs = numpy.concatenate((snapEpochs, backupEpochs))
+        else:
+            bothGroups, bothEpochs = snapGroups + backupGroups, snapEpochs + backupEpochs
+        _, latest, gaps = groupStats(bothGroups, bothEpochs, count, since)
+        backupHours = hourHistogram(backupGroups, backupEpochs, count)
+
+        rows = []
+        for group, app in enumerate(apps):
+            if latest[group] < 0:
+                rpo = maxGap = None
+            else:
+                rpo = now - latest[group]
+                # The current stretch since the latest recovery point counts as a gap too
+                maxGap = max(gaps[group], rpo)
+            rows.append(
+                {
+                    "appName": app.name,
+                    "appID": app.id,
+                    "clusterName": app.clusterName,
+                    "snapshots": snapCounts[group],
+                    "backups": backupCounts[group],
+                    "lastSnapshot": timestamp(snapLatest[group]),
+                    "lastBackup": timestamp(backupLatest[group]),
+                    "rpoHours": None if rpo is None else round(rpo / 3600, 1),
+                    "maxGapHours": None if maxGap is None else round(maxGap / 3600, 1),
+                    "compliant": rpo is not None and rpo <= target * 3600,
+                    "backupHours": backupHours[group],
+                }
+            )
+        # Worst first: apps never protected, then the longest since their latest recovery point
+        order = sorted(range(count), key=latest.__getitem__)
+        compliant = sum(row["compliant"] for row in rows)
+        return {
+            "items": [rows[group] for group in order],
+            "summary": {
+                "apps": count,
+                "compliant": compliant,
+                "unprotected": sum(1 for epoch in latest if epoch < 0),
+                "coverage": round(100 * compliant / count, 1) if count else None,
+                "targetHours": target,
+                "windowDays": window,
+            },
+        }
+
+    @staticmethod
+    def hourRows(count, snapGroups, snapEpochs, backupGroups, backupEpochs):
+        snapHours = hourHistogram(snapGroups, snapEpochs, count)
+        backupHours = hourHistogram(backupGroups, backupEpochs, count)
+        return {
+            "items": [
+                {
+                    "hour": hour,
+                    "snapshots": sum(appHours[hour] for appHours in snapHours),
+                    "backups": sum(appHours[hour] for appHours in backupHours),
+                    "appsBackedUp": sum(1 for appHours in backupHours if appHours[hour]),
+                }
+                for hour in range(24)
+            ]
+        }
+
+    def show(self, results, columns):
+        summary = results.get("summary")
+        astraOutput.showResults(
+            self.output, results, columns, lambda items: self.summaryLine(summary)
+        )
+
+    @staticmethod
+    def summaryLine(summary):
+        """The line below the table, of how many apps are within the target, if there are any"""
+        if not summary or not summary["apps"]:
+            return None
+        return (
+            f"{summary['compliant']} of {summary['apps']} apps ({summary['coverage']}%) "
+            f"have a recovery point within {summary['targetHours']:g}h, "
+            f"{summary['unprotected']} have none at all"
+        )
+
+
+class scheduleLoadReport:
+    """How many of the fleet's schedules (protection policies) start at each minute, which
+    shows whether snapshots and backups are bunched together, such as when every app has
+    schedules on the hour.
+
+    By default there's a row for each minute of the hour, counting each schedule once at the
+    minute it starts at (an hourly schedule's minute, or the minute of a daily, weekly or
+    monthly schedule's hour).  With day, there's a row for each minute of the day at which any
+    schedule starts, and an hourly schedule counts at each of its 24 starts.  Disabled
+    schedules aren't counted.
+
+    Each app's schedules take an API call, up to concurrency of them at once.
+
+    report = astraReport.scheduleLoadReport()
+    report.main(cluster="prod-east")
+    """
+
+    columns = (
+        ("start", "start"),
+        ("hourly", "hourly"),
+        ("daily", "daily"),
+        ("weekly", "weekly"),
+        ("monthly", "monthly"),
+        ("total", "total"),
+    )
+
+    def __init__(self, quiet=True, verbose=False, output="json", concurrency=8):
+        """quiet: Will there be CLI output or just return (datastructure)
+        verbose: Print all of the ReST call info: URL, Method, Headers, Request Body
+        output: table: pretty print the data
+                json: (default) output in JSON
+                yaml: output in yaml
+                ndjson: one line of JSON per row
+                csv: comma separated values
+        concurrency: the most apps to list the schedules of at once"""
+        self.quiet = quiet
+        self.verbose = verbose
+        self.output = output
+        self.concurrency = concurrency
+
+    def main(self, cluster=None, day=False):
+        """cluster: only report on the apps of this cluster (name or ID)
+        day: a row for each minute of the day schedules start at, rather than of the hour"""
+        apps = astraSDK.getApps(verbose=self.verbose).main()
+        if apps is False:
+            if not self.quiet:
+                print("astraSDK.getApps() failed")
+            return False
+        apps = [
+            app
+            for app in apps["items"]
+            if cluster is None or cluster in (app.get("clusterID"), app.get("clusterName"))
+        ]
+        listed = astraBulk.scheduleLister(self.verbose).many(apps, self.concurrency)
+        slots = 1440 if day else 60
+        counts = [dict.fromkeys(astraBulk.granularities, 0) for _ in range(slots)]
+        schedules = 0
+        for current in listed.values():
+            for schedule in current or ():
+                granularity = schedule.get("granularity")
+                if granularity not in astraBulk.granularities:
+                    continue
+                if str(schedule.get("enabled", "true")).lower() != "true":
+                    continue
+                minutes = astraBulk.scheduleMinutes(schedule)
+                if not day:
+                    minutes = minutes[:1]
+                for minute in minutes:
+                    counts[minute % slots][granularity] += 1
+                schedules += 1
+        rows = []
+        for slot, slotCounts in enumerate(counts):
+            total = sum(slotCounts.values())
+            if day and not total:
+                continue
+            start = f"{slot // 60:02d}:{slot % 60:02d}" if day else f":{slot:02d}"
+            rows.append(dict(slotCounts, start=start, total=total))
+        peak = max(rows, key=lambda row: row["total"], default=None)
+        results = {
+            "items": rows,
+            "summary": {
+                "apps": len(apps),
+                "unlisted": sum(1 for current in listed.values() if current is None),
+                "schedules": schedules,
+                "minutesUsed": sum(1 for row in rows if row["total"]),
+                "peak": peak["total"] if peak else 0,
+                "peakStart": peak["start"] if peak and peak["total"] else None,
+            },
+        }
+        if not self.quiet:
+            self.show(results)
+        return results
+
+    def show(self, results):
+        summary = results["summary"]
+        columns = self.columns
+        if self.output == "table":
+            # A bar of up to 40 #s for each row's total, the histogram at a glance
+            peak = summary["peak"]
+            columns += (("load", lambda row: "#" * (-(-40 * row["total"] // peak) if peak else 0)),)
+        astraOutput.showResults(
+            self.output, results, columns, lambda items: self.summaryLine(summary)
+        )
+
+    @staticmethod
+    def summaryLine(summary):
+        """The line below the table, of how bunched together the schedules' starts are"""
+        if not summary["peakStart"]:
+            return None
+        return (
+            f"{summary['schedules']} schedules of {summary['apps']} apps start at "
+            f"{summary['minutesUsed']} different times, at most {summary['peak']} at "
+            f"{summary['peakStart']}"
+        )
+
+
+def timestamp(epoch):
+    """An epoch (-1 for none) as an API timestamp, or None"""
+    return None if epoch < 0 else astraTime.formatTimestamp(epoch)
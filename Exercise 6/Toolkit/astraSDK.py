@@ -15,9 +15,16 @@
    limitations under the License.
 """
 
+import atexit
+import collections
+import email.utils
+import gzip
 import inspect
 import os
 import sys
+import threading
+import time
+import uuid
 import yaml
 import json
 import copy
@@ -25,7 +32,15 @@ from tabulate import tabulate
 from termcolor import colored
 import requests
 from urllib3 import disable_warnings
-from datetime import datetime, timedelta
+
+try:
+    from . import astraFilter
+    from . import astraOutput
+    from . import astraTime
+except ImportError:
+    import astraFilter
+    import astraOutput
+    import astraTime
 
 
 class getConfig:
@@ -55,7 +70,7 @@ class getConfig:
             try:
                 if os.path.isfile(configFile):
                     with open(configFile, "r") as f:
-                        self.conf = yaml.safe_load(f)
+                        self.conf = astraOutput.yamlLoad(f)
                         break
             except IOError:
                 continue
@@ -74,7 +89,13 @@ class getConfig:
                 print(f"{item} is a required field in {configFile}")
                 sys.exit(3)
 
-        if "." in self.conf.get("astra_project"):
+        if self.conf.get("astra_project").startswith(("http://", "https://")):
+            # A full URL (such as a local astraMock.py server) is used as-is
+            self.base = "%s/accounts/%s/" % (
+                self.conf.get("astra_project").rstrip("/"),
+                self.conf.get("uid"),
+            )
+        elif "." in self.conf.get("astra_project"):
             self.base = "https://%s/accounts/%s/" % (
                 self.conf.get("astra_project"),
                 self.conf.get("uid"),
@@ -100,44 +121,369 @@ class getConfig:
         }
 
 
+class cassette:
+    """Records the request/response pairs that pass through SDKCommon.apicall() into a
+    gzip compressed file of JSON lines, or replays them from such a file with no network
+    access at all.  This makes it possible to benchmark the SDK or toolkit against identical
+    traffic across versions.
+
+    It's enabled with shell env vars (so it works for toolkit.py as well as SDK users):
+    ASTRATOOLKITS_RECORD: path of the cassette file to record into
+    ASTRATOOLKITS_REPLAY: path of the cassette file to replay from
+    ASTRATOOLKITS_REPLAY_SPEED: multiplier applied to the recorded latency of each call,
+                                1 (the default) replays in real time, 0 as fast as possible
+
+    Calls are matched on method, URL (relative to the account base URL), params and body.
+    Repeated identical calls (like polling for a snapshot to complete) are served back in the
+    order they were recorded, with the last recording repeated once they run out."""
+
+    def __init__(self, path, mode, speed=1.0):
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self.lock = threading.Lock()
+        if mode == "record":
+            self.file = gzip.open(path, "at", encoding="utf-8")
+            atexit.register(self.file.close)
+        elif mode == "replay":
+            self.calls = collections.defaultdict(collections.deque)
+            self.fallback = collections.defaultdict(collections.deque)
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    record = astraOutput.jsonLoads(line)
+                    self.calls[self.key(record, True)].append(record)
+                    self.fallback[self.key(record, False)].append(record)
+        else:
+            raise ValueError(f"unknown cassette mode: {mode}")
+
+    @classmethod
+    def fromEnv(cls):
+        if os.environ.get("ASTRATOOLKITS_REPLAY"):
+            return cls(
+                os.environ["ASTRATOOLKITS_REPLAY"],
+                "replay",
+                float(os.environ.get("ASTRATOOLKITS_REPLAY_SPEED", 1)),
+            )
+        elif os.environ.get("ASTRATOOLKITS_RECORD"):
+            return cls(os.environ["ASTRATOOLKITS_RECORD"], "record")
+        return None
+
+    @staticmethod
+    def key(record, withData):
+        key = (record["method"], record["endpoint"], json.dumps(record["params"], sort_keys=True))
+        if withData:
+            key += (json.dumps(record["data"], sort_keys=True),)
+        return key
+
+    def record(self, method, endpoint, data, params, ret, elapsed, error=None):
+        record = {
+            "method": method,
+            "endpoint": endpoint,
+            "params": params,
+            "data": data,
+            "elapsed": round(elapsed, 4),
+        }
+        if error:
+            record["error"] = error
+        else:
+            record["status"] = ret.status_code
+            record["reason"] = ret.reason
+            record["headers"] = {
+                k: v for k, v in ret.headers.items() if k.lower() in ("content-type", "retry-after")
+            }
+            record["body"] = ret.text
+        with self.lock:
+            self.file.write(astraOutput.jsonDumps(record) + "\n")
+            self.file.flush()
+
+    def replay(self, method, url, endpoint, data, params):
+        """Return a requests.Response built from the matching recording"""
+        request = {"method": method, "endpoint": endpoint, "params": params, "data": data}
+        with self.lock:
+            for calls in (self.calls, self.fallback):
+                queue = calls.get(self.key(request, calls is self.calls))
+                if queue:
+                    record = queue.popleft() if len(queue) > 1 else queue[0]
+                    break
+            else:
+                raise SystemExit(f"{method.upper()} {endpoint} not found in cassette {self.path}")
+        if self.speed:
+            time.sleep(record["elapsed"] * self.speed)
+        if record.get("error"):
+            raise SystemExit(record["error"])
+        ret = requests.models.Response()
+        ret.status_code = record["status"]
+        ret.reason = record["reason"]
+        ret.headers = requests.structures.CaseInsensitiveDict(record["headers"])
+        ret._content = record["body"].encode("utf-8")
+        ret.encoding = "utf-8"
+        ret.url = url
+        return ret
+
+
 class SDKCommon:
+    # Shared by every SDKCommon child, loaded on first use from cassette.fromEnv()
+    cassette = None
+    cassetteLoaded = False
+    # Fields of a list class's objects the API can filter on, see filterParams()
+    filterFields = ()
+    # A list class's (header, function of an object) columns for csv and streamed table output
+    streamColumns = ()
+    # Set by the toolkit's --stream argument, to print table and yaml output row by row as it
+    # arrives too (ndjson and csv output always is)
+    stream = False
+    # Set by the toolkit's --postTimeout and --postRetries arguments: seconds to wait for the
+    # response to a POST which creates an object, and how many more times to try one which
+    # times out or fails with a transient error, see createObject()
+    postTimeout = 120
+    postRetries = 2
+    # Statuses of a POST which wasn't carried out, and of one (from a gateway) which may have been
+    retryStatuses = (429, 503)
+    uncertainStatuses = (502, 504)
+    # The label which carries the idempotency key of an object created by createObject()
+    idempotencyLabel = "actoolkit/idempotencyKey"
+    # Set once an object created by createObject() comes back without its idempotencyLabel:
+    # only then does findCreated() take an unlabeled object of the right name and age as ours
+    dropsLabels = False
+    # Seconds the server's clock may be behind ours, when matching objects by creation time
+    clockSkew = 60
+
     def __init__(self):
         self.conf = getConfig().main()
         self.base = self.conf.get("base")
         self.headers = self.conf.get("headers")
         self.verifySSL = self.conf.get("verifySSL")
-
-    def apicall(self, method, url, data, headers, params, verify, quiet=False):
-        """Make a call using the requests module.
-        method can be get, put, post, patch, or delete"""
+        if not SDKCommon.cassetteLoaded:
+            SDKCommon.cassette = cassette.fromEnv()
+            SDKCommon.cassetteLoaded = True
+
+    def send(self, method, url, data, headers, params, verify, timeout=None):
+        """Make a call using the requests module, raising its exceptions (such as a Timeout)
+        rather than exiting.  method can be get, put, post, patch, or delete"""
+        endpoint = url[len(self.base) :] if url.startswith(self.base) else url
+        if self.cassette and self.cassette.mode == "replay":
+            return self.cassette.replay(method, url, endpoint, data, params)
         try:
             r = getattr(requests, method)
         except AttributeError as e:
             raise SystemExit(e)
+        start = time.perf_counter()
         try:
-            ret = r(url, json=data, headers=headers, params=params, verify=verify)
+            ret = r(url, json=data, headers=headers, params=params, verify=verify, timeout=timeout)
+        except requests.exceptions.RequestException as e:
+            if self.cassette:
+                self.cassette.record(
+                    method, endpoint, data, params, None, time.perf_counter() - start, str(e)
+                )
+            raise
+        if self.cassette:
+            self.cassette.record(method, endpoint, data, params, ret, time.perf_counter() - start)
+        return ret
+
+    def apicall(self, method, url, data, headers, params, verify, quiet=False):
+        """Make a call using the requests module.
+        method can be get, put, post, patch, or delete"""
+        try:
+            ret = self.send(method, url, data, headers, params, verify)
         except requests.exceptions.RequestException as e:
             raise SystemExit(e)
         if not ret.ok and not quiet:
-            if ret.status_code >= 400 and ret.status_code < 500:
-                if "x-pcloud-accountid" in ret.text:
-                    print("preflight API call to Astra Control failed (check uid in config.json)")
-                elif ret.status_code == 401:
-                    print(
-                        "preflight API call to Astra Control failed "
-                        "(check Authoriztion in config.json)"
-                    )
-                print(f"API HTTP Status Code: {ret.status_code} - {ret.reason}")
-                print(f"text: {ret.text}")
-            else:
-                print("preflight API call to Astra Control failed (Internal Server Error)")
-                print(f"API HTTP Status Code: {ret.status_code} - {ret.reason}")
-                print(f"text: {ret.text}")
+            self.printFailure(ret)
         return ret
 
+    def printFailure(self, ret):
+        """Print why a call failed"""
+        if ret.status_code >= 400 and ret.status_code < 500:
+            if "x-pcloud-accountid" in ret.text:
+                print("preflight API call to Astra Control failed (check uid in config.json)")
+            elif ret.status_code == 401:
+                print(
+                    "preflight API call to Astra Control failed "
+                    "(check Authoriztion in config.json)"
+                )
+            print(f"API HTTP Status Code: {ret.status_code} - {ret.reason}")
+            print(f"text: {ret.text}")
+        else:
+            print("preflight API call to Astra Control failed (Internal Server Error)")
+            print(f"API HTTP Status Code: {ret.status_code} - {ret.reason}")
+            print(f"text: {ret.text}")
+
+    def createObject(self, url, data, headers, listUrl=None, quiet=False):
+        """POST data to url to create an object, in such a way that it can be tried again
+        without the risk of creating the object twice.
+
+        The request carries a client generated idempotency key, both as an Idempotency-Key
+        header (for servers which honour one) and as the idempotencyLabel of the object.  A POST
+        which times out (after postTimeout seconds), loses its connection or is answered with
+        one of uncertainStatuses may or may not have created the object, so before it's made
+        again, listUrl (by default url) is checked for an object of the same name created with
+        the key (see findCreated()), which is returned instead.  A POST answered with one of
+        retryStatuses didn't create anything, and is simply made again.  Either way, it's tried
+        up to postRetries more times, waiting as long as the response's Retry-After asks, or
+        otherwise a little longer each time (see retryDelay()).  A POST whose last attempt
+        failed without a response, or whose outcome can't be checked, exits with the error.
+
+        Returns the requests response, of the POST or (for an object which had been created
+        already) one built from the object found."""
+        key = str(uuid.uuid4())
+        data = copy.deepcopy(data)
+        data.setdefault("metadata", {}).setdefault("labels", []).append(
+            {"name": self.idempotencyLabel, "value": key}
+        )
+        headers = dict(headers)
+        headers["Idempotency-Key"] = key
+        started = astraTime.currentEpoch()
+        uncertain = False
+        error = None
+        ret = None
+        for attempt in range(self.postRetries + 1):
+            if attempt:
+                time.sleep(self.retryDelay(ret, attempt))
+            if uncertain:
+                found = self.findCreated(listUrl or url, headers, data["name"], key, started)
+                if found is False:
+                    raise SystemExit(error)
+                if found is not None:
+                    ret = requests.models.Response()
+                    ret.status_code = 200
+                    ret.reason = "OK"
+                    ret._content = astraOutput.jsonDumps(found).encode("utf-8")
+                    ret.encoding = "utf-8"
+                    ret.url = url
+                    return ret
+            try:
+                ret = self.send("post", url, data, headers, {}, self.verifySSL, self.postTimeout)
+            except requests.exceptions.RequestException as e:
+                error, uncertain, ret = e, True, None
+                if attempt == self.postRetries:
+                    raise SystemExit(error)
+                if not quiet:
+                    print(f"{e}, checking whether {data['name']} was created", file=sys.stderr)
+                continue
+            uncertain = ret.status_code in self.uncertainStatuses
+            if ret.status_code not in self.retryStatuses and not uncertain:
+                break
+            error = f"API HTTP Status Code: {ret.status_code} - {ret.reason}"
+        if ret.ok and not SDKCommon.dropsLabels:
+            try:
+                created = astraOutput.jsonLoads(ret.content)
+            except ValueError:
+                created = None
+            if isinstance(created, dict) and isinstance(created.get("metadata"), dict):
+                labels = created["metadata"].get("labels", [])
+                if not any(label.get("value") == key for label in labels):
+                    SDKCommon.dropsLabels = True
+        if not ret.ok and not quiet:
+            self.printFailure(ret)
+        return ret
+
+    @staticmethod
+    def retryDelay(ret, attempt):
+        """Seconds to wait before the attempt'th retry of a request whose last response was ret
+        (None if it had none): its Retry-After (in seconds or as an HTTP date) if it has one,
+        otherwise an exponential backoff of up to 10 seconds"""
+        retryAfter = None if ret is None else ret.headers.get("Retry-After")
+        if retryAfter:
+            try:
+                return max(float(retryAfter), 0)
+            except ValueError:
+                pass
+            try:
+                when = email.utils.parsedate_to_datetime(retryAfter)
+            except (TypeError, ValueError):
+                when = None
+            if when is not None and when.tzinfo is not None:
+                return max(when.timestamp() - time.time(), 0)
+        return min(2 ** (attempt - 1), 10)
+
+    def findCreated(self, listUrl, headers, name, key, since):
+        """The object named name in the listing at listUrl which was created by a POST with the
+        idempotency key (or, once the server is known to drop the labels it's given, see
+        dropsLabels, the one of that name without a key created since the epoch since), None
+        if there isn't one, or False if the listing failed.  Until then an object without a key
+        may have been made by anyone, such as a concurrent run, so it isn't taken as ours."""
+        params = {"filter": f"name eq '{name}'"}
+        headers = {k: v for k, v in headers.items() if k not in ("Content-Type", "Idempotency-Key")}
+        try:
+            ret = self.send("get", listUrl, {}, headers, params, self.verifySSL, self.postTimeout)
+            if ret.status_code == 400:
+                # The server rejected the filter, the name is matched below anyway
+                ret = self.send("get", listUrl, {}, headers, {}, self.verifySSL, self.postTimeout)
+        except requests.exceptions.RequestException:
+            return False
+        results = self.jsonifyResults(ret) if ret.ok else None
+        if not isinstance(results, dict):
+            return False
+        for item in results.get("items", []):
+            if not isinstance(item, dict) or item.get("name") != name:
+                continue
+            labels = {
+                label.get("name"): label.get("value")
+                for label in item.get("metadata", {}).get("labels", [])
+            }
+            if self.idempotencyLabel in labels:
+                if labels[self.idempotencyLabel] == key:
+                    return item
+            elif self.dropsLabels:
+                created = astraTime.parseTimestamp(
+                    item.get("metadata", {}).get("creationTimestamp")
+                )
+                if created is not None and created >= since - self.clockSkew:
+                    return item
+        return None
+
+    def filterParams(self, where):
+        """The params which push the simple terms of where (an astraFilter expression) down to
+        the server, so that it returns fewer objects.
+
+        Every list class's main() takes the same three arguments:
+        where: an astraFilter expression (such as "state=ready and age<2h") objects must match.
+               The terms on the class's filterFields are filtered by the server as well.
+        sortBy: comma separated fields to sort by, each descending if suffixed with ":desc"
+        limit: the maximum number of objects to return"""
+        if where is None:
+            return {}
+        serverFilter = astraFilter.compileFilter(where).serverFilter(self.filterFields)
+        return {"filter": serverFilter} if serverFilter else {}
+
+    def getList(self, url, data, params):
+        """GET a list endpoint.  If the server rejects a filter param from filterParams(), it's
+        dropped and the call made again, as the results are always filtered client side too."""
+        if not params.get("filter"):
+            return self.apicall("get", url, data, self.headers, params, self.verifySSL)
+        ret = self.apicall("get", url, data, self.headers, params, self.verifySSL, quiet=True)
+        if ret.status_code == 400:
+            params.pop("filter")
+            ret = self.apicall("get", url, data, self.headers, params, self.verifySSL)
+        return ret
+
+    def streams(self):
+        """Whether a list class's output is printed by an astraOutput.streamRenderer"""
+        return self.output in astraOutput.streamFormats or (
+            self.stream and self.output in ("table", "yaml")
+        )
+
+    def streamer(self, sortBy=None):
+        """An astraOutput.streamRenderer for a list class to write each batch of objects to as
+        it arrives, or None if they can't be printed until they're all known (as they have to
+        be sorted, or the output isn't streamed at all)"""
+        if self.quiet or sortBy or not self.streams():
+            return None
+        return astraOutput.streamRenderer(self.output, self.streamColumns)
+
+    def streamItems(self, renderer, items):
+        """Finish a list class's streamed output: close the renderer if there was one, otherwise
+        print all of items now"""
+        if self.quiet:
+            return
+        if renderer:
+            renderer.close()
+        else:
+            astraOutput.render(self.output, items, self.streamColumns)
+
     def jsonifyResults(self, requestsObject):
         try:
-            results = requestsObject.json()
+            results = astraOutput.jsonLoads(requestsObject.content)
         except ValueError as e:
             print(f"response contained invalid JSON: {e}")
             results = None
@@ -153,12 +499,23 @@ class getApps(SDKCommon):
     Therefore this class cannot list all of the managed and unmanaged apps.
     """
 
+    filterFields = ("name", "state", "protectionState", "clusterName", "clusterID", "clusterType")
+    streamColumns = (
+        ("appName", lambda app: app["name"]),
+        ("appID", lambda app: app["id"]),
+        ("clusterName", lambda app: app["clusterName"]),
+        ("namespace", lambda app: ", ".join(app["namespaces"])),
+        ("state", lambda app: app["state"]),
+    )
+
     def __init__(self, quiet=True, verbose=False, output="json"):
         """quiet: Will there be CLI output or just return (datastructure)
         verbose: Print all of the ReST call info: URL, Method, Headers, Request Body
         output: table: pretty print the data
                 json: (default) output in JSON
-                yaml: output in yaml"""
+                yaml: output in yaml
+                ndjson: one line of JSON per object, printed as it arrives
+                csv: comma separated values, printed as they arrive"""
         self.quiet = quiet
         self.verbose = verbose
         self.output = output
@@ -168,12 +525,18 @@ class getApps(SDKCommon):
         self,
         namespace=None,
         cluster=None,
+        where=None,
+        sortBy=None,
+        limit=None,
     ):
         """namespace: Filter by the namespace the app is in
-        cluster: Filter by a specific k8s cluster"""
+        cluster: Filter by a specific k8s cluster
+        where, sortBy, limit: see SDKCommon.filterParams(), the server filters on name, state,
+                              protectionState, clusterName, clusterID and clusterType"""
 
         endpoint = "k8s/v2/apps"
-        params = {}
+        where = astraFilter.compileFilter(where)
+        params = super().filterParams(where)
         url = self.base + endpoint
         data = {}
 
@@ -184,7 +547,7 @@ class getApps(SDKCommon):
             print(colored(f"API data: {data}", "green"))
             print(colored(f"API params: {params}", "green"))
 
-        ret = super().apicall("get", url, data, self.headers, params, self.verifySSL)
+        ret = super().getList(url, data, params)
 
         if self.verbose:
             print(f"API HTTP Status Code: {ret.status_code}")
@@ -254,11 +617,16 @@ class getApps(SDKCommon):
                         appsCooked["items"].remove(apps["items"][counter])
                 elif cluster and cluster != app["clusterName"]:
                     appsCooked["items"].remove(apps["items"][counter])
+            appsCooked["items"] = astraFilter.select(appsCooked["items"], where, sortBy, limit)
+
+            if super().streams():
+                super().streamItems(None, appsCooked["items"])
+                return appsCooked
 
             if self.output == "json":
                 dataReturn = appsCooked
             elif self.output == "yaml":
-                dataReturn = yaml.dump(appsCooked)
+                dataReturn = astraOutput.yamlDump(appsCooked)
             elif self.output == "table":
                 tabHeader = [
                     "appName",
@@ -299,19 +667,31 @@ class getBackups(SDKCommon):
     for that app.
     """
 
+    filterFields = ("name", "state")
+    streamColumns = (
+        ("AppID", lambda backup: backup["appID"]),
+        ("backupName", lambda backup: backup["name"]),
+        ("backupID", lambda backup: backup["id"]),
+        ("backupState", lambda backup: backup["state"]),
+    )
+
     def __init__(self, quiet=True, verbose=False, output="json"):
         """quiet: Will there be CLI output or just return (datastructure)
         verbose: Print all of the ReST call info: URL, Method, Headers, Request Body
         output: table: pretty print the data
                 json: (default) output in JSON
-                yaml: output in yaml"""
+                yaml: output in yaml
+                ndjson: one line of JSON per object, printed as it arrives
+                csv: comma separated values, printed as they arrive"""
         self.quiet = quiet
         self.verbose = verbose
         self.output = output
         super().__init__()
         self.apps = getApps().main()
 
-    def main(self, appFilter=None):
+    def main(self, appFilter=None, where=None, sortBy=None, limit=None):
+        """appFilter: Filter by the name or ID of the app
+        where, sortBy, limit: see SDKCommon.filterParams(), the server filters on name and state"""
         if self.apps is False:
             print("Call to getApps().main() failed")
             return False
@@ -332,9 +712,8 @@ class getBackups(SDKCommon):
         """
         backups = {}
         backups["items"] = []
-        if self.output == "table":
-            globaltabHeader = ["AppID", "backupName", "backupID", "backupState"]
-            globaltabData = []
+        where = astraFilter.compileFilter(where)
+        renderer = super().streamer(sortBy)
 
         for app in self.apps["items"]:
             if appFilter:
@@ -344,7 +723,7 @@ class getBackups(SDKCommon):
             url = self.base + endpoint
 
             data = {}
-            params = {}
+            params = super().filterParams(where)
 
             if self.verbose:
                 print(f"Listing Backups for {app['id']} {app['name']}")
@@ -354,7 +733,7 @@ class getBackups(SDKCommon):
                 print(colored(f"API data: {data}", "green"))
                 print(colored(f"API params: {params}", "green"))
 
-            ret = super().apicall("get", url, data, self.headers, params, self.verifySSL)
+            ret = super().getList(url, data, params)
 
             if self.verbose:
                 print(f"API HTTP Status Code: {ret.status_code}")
@@ -379,7 +758,10 @@ class getBackups(SDKCommon):
                     # Adding custom 'appID' key/value pair
                     if not item.get("appID"):
                         item["appID"] = app["id"]
-                    backups["items"].append(item)
+                batch = astraFilter.select(results["items"], where)
+                backups["items"] += batch
+                if renderer:
+                    renderer.write(batch[: None if limit is None else limit - renderer.count])
                 if self.output == "table":
                     tabHeader = ["backupName", "backupID", "backupState"]
                     tabData = []
@@ -391,30 +773,40 @@ class getBackups(SDKCommon):
                                 backup["state"],
                             ]
                         )
-                        globaltabData.append(
-                            [
-                                app["id"],
-                                backup["name"],
-                                backup["id"],
-                                backup["state"],
-                            ]
-                        )
                 if not self.quiet and self.verbose:
                     print(f"Backups for {app['id']}")
                     if self.output == "json":
                         print(json.dumps(results))
                     elif self.output == "yaml":
-                        print(yaml.dump(results))
+                        print(astraOutput.yamlDump(results))
                     elif self.output == "table":
                         print(tabulate(tabData, tabHeader, tablefmt="grid"))
                         print()
+                if limit is not None and not sortBy and len(backups["items"]) >= limit:
+                    # Without sorting, the first limit objects found are the ones returned
+                    break
             else:
                 continue
+        backups["items"] = astraFilter.select(backups["items"], None, sortBy, limit)
+        if super().streams():
+            super().streamItems(renderer, backups["items"])
+            return backups
         if self.output == "json":
             dataReturn = backups
         elif self.output == "yaml":
-            dataReturn = yaml.dump(backups)
+            dataReturn = astraOutput.yamlDump(backups)
         elif self.output == "table":
+            globaltabHeader = ["AppID", "backupName", "backupID", "backupState"]
+            globaltabData = []
+            for backup in backups["items"]:
+                globaltabData.append(
+                    [
+                        backup["appID"],
+                        backup["name"],
+                        backup["id"],
+                        backup["state"],
+                    ]
+                )
             dataReturn = tabulate(globaltabData, globaltabHeader, tablefmt="grid")
 
         if not self.quiet:
@@ -425,7 +817,8 @@ class getBackups(SDKCommon):
 class takeBackup(SDKCommon):
     """Take a backup of an app.  An AppID and backupName is provided and
     either the result JSON is returned or the backupID of the newly created
-    backup is returned."""
+    backup is returned.  A request which times out is tried again (see
+    SDKCommon.createObject()) without taking a second backup."""
 
     def __init__(self, quiet=True, verbose=False):
         """quiet: Will there be CLI output or just return (datastructure)
@@ -455,7 +848,7 @@ class takeBackup(SDKCommon):
             print(colored(f"API data: {data}", "green"))
             print(colored(f"API params: {params}", "green"))
 
-        ret = super().apicall("post", url, data, self.headers, params, self.verifySSL)
+        ret = super().createObject(url, data, self.headers)
 
         if self.verbose:
             print(f"API HTTP Status Code: {ret.status_code}")
@@ -534,6 +927,9 @@ class cloneApp(SDKCommon):
 
     This class doesn't try to validate anything you pass it, if you give it garbage
     for any parameters the clone operation will fail.
+
+    A request which times out is tried again (see SDKCommon.createObject()), without
+    creating a second clone.
     """
 
     def __init__(self, quiet=True, verbose=False):
@@ -584,7 +980,7 @@ class cloneApp(SDKCommon):
             print(colored(f"API data: {data}", "green"))
             print(colored(f"API params: {params}", "green"))
 
-        ret = super().apicall("post", url, data, self.headers, params, self.verifySSL)
+        ret = super().createObject(url, data, self.headers)
 
         if self.verbose:
             print(f"API HTTP Status Code: {ret.status_code}")
@@ -674,21 +1070,37 @@ class restoreApp(SDKCommon):
 class getClusters(SDKCommon):
     """Iterate over the clouds and list the clusters in each."""
 
+    filterFields = ("name", "clusterType", "managedState")
+    streamColumns = (
+        ("clusterName", lambda cluster: cluster["name"]),
+        ("clusterID", lambda cluster: cluster["id"]),
+        ("clusterType", lambda cluster: cluster["clusterType"]),
+        ("managedState", lambda cluster: cluster["managedState"]),
+    )
+
     def __init__(self, quiet=True, verbose=False, output="json"):
         """quiet: Will there be CLI output or just return (datastructure)
         verbose: Print all of the ReST call info: URL, Method, Headers, Request Body
         output: table: pretty print the data
                 json: (default) output in JSON
-                yaml: output in yaml"""
+                yaml: output in yaml
+                ndjson: one line of JSON per object, printed as it arrives
+                csv: comma separated values, printed as they arrive"""
         self.quiet = quiet
         self.verbose = verbose
         self.output = output
         super().__init__()
         self.clouds = getClouds(quiet=True).main()
 
-    def main(self, hideManaged=False, hideUnmanaged=False):
+    def main(self, hideManaged=False, hideUnmanaged=False, where=None, sortBy=None, limit=None):
+        """hideManaged: Leave out managed clusters
+        hideUnmanaged: Leave out unmanaged clusters
+        where, sortBy, limit: see SDKCommon.filterParams(), the server filters on name, clusterType
+                              and managedState"""
+        where = astraFilter.compileFilter(where)
         clusters = {}
         clusters["items"] = []
+        renderer = super().streamer(sortBy)
         if self.clouds is False:
             print("Call to get clouds failed")
             return False
@@ -699,7 +1111,7 @@ class getClusters(SDKCommon):
             endpoint = f"topology/v1/clouds/{cloud['id']}/clusters"
             url = self.base + endpoint
             data = {}
-            params = {}
+            params = super().filterParams(where)
 
             if self.verbose:
                 print(f"Getting clusters in cloud {cloud['id']} ({cloud['name']})...")
@@ -709,7 +1121,7 @@ class getClusters(SDKCommon):
                 print(colored(f"API data: {data}", "green"))
                 print(colored(f"API params: {params}", "green"))
 
-            ret = super().apicall("get", url, data, self.headers, params, self.verifySSL)
+            ret = super().getList(url, data, params)
 
             if self.verbose:
                 print(f"API HTTP Status Code: {ret.status_code}")
@@ -717,6 +1129,7 @@ class getClusters(SDKCommon):
 
             if ret.ok:
                 results = super().jsonifyResults(ret)
+                batch = []
                 for item in results["items"]:
                     if hideManaged:
                         if item.get("managedState") == "managed":
@@ -724,12 +1137,22 @@ class getClusters(SDKCommon):
                     if hideUnmanaged:
                         if item.get("managedState") == "unmanaged":
                             continue
-                    clusters["items"].append(item)
-
+                    batch.append(item)
+                batch = astraFilter.select(batch, where)
+                clusters["items"] += batch
+                if renderer:
+                    renderer.write(batch[: None if limit is None else limit - renderer.count])
+                if limit is not None and not sortBy and len(clusters["items"]) >= limit:
+                    break
+
+        clusters["items"] = astraFilter.select(clusters["items"], None, sortBy, limit)
+        if super().streams():
+            super().streamItems(renderer, clusters["items"])
+            return clusters
         if self.output == "json":
             dataReturn = clusters
         elif self.output == "yaml":
-            dataReturn = yaml.dump(clusters)
+            dataReturn = astraOutput.yamlDump(clusters)
         elif self.output == "table":
             tabHeader = ["clusterName", "clusterID", "clusterType", "managedState"]
             tabData = []
@@ -825,7 +1248,9 @@ class createProtectionpolicy(SDKCommon):
 
 
 class manageApp(SDKCommon):
-    """This class switches an unmanaged (aka undefined) app to a managed (aka defined) app."""
+    """This class switches an unmanaged (aka undefined) app to a managed (aka defined) app.
+    A request which times out is tried again (see SDKCommon.createObject()), without
+    managing the app twice."""
 
     def __init__(self, quiet=True, verbose=False):
         """quiet: Will there be CLI output or just return (datastructure)
@@ -859,7 +1284,7 @@ class manageApp(SDKCommon):
             print(colored(f"API data: {data}", "green"))
             print(colored(f"API params: {params}", "green"))
 
-        ret = super().apicall("post", url, data, self.headers, params, self.verifySSL, self.quiet)
+        ret = super().createObject(url, data, self.headers, quiet=self.quiet)
 
         if self.verbose:
             print(f"API HTTP Status Code: {ret.status_code}")
@@ -926,7 +1351,8 @@ class unmanageApp(SDKCommon):
 class takeSnap(SDKCommon):
     """Take a snapshot of an app.  An AppID and snapName are required and
     either the result JSON is returned or the snapID of the newly created
-    backup is returned."""
+    backup is returned.  A request which times out is tried again (see
+    SDKCommon.createObject()) without taking a second snapshot."""
 
     def __init__(self, quiet=True, verbose=False):
         """quiet: Will there be CLI output or just return (datastructure)
@@ -956,7 +1382,7 @@ class takeSnap(SDKCommon):
             print(colored(f"API data: {data}", "green"))
             print(colored(f"API params: {params}", "green"))
 
-        ret = super().apicall("post", url, data, self.headers, params, self.verifySSL)
+        ret = super().createObject(url, data, self.headers)
 
         if self.verbose:
             print(f"API HTTP Status Code: {ret.status_code}")
@@ -982,28 +1408,39 @@ class getSnaps(SDKCommon):
     for that app.
     """
 
+    filterFields = ("name", "state")
+    streamColumns = (
+        ("appID", lambda snap: snap["appID"]),
+        ("snapshotName", lambda snap: snap["name"]),
+        ("snapshotID", lambda snap: snap["id"]),
+        ("snapshotState", lambda snap: snap["state"]),
+    )
+
     def __init__(self, quiet=True, verbose=False, output="json"):
         """quiet: Will there be CLI output or just return (datastructure)
         verbose: Print all of the ReST call info: URL, Method, Headers, Request Body
         output: table: pretty print the data
                 json: (default) output in JSON
-                yaml: output in yaml"""
+                yaml: output in yaml
+                ndjson: one line of JSON per object, printed as it arrives
+                csv: comma separated values, printed as they arrive"""
         self.quiet = quiet
         self.verbose = verbose
         self.output = output
         super().__init__()
         self.apps = getApps().main()
 
-    def main(self, appFilter=None):
+    def main(self, appFilter=None, where=None, sortBy=None, limit=None):
+        """appFilter: Filter by the name or ID of the app
+        where, sortBy, limit: see SDKCommon.filterParams(), the server filters on name and state"""
         if self.apps is False:
             print("Call to getApps() failed")
             return False
 
         snaps = {}
         snaps["items"] = []
-        if self.output == "table":
-            globaltabHeader = ["appID", "snapshotName", "snapshotID", "snapshotState"]
-            globaltabData = []
+        where = astraFilter.compileFilter(where)
+        renderer = super().streamer(sortBy)
 
         for app in self.apps["items"]:
             if appFilter:
@@ -1013,7 +1450,7 @@ class getSnaps(SDKCommon):
             url = self.base + endpoint
 
             data = {}
-            params = {}
+            params = super().filterParams(where)
 
             if self.verbose:
                 print(f"Listing Snapshots for {app['id']} {app['name']}")
@@ -1023,7 +1460,7 @@ class getSnaps(SDKCommon):
                 print(colored(f"API data: {data}", "green"))
                 print(colored(f"API params: {params}", "green"))
 
-            ret = super().apicall("get", url, data, self.headers, params, self.verifySSL)
+            ret = super().getList(url, data, params)
 
             if self.verbose:
                 print(f"API HTTP Status Code: {ret.status_code}")
@@ -1037,7 +1474,10 @@ class getSnaps(SDKCommon):
                     # Adding custom 'appID' key/value pair
                     if not item.get("appID"):
                         item["appID"] = app["id"]
-                    snaps["items"].append(item)
+                batch = astraFilter.select(results["items"], where)
+                snaps["items"] += batch
+                if renderer:
+                    renderer.write(batch[: None if limit is None else limit - renderer.count])
                 if self.output == "table":
                     tabHeader = ["snapshotName", "snapshotID", "snapshotState"]
                     tabData = []
@@ -1049,30 +1489,40 @@ class getSnaps(SDKCommon):
                                 snap["state"],
                             ]
                         )
-                        globaltabData.append(
-                            [
-                                app["id"],
-                                snap["name"],
-                                snap["id"],
-                                snap["state"],
-                            ]
-                        )
                 if not self.quiet and self.verbose:
                     print(f"Snapshots for {app['id']}")
                     if self.output == "json":
                         print(json.dumps(results))
                     elif self.output == "yaml":
-                        print(yaml.dump(results))
+                        print(astraOutput.yamlDump(results))
                     elif self.output == "table":
                         print(tabulate(tabData, tabHeader, tablefmt="grid"))
                         print()
+                if limit is not None and not sortBy and len(snaps["items"]) >= limit:
+                    # Without sorting, the first limit objects found are the ones returned
+                    break
             else:
                 continue
+        snaps["items"] = astraFilter.select(snaps["items"], None, sortBy, limit)
+        if super().streams():
+            super().streamItems(renderer, snaps["items"])
+            return snaps
         if self.output == "json":
             dataReturn = snaps
         elif self.output == "yaml":
-            dataReturn = yaml.dump(snaps)
+            dataReturn = astraOutput.yamlDump(snaps)
         elif self.output == "table":
+            globaltabHeader = ["appID", "snapshotName", "snapshotID", "snapshotState"]
+            globaltabData = []
+            for snap in snaps["items"]:
+                globaltabData.append(
+                    [
+                        snap["appID"],
+                        snap["name"],
+                        snap["id"],
+                        snap["state"],
+                    ]
+                )
             dataReturn = tabulate(globaltabData, globaltabHeader, tablefmt="grid")
 
         if not self.quiet:
@@ -1128,24 +1578,36 @@ class destroySnapshot(SDKCommon):
 
 
 class getClouds(SDKCommon):
+    filterFields = ("name", "cloudType")
+    streamColumns = (
+        ("cloudName", lambda cloud: cloud["name"]),
+        ("cloudID", lambda cloud: cloud["id"]),
+        ("cloudType", lambda cloud: cloud["cloudType"]),
+    )
+
     def __init__(self, quiet=True, verbose=False, output="json"):
         """quiet: Will there be CLI output or just return (datastructure)
         verbose: Print all of the ReST call info: URL, Method, Headers, Request Body
         output: table: pretty print the data
                 json: (default) output in JSON
-                yaml: output in yaml"""
+                yaml: output in yaml
+                ndjson: one line of JSON per object, printed as it arrives
+                csv: comma separated values, printed as they arrive"""
         self.quiet = quiet
         self.verbose = verbose
         self.output = output
         super().__init__()
 
-    def main(self):
+    def main(self, where=None, sortBy=None, limit=None):
+        """where, sortBy, limit: see SDKCommon.filterParams(), the server filters on name and
+        cloudType"""
 
         endpoint = "topology/v1/clouds"
         url = self.base + endpoint
 
         data = {}
-        params = {}
+        where = astraFilter.compileFilter(where)
+        params = super().filterParams(where)
 
         if self.verbose:
             print("Getting clouds...")
@@ -1155,7 +1617,7 @@ class getClouds(SDKCommon):
             print(colored(f"API data: {data}", "green"))
             print(colored(f"API params: {params}", "green"))
 
-        ret = super().apicall("get", url, data, self.headers, params, self.verifySSL)
+        ret = super().getList(url, data, params)
 
         if self.verbose:
             print(f"API HTTP Status Code: {ret.status_code}")
@@ -1163,10 +1625,15 @@ class getClouds(SDKCommon):
 
         if ret.ok:
             results = super().jsonifyResults(ret)
+            results["items"] = astraFilter.select(results["items"], where, sortBy, limit)
+            if super().streams():
+                super().streamItems(None, results["items"])
+                return results
+
             if self.output == "json":
                 dataReturn = results
             elif self.output == "yaml":
-                dataReturn = yaml.dump(results)
+                dataReturn = astraOutput.yamlDump(results)
             elif self.output == "table":
                 tabHeader = ["cloudName", "cloudID", "cloudType"]
                 tabData = []
@@ -1192,12 +1659,22 @@ class getClouds(SDKCommon):
 
 
 class getStorageClasses(SDKCommon):
+    filterFields = ("name", "provisioner")
+    streamColumns = (
+        ("cloud", lambda storageClass: storageClass["cloudType"]),
+        ("cluster", lambda storageClass: storageClass["clusterName"]),
+        ("storageclassID", lambda storageClass: storageClass["id"]),
+        ("storageclassName", lambda storageClass: storageClass["name"]),
+    )
+
     def __init__(self, quiet=True, verbose=False, output="json"):
         """quiet: Will there be CLI output or just return (datastructure)
         verbose: Print all of the ReST call info: URL, Method, Headers, Request Body
         output: table: pretty print the data
                 json: (default) output in JSON
-                yaml: output in yaml"""
+                yaml: output in yaml
+                ndjson: one line of JSON per object, printed as it arrives
+                csv: comma separated values, printed as they arrive"""
         self.quiet = quiet
         self.verbose = verbose
         self.output = output
@@ -1205,7 +1682,9 @@ class getStorageClasses(SDKCommon):
         self.clouds = getClouds().main()
         self.clusters = getClusters().main()
 
-    def main(self):
+    def main(self, where=None, sortBy=None, limit=None):
+        """where, sortBy, limit: see SDKCommon.filterParams(), the server filters on name and
+        provisioner"""
         if self.clouds is False:
             print("getClouds().main() failed")
             return False
@@ -1221,6 +1700,8 @@ class getStorageClasses(SDKCommon):
 
         storageClasses = {}
         storageClasses["items"] = []
+        where = astraFilter.compileFilter(where)
+        renderer = super().streamer(sortBy)
         for cloud in self.clouds["items"]:
             for cluster in self.clusters["items"]:
                 # exclude invalid combinations of cloud/cluster
@@ -1232,7 +1713,7 @@ class getStorageClasses(SDKCommon):
                 url = self.base + endpoint
 
                 data = {}
-                params = {}
+                params = super().filterParams(where)
 
                 if self.verbose:
                     print()
@@ -1247,7 +1728,7 @@ class getStorageClasses(SDKCommon):
                     print(colored(f"API params: {params}", "green"))
                     print()
 
-                ret = super().apicall("get", url, data, self.headers, params, self.verifySSL)
+                ret = super().getList(url, data, params)
 
                 if self.verbose:
                     print(f"API HTTP Status Code: {ret.status_code}")
@@ -1267,12 +1748,19 @@ class getStorageClasses(SDKCommon):
                             entry["clusterID"] = cluster["id"]
                         if not entry.get("clusterName"):
                             entry["clusterName"] = cluster["name"]
-                        storageClasses["items"].append(entry)
-
+                    batch = astraFilter.select(results["items"], where)
+                    storageClasses["items"] += batch
+                    if renderer:
+                        renderer.write(batch[: None if limit is None else limit - renderer.count])
+
+        storageClasses["items"] = astraFilter.select(storageClasses["items"], None, sortBy, limit)
+        if super().streams():
+            super().streamItems(renderer, storageClasses["items"])
+            return storageClasses
         if self.output == "json":
             dataReturn = storageClasses
         elif self.output == "yaml":
-            dataReturn = yaml.dump(storageClasses)
+            dataReturn = astraOutput.yamlDump(storageClasses)
         elif self.output == "table":
             tabData = []
             tabHeader = ["cloud", "cluster", "storageclassID", "storageclassName"]
@@ -1395,12 +1883,23 @@ class unmanageCluster(SDKCommon):
 
 
 class getNamespaces(SDKCommon):
+    filterFields = ("name", "namespaceState", "clusterID")
+    streamColumns = (
+        ("name", lambda namespace: namespace["name"]),
+        ("namespaceID", lambda namespace: namespace["id"]),
+        ("namespaceState", lambda namespace: namespace["namespaceState"]),
+        ("associatedApps", lambda namespace: ", ".join(namespace["associatedApps"])),
+        ("clusterID", lambda namespace: namespace["clusterID"]),
+    )
+
     def __init__(self, quiet=True, verbose=False, output="json"):
         """quiet: Will there be CLI output or just return (datastructure)
         verbose: Print all of the ReST call info: URL, Method, Headers, Request Body
         output: table: pretty print the data
                 json: (default) output in JSON
-                yaml: output in yaml"""
+                yaml: output in yaml
+                ndjson: one line of JSON per object, printed as it arrives
+                csv: comma separated values, printed as they arrive"""
         self.quiet = quiet
         self.verbose = verbose
         self.output = output
@@ -1408,7 +1907,22 @@ class getNamespaces(SDKCommon):
         self.apps = getApps().main()
         self.clusters = getClusters().main()
 
-    def main(self, clusterID=None, nameFilter=None, showRemoved=False, minuteFilter=False):
+    def main(
+        self,
+        clusterID=None,
+        nameFilter=None,
+        showRemoved=False,
+        minuteFilter=False,
+        where=None,
+        sortBy=None,
+        limit=None,
+    ):
+        """clusterID: Only list the namespaces of this cluster
+        nameFilter: Only list namespaces whose name contains this
+        showRemoved: Include namespaces which have been removed from their cluster
+        minuteFilter: Only list namespaces created in the last minuteFilter minutes
+        where, sortBy, limit: see SDKCommon.filterParams(), the server filters on name,
+                              namespaceState and clusterID"""
         if self.apps is False:
             print("Call to getApps().main() failed")
             return False
@@ -1420,7 +1934,8 @@ class getNamespaces(SDKCommon):
         url = self.base + endpoint
 
         data = {}
-        params = {}
+        where = astraFilter.compileFilter(where)
+        params = super().filterParams(where)
 
         if self.verbose:
             print("Getting namespaces...")
@@ -1430,7 +1945,7 @@ class getNamespaces(SDKCommon):
             print(colored(f"API data: {data}", "green"))
             print(colored(f"API params: {params}", "green"))
 
-        ret = super().apicall("get", url, data, self.headers, params, self.verifySSL)
+        ret = super().getList(url, data, params)
 
         if self.verbose:
             print(f"API HTTP Status Code: {ret.status_code}")
@@ -1453,6 +1968,8 @@ class getNamespaces(SDKCommon):
             for cluster in self.clusters["items"]:
                 if cluster["managedState"] == "managed":
                     clusterList.append(cluster["id"])
+            # Every namespace's age is measured from the same now
+            now = astraTime.currentEpoch()
             for counter, namespace in enumerate(namespaces.get("items")):
                 if namespace.get("systemType") or namespace.get("name") in systemNS:
                     namespacesCooked["items"].remove(namespaces["items"][counter])
@@ -1462,19 +1979,25 @@ class getNamespaces(SDKCommon):
                     namespacesCooked["items"].remove(namespaces["items"][counter])
                 elif namespace["clusterID"] not in clusterList:
                     namespacesCooked["items"].remove(namespaces["items"][counter])
-                elif minuteFilter and (
-                    datetime.utcnow()
-                    - datetime.strptime(
-                        namespace.get("metadata").get("creationTimestamp"), "%Y-%m-%dT%H:%M:%SZ"
+                elif minuteFilter:
+                    # A namespace without a creation time that parses is taken as old
+                    created = astraTime.parseTimestamp(
+                        namespace.get("metadata", {}).get("creationTimestamp")
                     )
-                    > timedelta(minutes=minuteFilter)
-                ):
-                    namespacesCooked["items"].remove(namespaces["items"][counter])
+                    if created is None or now - created > minuteFilter * 60:
+                        namespacesCooked["items"].remove(namespaces["items"][counter])
+            namespacesCooked["items"] = astraFilter.select(
+                namespacesCooked["items"], where, sortBy, limit
+            )
+
+            if super().streams():
+                super().streamItems(None, namespacesCooked["items"])
+                return namespacesCooked
 
             if self.output == "json":
                 dataReturn = namespacesCooked
             elif self.output == "yaml":
-                dataReturn = yaml.dump(namespacesCooked)
+                dataReturn = astraOutput.yamlDump(namespacesCooked)
             elif self.output == "table":
                 tabHeader = ["name", "namespaceID", "namespaceState", "associatedApps", "clusterID"]
                 tabData = []
@@ -1504,24 +2027,37 @@ class getNamespaces(SDKCommon):
 class getScripts(SDKCommon):
     """Get all the scripts (aka hook sources) for the Astra Control account"""
 
+    filterFields = ("name", "sourceType")
+    streamColumns = (
+        ("scriptName", lambda script: script["name"]),
+        ("scriptID", lambda script: script["id"]),
+        ("description", lambda script: script.get("description")),
+    )
+
     def __init__(self, quiet=True, verbose=False, output="json"):
         """quiet: Will there be CLI output or just return (datastructure)
         verbose: Print all of the ReST call info: URL, Method, Headers, Request Body
         output: table: pretty print the data
                 json: (default) output in JSON
-                yaml: output in yaml"""
+                yaml: output in yaml
+                ndjson: one line of JSON per object, printed as it arrives
+                csv: comma separated values, printed as they arrive"""
         self.quiet = quiet
         self.verbose = verbose
         self.output = output
         super().__init__()
 
-    def main(self, scriptSourceName=None):
+    def main(self, scriptSourceName=None, where=None, sortBy=None, limit=None):
+        """scriptSourceName: Only list the script of this name
+        where, sortBy, limit: see SDKCommon.filterParams(), the server filters on name and
+                              sourceType"""
 
         endpoint = "core/v1/hookSources"
         url = self.base + endpoint
 
         data = {}
-        params = {}
+        where = astraFilter.compileFilter(where)
+        params = super().filterParams(where)
 
         if self.verbose:
             print("Getting scripts...")
@@ -1531,7 +2067,7 @@ class getScripts(SDKCommon):
             print(colored(f"API data: {data}", "green"))
             print(colored(f"API params: {params}", "green"))
 
-        ret = super().apicall("get", url, data, self.headers, params, self.verifySSL)
+        ret = super().getList(url, data, params)
 
         if self.verbose:
             print(f"API HTTP Status Code: {ret.status_code}")
@@ -1544,11 +2080,18 @@ class getScripts(SDKCommon):
                 for counter, script in enumerate(scripts.get("items")):
                     if script.get("name") != scriptSourceName:
                         scriptsCooked["items"].remove(scripts["items"][counter])
+            scriptsCooked["items"] = astraFilter.select(
+                scriptsCooked["items"], where, sortBy, limit
+            )
+
+            if super().streams():
+                super().streamItems(None, scriptsCooked["items"])
+                return scriptsCooked
 
             if self.output == "json":
                 dataReturn = scriptsCooked
             elif self.output == "yaml":
-                dataReturn = yaml.dump(scriptsCooked)
+                dataReturn = astraOutput.yamlDump(scriptsCooked)
             elif self.output == "table":
                 tabHeader = ["scriptName", "scriptID", "description"]
                 tabData = []
@@ -1574,7 +2117,8 @@ class getScripts(SDKCommon):
 
 
 class createScript(SDKCommon):
-    """Create a script (aka hook source)"""
+    """Create a script (aka hook source), trying a request which times out again without
+    creating the script twice (see SDKCommon.createObject())"""
 
     def __init__(self, quiet=True, verbose=False):
         """quiet: Will there be CLI output or just return (datastructure)
@@ -1613,7 +2157,7 @@ class createScript(SDKCommon):
             print(colored(f"API data: {data}", "green"))
             print(colored(f"API params: {params}", "green"))
 
-        ret = super().apicall("post", url, data, self.headers, params, self.verifySSL)
+        ret = super().createObject(url, data, self.headers)
 
         if self.verbose:
             print(f"API HTTP Status Code: {ret.status_code}")
@@ -1632,6 +2176,57 @@ class createScript(SDKCommon):
             return False
 
 
+class updateScript(SDKCommon):
+    """Replace a script's (aka hook source's) source and description"""
+
+    def __init__(self, quiet=True, verbose=False):
+        """quiet: Will there be CLI output or just return (datastructure)
+        verbose: Print all of the ReST call info: URL, Method, Headers, Request Body"""
+        self.quiet = quiet
+        self.verbose = verbose
+        super().__init__()
+        self.headers["accept"] = "application/astra-hookSource+json"
+        self.headers["Content-Type"] = "application/astra-hookSource+json"
+
+    def main(self, scriptID, name, source, description=None):
+
+        endpoint = f"core/v1/hookSources/{scriptID}"
+        url = self.base + endpoint
+        params = {}
+        data = {
+            "type": "application/astra-hookSource",
+            "version": "1.0",
+            "name": name,
+            "source": source,
+            "sourceType": "script",
+        }
+        if description:
+            data["description"] = description
+
+        if self.verbose:
+            print(f"Updating script {name}")
+            print(colored(f"API URL: {url}", "green"))
+            print(colored("API Method: PUT", "green"))
+            print(colored(f"API Headers: {self.headers}", "green"))
+            print(colored(f"API data: {data}", "green"))
+            print(colored(f"API params: {params}", "green"))
+
+        ret = super().apicall("put", url, data, self.headers, params, self.verifySSL, quiet=True)
+
+        if self.verbose:
+            print(f"API HTTP Status Code: {ret.status_code}")
+            print()
+
+        if ret.ok:
+            return True
+        else:
+            if not self.quiet:
+                print(f"API HTTP Status Code: {ret.status_code} - {ret.reason}")
+                if ret.text.strip():
+                    print(f"Error text: {ret.text}")
+            return False
+
+
 class destroyScript(SDKCommon):
     """Given a scriptID destroy the script.  Note that this doesn't unmanage
     a script, it actively destroys it. There is no coming back from this."""
@@ -1680,24 +2275,36 @@ class destroyScript(SDKCommon):
 
 
 class getAppAssets(SDKCommon):
+    filterFields = ("assetName", "assetType")
+    streamColumns = (
+        ("assetName", lambda asset: asset.get("assetName")),
+        ("assetType", lambda asset: asset.get("assetType")),
+    )
+
     def __init__(self, quiet=True, verbose=False, output="json"):
         """quiet: Will there be CLI output or just return (datastructure)
         verbose: Print all of the ReST call info: URL, Method, Headers, Request Body
         output: table: pretty print the data
                 json: (default) output in JSON
-                yaml: output in yaml"""
+                yaml: output in yaml
+                ndjson: one line of JSON per object, printed as it arrives
+                csv: comma separated values, printed as they arrive"""
         self.quiet = quiet
         self.verbose = verbose
         self.output = output
         super().__init__()
 
-    def main(self, appID):
+    def main(self, appID, where=None, sortBy=None, limit=None):
+        """appID: The app whose assets are listed
+        where, sortBy, limit: see SDKCommon.filterParams(), the server filters on assetName and
+                              assetType"""
 
         endpoint = f"k8s/v1/apps/{appID}/appAssets"
         url = self.base + endpoint
 
         data = {}
-        params = {}
+        where = astraFilter.compileFilter(where)
+        params = super().filterParams(where)
 
         if self.verbose:
             print("Getting app assets...")
@@ -1707,7 +2314,7 @@ class getAppAssets(SDKCommon):
             print(colored(f"API data: {data}", "green"))
             print(colored(f"API params: {params}", "green"))
 
-        ret = super().apicall("get", url, data, self.headers, params, self.verifySSL)
+        ret = super().getList(url, data, params)
 
         if self.verbose:
             print(f"API HTTP Status Code: {ret.status_code}")
@@ -1715,11 +2322,16 @@ class getAppAssets(SDKCommon):
 
         if ret.ok:
             assets = super().jsonifyResults(ret)
+            assets["items"] = astraFilter.select(assets["items"], where, sortBy, limit)
+
+            if super().streams():
+                super().streamItems(None, assets["items"])
+                return assets
 
             if self.output == "json":
                 dataReturn = assets
             elif self.output == "yaml":
-                dataReturn = yaml.dump(assets)
+                dataReturn = astraOutput.yamlDump(assets)
             elif self.output == "table":
                 tabHeader = ["assetName", "assetType"]
                 tabData = []
@@ -1746,28 +2358,40 @@ class getAppAssets(SDKCommon):
 class getHooks(SDKCommon):
     """Get all the execution hooks for every app"""
 
+    filterFields = ("name", "action", "stage")
+    streamColumns = (
+        ("appID", lambda hook: hook["appID"]),
+        ("hookName", lambda hook: hook["name"]),
+        ("hookID", lambda hook: hook["id"]),
+        ("matchingImages", lambda hook: ", ".join(hook["matchingImages"])),
+    )
+
     def __init__(self, quiet=True, verbose=False, output="json"):
         """quiet: Will there be CLI output or just return (datastructure)
         verbose: Print all of the ReST call info: URL, Method, Headers, Request Body
         output: table: pretty print the data
                 json: (default) output in JSON
-                yaml: output in yaml"""
+                yaml: output in yaml
+                ndjson: one line of JSON per object, printed as it arrives
+                csv: comma separated values, printed as they arrive"""
         self.quiet = quiet
         self.verbose = verbose
         self.output = output
         super().__init__()
         self.apps = getApps().main()
 
-    def main(self, appFilter=None):
+    def main(self, appFilter=None, where=None, sortBy=None, limit=None):
+        """appFilter: Filter by the name or ID of the app
+        where, sortBy, limit: see SDKCommon.filterParams(), the server filters on name, action and
+                              stage"""
         if self.apps is False:
             print("Call to getApps() failed")
             return False
 
         hooks = {}
         hooks["items"] = []
-        if self.output == "table":
-            globaltabHeader = ["appID", "hookName", "hookID", "matchingImages"]
-            globaltabData = []
+        where = astraFilter.compileFilter(where)
+        renderer = super().streamer(sortBy)
 
         for app in self.apps["items"]:
             if appFilter:
@@ -1777,7 +2401,7 @@ class getHooks(SDKCommon):
             url = self.base + endpoint
 
             data = {}
-            params = {}
+            params = super().filterParams(where)
 
             if self.verbose:
                 print("Getting execution hooks...")
@@ -1787,7 +2411,7 @@ class getHooks(SDKCommon):
                 print(colored(f"API data: {data}", "green"))
                 print(colored(f"API params: {params}", "green"))
 
-            ret = super().apicall("get", url, data, self.headers, params, self.verifySSL)
+            ret = super().getList(url, data, params)
 
             if self.verbose:
                 print(f"API HTTP Status Code: {ret.status_code}")
@@ -1798,7 +2422,13 @@ class getHooks(SDKCommon):
                 if results is None:
                     continue
                 for item in results["items"]:
-                    hooks["items"].append(item)
+                    # Adding custom 'appID' key/value pair
+                    if not item.get("appID"):
+                        item["appID"] = app["id"]
+                batch = astraFilter.select(results["items"], where)
+                hooks["items"] += batch
+                if renderer:
+                    renderer.write(batch[: None if limit is None else limit - renderer.count])
                 if self.output == "table":
                     tabHeader = ["hookName", "hookID", "matchingImages"]
                     tabData = []
@@ -1810,34 +2440,44 @@ class getHooks(SDKCommon):
                                 ", ".join(hook["matchingImages"]),
                             ]
                         )
-                        globaltabData.append(
-                            [
-                                app["id"],
-                                hook["name"],
-                                hook["id"],
-                                ", ".join(hook["matchingImages"]),
-                            ]
-                        )
                 if not self.quiet and self.verbose:
                     print(f"Execution hooks for {app['id']}")
                     if self.output == "json":
                         print(json.dumps(results))
                     elif self.output == "yaml":
-                        print(yaml.dump(results))
+                        print(astraOutput.yamlDump(results))
                     elif self.output == "table":
                         print(tabulate(tabData, tabHeader, tablefmt="grid"))
                         print()
+                if limit is not None and not sortBy and len(hooks["items"]) >= limit:
+                    # Without sorting, the first limit objects found are the ones returned
+                    break
             else:
                 if not self.quiet:
                     print(f"API HTTP Status Code: {ret.status_code} - {ret.reason}")
                     if ret.text.strip():
                         print(f"Error text: {ret.text}")
                 continue
+        hooks["items"] = astraFilter.select(hooks["items"], None, sortBy, limit)
+        if super().streams():
+            super().streamItems(renderer, hooks["items"])
+            return hooks
         if self.output == "json":
             dataReturn = hooks
         elif self.output == "yaml":
-            dataReturn = yaml.dump(hooks)
+            dataReturn = astraOutput.yamlDump(hooks)
         elif self.output == "table":
+            globaltabHeader = ["appID", "hookName", "hookID", "matchingImages"]
+            globaltabData = []
+            for hook in hooks["items"]:
+                globaltabData.append(
+                    [
+                        hook["appID"],
+                        hook["name"],
+                        hook["id"],
+                        ", ".join(hook["matchingImages"]),
+                    ]
+                )
             dataReturn = tabulate(globaltabData, globaltabHeader, tablefmt="grid")
 
         if not self.quiet:
@@ -1846,7 +2486,8 @@ class getHooks(SDKCommon):
 
 
 class createHook(SDKCommon):
-    """Create an execution hook"""
+    """Create an execution hook, trying a request which times out again without creating
+    the hook twice (see SDKCommon.createObject())"""
 
     def __init__(self, quiet=True, verbose=False):
         """quiet: Will there be CLI output or just return (datastructure)
@@ -1873,6 +2514,43 @@ class createHook(SDKCommon):
         endpoint = f"core/v1/executionHooks"
         url = self.base + endpoint
         params = {}
+        data = self.body(
+            appID, name, scriptID, stage, action, arguments, containerRegex, description
+        )
+
+        if self.verbose:
+            print(f"Creating executionHook {name}")
+            print(colored(f"API URL: {url}", "green"))
+            print(colored("API Method: POST", "green"))
+            print(colored(f"API Headers: {self.headers}", "green"))
+            print(colored(f"API data: {data}", "green"))
+            print(colored(f"API params: {params}", "green"))
+
+        # Hooks are listed per app
+        listUrl = self.base + f"k8s/v1/apps/{appID}/executionHooks"
+        ret = super().createObject(url, data, self.headers, listUrl)
+
+        if self.verbose:
+            print(f"API HTTP Status Code: {ret.status_code}")
+            print()
+
+        if ret.ok:
+            results = super().jsonifyResults(ret)
+            if not self.quiet:
+                print(json.dumps(results))
+            return results
+        else:
+            if not self.quiet:
+                print(f"API HTTP Status Code: {ret.status_code} - {ret.reason}")
+                if ret.text.strip():
+                    print(f"Error text: {ret.text}")
+            return False
+
+    @staticmethod
+    def body(
+        appID, name, scriptID, stage, action, arguments, containerRegex=None, description=None
+    ):
+        """The body of a POST (or PUT) of an execution hook"""
         data = {
             "type": "application/astra-executionHook",
             "version": "1.0",
@@ -1889,26 +2567,57 @@ class createHook(SDKCommon):
             data["description"] = description
         if containerRegex:
             data["matchingCriteria"] = [{"type": "containerImage", "value": containerRegex}]
+        return data
+
+
+class updateHook(SDKCommon):
+    """Replace an execution hook, with the same arguments as createHook"""
+
+    def __init__(self, quiet=True, verbose=False):
+        """quiet: Will there be CLI output or just return (datastructure)
+        verbose: Print all of the ReST call info: URL, Method, Headers, Request Body"""
+        self.quiet = quiet
+        self.verbose = verbose
+        super().__init__()
+        self.headers["accept"] = "application/astra-executionHook+json"
+        self.headers["Content-Type"] = "application/astra-executionHook+json"
+
+    def main(
+        self,
+        hookID,
+        appID,
+        name,
+        scriptID,
+        stage,
+        action,
+        arguments,
+        containerRegex=None,
+        description=None,
+    ):
+
+        endpoint = f"core/v1/executionHooks/{hookID}"
+        url = self.base + endpoint
+        params = {}
+        data = createHook.body(
+            appID, name, scriptID, stage, action, arguments, containerRegex, description
+        )
 
         if self.verbose:
-            print(f"Creating executionHook {name}")
+            print(f"Updating executionHook {name}")
             print(colored(f"API URL: {url}", "green"))
-            print(colored("API Method: POST", "green"))
+            print(colored("API Method: PUT", "green"))
             print(colored(f"API Headers: {self.headers}", "green"))
             print(colored(f"API data: {data}", "green"))
             print(colored(f"API params: {params}", "green"))
 
-        ret = super().apicall("post", url, data, self.headers, params, self.verifySSL)
+        ret = super().apicall("put", url, data, self.headers, params, self.verifySSL, quiet=True)
 
         if self.verbose:
             print(f"API HTTP Status Code: {ret.status_code}")
             print()
 
         if ret.ok:
-            results = super().jsonifyResults(ret)
-            if not self.quiet:
-                print(json.dumps(results))
-            return results
+            return True
         else:
             if not self.quiet:
                 print(f"API HTTP Status Code: {ret.status_code} - {ret.reason}")
@@ -0,0 +1,293 @@
+#!/usr/bin/env python
+"""
+   Copyright 2021 NetApp, Inc
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+from termcolor import colored
+
+try:
+    from . import astraInventory
+    from . import astraModels
+    from . import astraOutput
+    from . import astraSync
+except ImportError:
+    import astraInventory
+    import astraModels
+    import astraOutput
+    import astraSync
+
+
+class inventoryStore:
+    """A local SQLite copy of an Astra Control account, with a table per kind of object,
+    which can be queried with plain SQL (or one of the canned reports) without making a single
+    API call.
+
+    Each table has a column for every field of the kind's astraModels model, indexed the same
+    way as astraInventory.inventory, plus the object's complete JSON in the raw column (which
+    SQLite's json_extract() can reach into).  sync() refreshes the file with
+    astraSync.inventorySync, so only the objects which changed since the last sync are
+    fetched and rewritten.
+
+    store = astraStore.inventoryStore()
+    store.sync()
+    store.report("unprotected", hours=24)
+    store.query("SELECT clusterName, count(*) AS apps FROM apps GROUP BY clusterName")
+    """
+
+    defaultPath = os.path.join(os.path.expanduser("~"), ".cache", "astra-toolkits", "inventory.db")
+    kinds = tuple(astraSync.inventorySync.endpoints)
+    # Columns in addition to the model's fields: name: function of the model returning its value
+    extraColumns = {"apps": {"namespace": lambda obj: obj.namespace}}
+    # Indexes in addition to those of astraInventory.inventory.indexFields
+    extraIndexes = {
+        "snapshots": [("appID", "state", "creationTimestamp")],
+        "backups": [("appID", "state", "creationTimestamp")],
+        "apps": [("clusterName",)],
+    }
+    # name: (description, SQL).  :cutoff is the time --hours ago, as an API timestamp.
+    reports = {
+        "unprotected": (
+            "apps without a completed backup since the cutoff",
+            """SELECT a.name AS appName, a.id AS appID, a.clusterName, a.namespace,
+                      max(b.creationTimestamp) AS lastBackup
+                 FROM apps a
+                 LEFT JOIN backups b ON b.appID = a.id AND b.state = 'completed'
+                GROUP BY a.id
+               HAVING lastBackup IS NULL OR lastBackup < :cutoff
+                ORDER BY lastBackup, a.name""",
+        ),
+        "unsnapshotted": (
+            "apps without a completed snapshot since the cutoff",
+            """SELECT a.name AS appName, a.id AS appID, a.clusterName, a.namespace,
+                      max(s.creationTimestamp) AS lastSnapshot
+                 FROM apps a
+                 LEFT JOIN snapshots s ON s.appID = a.id AND s.state = 'completed'
+                GROUP BY a.id
+               HAVING lastSnapshot IS NULL OR lastSnapshot < :cutoff
+                ORDER BY lastSnapshot, a.name""",
+        ),
+        "failed": (
+            "snapshots and backups created since the cutoff which failed",
+            """SELECT 'snapshot' AS kind, a.name AS appName, s.name, s.id,
+                      s.creationTimestamp AS created
+                 FROM snapshots s JOIN apps a ON a.id = s.appID
+                WHERE s.state = 'failed' AND s.creationTimestamp >= :cutoff
+               UNION ALL
+               SELECT 'backup', a.name, b.name, b.id, b.creationTimestamp
+                 FROM backups b JOIN apps a ON a.id = b.appID
+                WHERE b.state = 'failed' AND b.creationTimestamp >= :cutoff
+                ORDER BY created DESC""",
+        ),
+        "clusters": (
+            "apps, snapshots and backups per cluster",
+            """SELECT c.name AS clusterName, c.id AS clusterID, c.managedState,
+                      count(DISTINCT a.id) AS apps,
+                      (SELECT count(*) FROM snapshots s JOIN apps sa ON sa.id = s.appID
+                        WHERE sa.clusterID = c.id) AS snapshots,
+                      (SELECT count(*) FROM backups b JOIN apps ba ON ba.id = b.appID
+                        WHERE ba.clusterID = c.id) AS backups
+                 FROM clusters c
+                 LEFT JOIN apps a ON a.clusterID = c.id
+                GROUP BY c.id
+                ORDER BY c.name""",
+        ),
+        "unmanaged": (
+            "non-system namespaces of managed clusters which aren't part of any app",
+            """SELECT c.name AS clusterName, n.name AS namespace, n.namespaceState
+                 FROM namespaces n JOIN clusters c ON c.id = n.clusterID
+                WHERE c.managedState = 'managed' AND n.systemType IS NULL
+                  AND NOT EXISTS (
+                      SELECT 1 FROM apps a, json_each(a.namespaces) ns
+                       WHERE a.clusterID = n.clusterID AND ns.value = n.name)
+                ORDER BY c.name, n.name""",
+        ),
+    }
+
+    def __init__(self, path=None, quiet=True, verbose=False, output="json"):
+        """path: the SQLite file, by default ~/.cache/astra-toolkits/inventory.db
+        quiet: Will there be CLI output or just return (datastructure)
+        verbose: Print all of the ReST call info, and the SQL of each query
+        output: table: pretty print the data
+                json: (default) output in JSON
+                yaml: output in yaml
+                ndjson: one line of JSON per row
+                csv: comma separated values"""
+        self.path = os.fspath(path or self.defaultPath)
+        self.quiet = quiet
+        self.verbose = verbose
+        self.output = output
+        self.db = None
+
+    @staticmethod
+    def tupleFields(kind):
+        """The model's tuple fields filled in by postJSON(), which are stored as JSON arrays"""
+        model = astraModels.models[kind]
+        fields = {attr for attr, _, _ in model.jsonFields}
+        return [slot for slot in model.__slots__ if slot not in fields]
+
+    @staticmethod
+    def columns(kind):
+        """The column names of kind's table (not counting id and raw), in order"""
+        model = astraModels.models[kind]
+        fields = [attr for attr, _, _ in model.jsonFields if attr != "id"]
+        fields += model.metadataFields
+        fields += inventoryStore.tupleFields(kind)
+        return fields + list(inventoryStore.extraColumns.get(kind, {}))
+
+    def connect(self):
+        """Open (creating if need be) the SQLite file, returning the connection"""
+        if self.db is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self.db = sqlite3.connect(self.path)
+            self.db.row_factory = sqlite3.Row
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            with self.db:
+                self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value)")
+                for kind in self.kinds:
+                    columns = ", ".join(self.columns(kind))
+                    self.db.execute(
+                        f"CREATE TABLE IF NOT EXISTS {kind} (id TEXT PRIMARY KEY, {columns}, raw)"
+                    )
+                    indexes = [(field,) for field in astraInventory.inventory.indexFields[kind]]
+                    for fields in indexes + self.extraIndexes.get(kind, []):
+                        self.db.execute(
+                            f"CREATE INDEX IF NOT EXISTS {kind}_{'_'.join(fields)} "
+                            f"ON {kind} ({', '.join(fields)})"
+                        )
+        return self.db
+
+    def getMeta(self, key, default=None):
+        row = self.connect().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return astraOutput.jsonLoads(row[0]) if row else default
+
+    def setMeta(self, key, value):
+        self.connect().execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            (key, astraOutput.jsonDumps(value)),
+        )
+
+    def loadInventory(self, inv, kinds):
+        """Load the stored objects of kinds into inv, just as far as a sync needs them"""
+        db = self.connect()
+        for kind in kinds:
+            model = astraModels.models[kind]
+            columns = self.columns(kind)
+            tuples = self.tupleFields(kind)
+            listing = []
+            for row in db.execute(f"SELECT id, {', '.join(columns)} FROM {kind}"):
+                obj = {key: row[attr] for attr, key, _ in model.jsonFields}
+                obj["metadata"] = {field: row[field] for field in model.metadataFields}
+                for field in tuples:
+                    obj[field] = astraOutput.jsonLoads(row[field])
+                listing.append(model.fromJSON(obj, keepRaw=False))
+            inv.load(kind, listing)
+
+    def row(self, kind, obj):
+        """The values of kind's columns for obj, in the order of INSERT INTO kind"""
+        extras = self.extraColumns.get(kind, {})
+        values = [obj.id]
+        for column in self.columns(kind):
+            if column in extras:
+                value = extras[column](obj)
+            else:
+                value = getattr(obj, column)
+            values.append(astraOutput.jsonDumps(value) if isinstance(value, tuple) else value)
+        values.append(obj.rawJSON)
+        return values
+
+    def sync(self, kinds=None, full=False):
+        """Bring the stored kinds (by default all of them) up to date with Astra Control,
+        fetching only what changed since the last sync unless full is True.  Returns the
+        astraSync.inventorySync statistics, or False on failure."""
+        db = self.connect()
+        inv = astraInventory.inventory()
+        syncer = astraSync.inventorySync(inventory=inv, verbose=self.verbose)
+        kinds = set(kinds or self.kinds)
+        for kind in list(kinds):
+            if syncer.endpoints[kind][1]:
+                kinds.add(syncer.endpoints[kind][1])
+        syncedAt = self.getMeta("syncedAt", {})
+        if full or self.getMeta("base") != syncer.base:
+            syncedAt = {}
+        stored = [kind for kind in kinds if kind in syncedAt]
+        self.loadInventory(inv, stored)
+
+        stats = syncer.refresh(kinds)
+        if stats is False:
+            return False
+        with db:
+            for kind in kinds:
+                if kind not in syncedAt:
+                    db.execute(f"DELETE FROM {kind}")
+                    changed = inv.objects[kind]
+                else:
+                    changed = {}
+                    for objID in syncer.changes[kind]:
+                        obj = inv.objects[kind].get(objID)
+                        if obj is None:
+                            db.execute(f"DELETE FROM {kind} WHERE id = ?", (objID,))
+                        else:
+                            changed[objID] = obj
+                placeholders = ", ".join("?" * (len(self.columns(kind)) + 2))
+                db.executemany(
+                    f"INSERT OR REPLACE INTO {kind} VALUES ({placeholders})",
+                    (self.row(kind, obj) for obj in changed.values()),
+                )
+            syncedAt.update(syncer.syncedAt)
+            self.setMeta("syncedAt", syncedAt)
+            self.setMeta("base", syncer.base)
+
+        if not self.quiet:
+            self.show({"items": [stats]})
+        return stats
+
+    def query(self, sql, params=None):
+        """Run sql (with named or positional params), returning {"items": [row dicts]}, or
+        False if the SQL is invalid"""
+        db = self.connect()
+        if self.verbose:
+            print(colored(f"SQL: {sql}", "green"))
+            print(colored(f"SQL params: {params}", "green"))
+        start = time.perf_counter()
+        try:
+            cursor = db.execute(sql, params or ())
+            rows = cursor.fetchall()
+        except sqlite3.Error as e:
+            if not self.quiet:
+                print(f"query failed: {e}")
+            return False
+        if self.verbose:
+            print(colored(f"SQL rows: {len(rows)} in {time.perf_counter() - start:.3f}s", "green"))
+        columns = [d[0] for d in cursor.description or ()]
+        results = {"items": [dict(zip(columns, row)) for row in rows]}
+        if not self.quiet:
+            self.show(results, columns)
+        return results
+
+    def report(self, name, hours=24):
+        """Run one of the canned reports, with a cutoff of hours ago"""
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
+        return self.query(self.reports[name][1], {"cutoff": cutoff.strftime("%Y-%m-%dT%H:%M:%SZ")})
+
+    def show(self, results, columns=None):
+        columns = columns or (list(results["items"][0]) if results["items"] else [])
+        astraOutput.showResults(
+            self.output, results, [(column, column) for column in columns], summary=None
+        )
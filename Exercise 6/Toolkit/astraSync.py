@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+"""
+   Copyright 2021 NetApp, Inc
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import gzip
+import json
+import os
+import time
+from termcolor import colored
+
+try:
+    from . import astraInventory
+    from . import astraModels
+    from . import astraOutput
+    from . import astraSDK
+except ImportError:
+    import astraInventory
+    import astraModels
+    import astraOutput
+    import astraSDK
+
+
+class inventorySync(astraSDK.SDKCommon):
+    """Keeps an astraInventory.inventory up to date with Astra Control, pulling only what
+    changed since the last refresh rather than crawling every collection in full.
+
+    For each collection endpoint (every app's snapshots, backups and hooks are a collection
+    of their own) a refresh:
+    1) Lists just the id and modificationTimestamp of each object, with the include param.
+       Local objects missing from that list have been deleted, and objects which are new or
+       whose modificationTimestamp moved are the ones that changed.
+    2) Only if something changed, lists the full objects, pushing a filter on
+       modificationTimestamp down to the server so only the changed ones come back, and
+       builds models for just those.
+    Should the server reject either param, that step falls back to a plain listing.
+
+    The inventory can be saved to, and loaded from, a local file so that refreshes are
+    incremental across separate toolkit runs too.
+    """
+
+    # kind: (endpoint, kind of the parent object the endpoint is per, key of the parent's ID)
+    endpoints = {
+        "clouds": ("topology/v1/clouds", None, None),
+        "clusters": ("topology/v1/clouds/{}/clusters", "clouds", "cloudID"),
+        "namespaces": ("topology/v1/namespaces", None, None),
+        "scripts": ("core/v1/hookSources", None, None),
+        "apps": ("k8s/v2/apps", None, None),
+        "snapshots": ("k8s/v1/apps/{}/appSnaps", "apps", "appID"),
+        "backups": ("k8s/v1/apps/{}/appBackups", "apps", "appID"),
+        "hooks": ("k8s/v1/apps/{}/executionHooks", "apps", "appID"),
+    }
+    defaultPath = os.path.join(
+        os.path.expanduser("~"), ".cache", "astra-toolkits", "inventory.jsonl.gz"
+    )
+
+    def __init__(self, inventory=None, quiet=True, verbose=False):
+        """inventory: the astraInventory.inventory to keep up to date, by default the one
+                   shared by the whole process
+        quiet: Will there be CLI output or just return (datastructure)
+        verbose: Print all of the ReST call info: URL, Method, Headers, Request Body"""
+        self.inventory = inventory or astraInventory.getInventory()
+        self.quiet = quiet
+        self.verbose = verbose
+        # Set to False if the server rejects the include or filter params
+        self.useInclude = True
+        self.useFilter = True
+        # kind: time of its last refresh
+        self.syncedAt = {}
+        self.stats = {}
+        # kind: IDs of the objects added, changed or removed by the last refresh
+        self.changes = {}
+        super().__init__()
+
+    def get(self, endpoint, params):
+        """GET a list endpoint, returning (HTTP status code, decoded JSON or None)"""
+        url = self.base + endpoint
+        data = {}
+
+        if self.verbose:
+            print(colored(f"API URL: {url}", "green"))
+            print(colored("API Method: GET", "green"))
+            print(colored(f"API Headers: {self.headers}", "green"))
+            print(colored(f"API data: {data}", "green"))
+            print(colored(f"API params: {params}", "green"))
+
+        ret = super().apicall("get", url, data, self.headers, params, self.verifySSL, quiet=True)
+
+        if self.verbose:
+            print(f"API HTTP Status Code: {ret.status_code}")
+            print()
+
+        self.stats["calls"] += 1
+        self.stats["bytes"] += len(ret.content)
+        if not ret.ok:
+            return ret.status_code, None
+        return ret.status_code, super().jsonifyResults(ret)
+
+    def syncEndpoint(self, kind, endpoint, parentKey=None, parentID=None):
+        """Bring the objects of kind listed by endpoint up to date, returning False if the
+        endpoint couldn't be listed"""
+        criteria = {parentKey: parentID} if parentKey else {}
+        local = {obj.id: obj for obj in self.inventory.find(kind, **criteria)}
+        remote = None
+        full = None
+
+        if local and self.useInclude:
+            status, results = self.get(endpoint, {"include": "id,metadata.modificationTimestamp"})
+            if status == 400:
+                self.useInclude = False
+            elif results is None:
+                return False
+            else:
+                remote = {objID: modified for objID, modified in results["items"]}
+        if remote is None:
+            status, full = self.get(endpoint, {})
+            if full is None:
+                return False
+            remote = {
+                item["id"]: item.get("metadata", {}).get("modificationTimestamp")
+                for item in full["items"]
+            }
+
+        for objID in local.keys() - remote.keys():
+            self.inventory.remove(kind, objID)
+            self.changes[kind].add(objID)
+            self.stats["removed"] += 1
+        changed = {
+            objID
+            for objID, modified in remote.items()
+            if objID not in local or local[objID].modificationTimestamp != modified
+        }
+        self.stats["unchanged"] += len(remote) - len(changed)
+        if not changed:
+            return True
+
+        if full is None:
+            params = {}
+            if self.useFilter and local:
+                watermark = max(obj.modificationTimestamp or "" for obj in local.values())
+                params = {"filter": f"metadata.modificationTimestamp ge '{watermark}'"}
+            status, full = self.get(endpoint, params)
+            if status == 400 and params:
+                self.useFilter = False
+            if params and (full is None or not changed <= {item["id"] for item in full["items"]}):
+                # Either the filter was rejected, or something changed without moving past the
+                # watermark (a clock change on the server), so fall back to a full listing
+                status, full = self.get(endpoint, {})
+            if full is None:
+                return False
+
+        for item in full["items"]:
+            if item["id"] not in changed:
+                continue
+            if parentKey and not item.get(parentKey):
+                # Adding the same custom key/value pair the SDK list classes do
+                item[parentKey] = parentID
+            self.stats["added" if item["id"] not in local else "changed"] += 1
+            self.inventory.upsert(kind, item)
+            self.changes[kind].add(item["id"])
+        return True
+
+    def refresh(self, kinds=None):
+        """Bring kinds (by default every kind) up to date, along with the kinds of their
+        parents, returning a dict of statistics about the refresh or False on failure"""
+        kinds = set(kinds or self.endpoints)
+        for kind in list(kinds):
+            if self.endpoints[kind][1]:
+                kinds.add(self.endpoints[kind][1])
+        self.stats = dict.fromkeys(
+            ["calls", "bytes", "added", "changed", "removed", "unchanged"], 0
+        )
+        self.changes = {kind: set() for kind in kinds}
+        start = time.perf_counter()
+        ok = True
+        for kind, (endpoint, parentKind, parentKey) in self.endpoints.items():
+            if kind not in kinds:
+                continue
+            # Nothing is fetched through the SDK, the sync itself populates the inventory
+            self.inventory.loaded.add(kind)
+            if parentKind:
+                parentIDs = set(self.inventory.ids(parentKind))
+                # Children of a deleted parent are gone too
+                for parentID in list(self.inventory.indexes[kind][parentKey]):
+                    if parentID not in parentIDs:
+                        for objID in self.inventory.ids(kind, **{parentKey: parentID}):
+                            self.inventory.remove(kind, objID)
+                            self.changes[kind].add(objID)
+                            self.stats["removed"] += 1
+                for parentID in self.inventory.ids(parentKind):
+                    ok &= self.syncEndpoint(kind, endpoint.format(parentID), parentKey, parentID)
+            else:
+                ok &= self.syncEndpoint(kind, endpoint)
+            self.syncedAt[kind] = time.time()
+        self.stats["seconds"] = round(time.perf_counter() - start, 3)
+        if not self.quiet:
+            print(json.dumps(self.stats))
+        return self.stats if ok else False
+
+    def save(self, path=None):
+        """Write every synced object to path, a gzip compressed file of JSON lines"""
+        path = os.fspath(path or self.defaultPath)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmpPath = path + ".tmp"
+        with gzip.open(tmpPath, "wt", encoding="utf-8") as f:
+            f.write(astraOutput.jsonDumps({"base": self.base, "syncedAt": self.syncedAt}) + "\n")
+            for kind in self.syncedAt:
+                for obj in self.inventory.objects[kind].values():
+                    f.write(f"{kind}\t{obj.rawJSON}\n")
+        os.replace(tmpPath, path)
+
+    def load(self, path=None):
+        """Load the objects saved by save(), returning False if there's no such file or it's
+        of a different Astra Control account"""
+        path = os.fspath(path or self.defaultPath)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                header = astraOutput.jsonLoads(f.readline())
+                if header.get("base") != self.base:
+                    return False
+                listings = {kind: [] for kind in header["syncedAt"]}
+                for line in f:
+                    kind, text = line.rstrip("\n").split("\t", 1)
+                    listings[kind].append(
+                        astraModels.models[kind].fromJSON(astraOutput.jsonLoads(text), text=text)
+                    )
+        except (OSError, ValueError, KeyError, EOFError):
+            return False
+        for kind, listing in listings.items():
+            self.inventory.load(kind, listing)
+        self.syncedAt = header["syncedAt"]
+        return True
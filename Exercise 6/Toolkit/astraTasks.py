@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""
+   Copyright 2021 NetApp, Inc
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from tabulate import tabulate
+
+
+class taskGraph:
+    """Runs the steps of a multi-step operation (such as toolkit.py deploy or clone), each as
+    soon as the steps it depends on have finished, so that steps which don't depend on one
+    another overlap, with up to concurrency steps running at once.
+
+    Each step's function is called with the results of the steps it's after, in order, and
+    its own result kept for the steps after it.  Should a step raise (SystemExit included),
+    no more steps are started, those already running are waited for, and the exception is
+    raised again by run().  On a KeyboardInterrupt, stopping is set and run() raises straight
+    away, without waiting for the steps still running, so a step which polls (or otherwise
+    runs for long) should wait on stopping rather than sleep, and return once it's set.
+    timings has each step's start (seconds after run() began) and duration, for a breakdown
+    of where the time went.
+
+    graph = astraTasks.taskGraph()
+    graph.add("namespaces", listNamespaces)
+    graph.add("clusters", listClusters)
+    graph.add("create", createNamespace, after=["namespaces", "clusters"])
+    results = graph.run()
+    """
+
+    def __init__(self, concurrency=4):
+        """concurrency: the most steps to run at once"""
+        self.concurrency = concurrency
+        self.steps = {}
+        self.results = {}
+        self.timings = []
+        self.stopping = threading.Event()
+
+    def add(self, name, function, after=()):
+        """Add step name, which calls function with the results of the steps it's after (which
+        must have been added already), returning name"""
+        if name in self.steps:
+            raise ValueError(f"step {name} added twice")
+        missing = [dep for dep in after if dep not in self.steps]
+        if missing:
+            raise ValueError(f"step {name} is after unknown steps: {', '.join(missing)}")
+        self.steps[name] = (function, tuple(after))
+        return name
+
+    def run(self):
+        """Run every step, returning {step name: its result}"""
+        started = time.perf_counter()
+        pending = dict(self.steps)
+        running = {}
+        error = None
+
+        def call(name, function, args):
+            start = time.perf_counter()
+            try:
+                return function(*args)
+            finally:
+                self.timings.append(
+                    {
+                        "step": name,
+                        "start": round(start - started, 3),
+                        "seconds": round(time.perf_counter() - start, 3),
+                    }
+                )
+
+        pool = ThreadPoolExecutor(max_workers=self.concurrency)
+        try:
+            while pending or running:
+                if error is None:
+                    for name, (function, after) in list(pending.items()):
+                        if all(dep in self.results for dep in after):
+                            args = [self.results[dep] for dep in after]
+                            running[pool.submit(call, name, function, args)] = name
+                            del pending[name]
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        self.results[name] = future.result()
+                    except BaseException as e:
+                        error = error or e
+        except KeyboardInterrupt:
+            # Ctrl-C: tell the running steps to stop, and don't wait for them to
+            self.stopping.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        pool.shutdown()
+        self.timings.sort(key=lambda timing: timing["start"])
+        if error is not None:
+            raise error
+        return self.results
+
+    def showTimings(self, file=sys.stderr):
+        """Print the breakdown of each step's start and duration, in the order they started"""
+        total = max((t["start"] + t["seconds"] for t in self.timings), default=0)
+        tabData = [[t["step"], f"{t['start']:.3f}", f"{t['seconds']:.3f}"] for t in self.timings]
+        print(tabulate(tabData, ["step", "start", "seconds"], tablefmt="grid"), file=file)
+        steps = sum(t["seconds"] for t in self.timings)
+        print(f"{total:.3f}s in all, {steps:.3f}s of steps", file=file)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+   Copyright 2021 NetApp, Inc
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import calendar
+import heapq
+import time
+from array import array
+from datetime import datetime, timezone
+
+# NumPy (when it's installed) filters and sorts whole columns of epochs at once
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+apiFormat = "%Y-%m-%dT%H:%M:%SZ"
+# Epoch of midnight of each date seen, keyed by the date part of a timestamp ("2022-07-20")
+dayEpochs = {}
+
+
+def parseTimestamp(text):
+    """The epoch (int seconds) of an API timestamp such as "2022-07-20T18:19:35Z", or None.
+
+    The API's fixed format is sliced apart by position, and the epoch of each date only worked
+    out the first time it's seen, which is several times faster than datetime.strptime().
+    Anything else (fractional seconds, a UTC offset) goes through datetime.fromisoformat()."""
+    if not text:
+        return None
+    try:
+        if len(text) == 20 and text[10] == "T" and text[19] == "Z":
+            day = dayEpochs.get(text[:10])
+            if day is None:
+                day = calendar.timegm((int(text[:4]), int(text[5:7]), int(text[8:10]), 0, 0, 0))
+                dayEpochs[text[:10]] = day
+            return day + int(text[11:13]) * 3600 + int(text[14:16]) * 60 + int(text[17:19])
+        parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except (ValueError, TypeError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def formatTimestamp(epoch):
+    """An epoch in the format of the API's timestamps"""
+    return time.strftime(apiFormat, time.gmtime(epoch))
+
+
+def currentEpoch():
+    """The current epoch, in whole seconds.  A query takes this once and compares every object
+    against it, rather than asking for the time again for each object."""
+    return int(time.time())
+
+
+def column(epochs):
+    """A column of epochs (None for objects without one) which ageMask() and ageOrder() can
+    work on as a whole: a NumPy array if NumPy is installed, else a compact array of int64
+    with -1 standing in for None"""
+    if numpy is not None:
+        return numpy.fromiter((-1 if e is None else e for e in epochs), dtype=numpy.int64)
+    return array("q", (-1 if e is None else e for e in epochs))
+
+
+def ageMask(epochs, minAge=None, maxAge=None, now=None):
+    """The positions in a column() of epochs at least minAge and at most maxAge seconds old,
+    as of now"""
+    if now is None:
+        now = currentEpoch()
+    newest = now - minAge if minAge is not None else None
+    # Missing epochs (-1) are never included, however large maxAge is
+    oldest = max(now - maxAge, 0) if maxAge is not None else 0
+    if numpy is not None:
+        mask = epochs >= oldest
+        if newest is not None:
+            mask &= epochs <= newest
+        return numpy.flatnonzero(mask)
+    if newest is None:
+        return [i for i, e in enumerate(epochs) if e >= oldest]
+    return [i for i, e in enumerate(epochs) if oldest <= e <= newest]
+
+
+def ageOrder(epochs, positions=None, youngestFirst=True, limit=None):
+    """positions (by default every position) of a column() of epochs, youngest (or oldest)
+    first, and at most limit of them.  Objects without an epoch sort last either way."""
+    if positions is None:
+        positions = range(len(epochs))
+    if numpy is not None:
+        positions = numpy.asarray(positions, dtype=numpy.int64)
+        selected = epochs[positions]
+        if youngestFirst:
+            keys = -selected
+        else:
+            # Missing epochs (-1) go last
+            keys = numpy.where(selected < 0, numpy.iinfo(numpy.int64).max, selected)
+        if limit is not None and limit < len(positions):
+            part = numpy.argpartition(keys, limit)[:limit]
+            order = part[numpy.argsort(keys[part], kind="stable")]
+        else:
+            order = numpy.argsort(keys, kind="stable")
+        return positions[order].tolist()
+    key = epochs.__getitem__
+    if youngestFirst:
+        if limit is not None:
+            return heapq.nlargest(limit, positions, key=key)
+        return sorted(positions, key=key, reverse=True)
+    # Missing epochs (-1) would sort first, so they're set aside and added at the end
+    present = [i for i in positions if epochs[i] >= 0]
+    missing = [i for i in positions if epochs[i] < 0] if len(present) < len(positions) else []
+    if limit is not None:
+        return (heapq.nsmallest(limit, present, key=key) + missing)[:limit]
+    return sorted(present, key=key) + missing
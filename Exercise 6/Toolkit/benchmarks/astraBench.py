@@ -0,0 +1,508 @@
+#!/usr/bin/env python
+"""
+   Copyright 2021 NetApp, Inc
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import argparse
+import contextlib
+import fnmatch
+import gc
+import io
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from tabulate import tabulate
+
+toolkitDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, toolkitDir)
+import astraBulk  # noqa: E402
+import astraFilter  # noqa: E402
+import astraFleet  # noqa: E402
+import astraInventory  # noqa: E402
+import astraMock  # noqa: E402
+import astraOutput  # noqa: E402
+import astraReport  # noqa: E402
+import astraSDK  # noqa: E402
+import toolkit  # noqa: E402
+
+
+class benchContext:
+    """Resources shared by the set up of a single benchmark case: a temporary directory which
+    the SDK reads its config.yaml from, and any mock servers or cassettes that need stopping
+    once the case has run"""
+
+    def __init__(self, tmpDir):
+        self.tmpDir = tmpDir
+        self.stack = contextlib.ExitStack()
+        self.mock = None
+
+    def startMock(self, **kwargs):
+        """Start a mock server for the rest of the case, and point astraSDK at it"""
+        self.mock = self.stack.enter_context(astraMock.astraMock(**kwargs))
+        self.mock.writeConfig(self.tmpDir)
+        return self.mock
+
+    def replayOf(self, func):
+        """Call func() once while recording its API traffic, then switch astraSDK over to
+        replaying that traffic at full speed, so that func() can be timed without any network
+        or mock server overhead"""
+        path = os.path.join(self.tmpDir, f"bench-{time.monotonic_ns()}.jsonl.gz")
+        astraSDK.SDKCommon.cassette = astraSDK.cassette(path, "record")
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+        astraSDK.SDKCommon.cassette.file.close()
+        astraSDK.SDKCommon.cassette = astraSDK.cassette(path, "replay", speed=0)
+        self.stack.callback(setattr, astraSDK.SDKCommon, "cassette", None)
+        return func
+
+    def close(self):
+        self.stack.close()
+
+
+def fanOut(ctx, apps):
+    """getSnaps() makes one call per managed app"""
+    ctx.startMock(apps=apps, snapshotsPerApp=10)
+    return lambda: astraSDK.getSnaps().main(), apps
+
+
+def namespaces(ctx, count):
+    """getNamespaces() joins every namespace against every app, then filters the result"""
+    apps = 100
+    clusters = 10
+    ctx.startMock(
+        fleet=astraFleet.astraFleet(
+            apps=apps,
+            clusters=clusters,
+            namespacesPerCluster=max((count - apps) // clusters - 4, 0),
+            snapshotsPerApp=0,
+            backupsPerApp=0,
+        )
+    )
+    return ctx.replayOf(lambda: astraSDK.getNamespaces().main(nameFilter="-")), count
+
+
+def renderRows(rows):
+    fleet = astraFleet.astraFleet(
+        apps=max(rows // 100, 1), clusters=1, snapshotsPerApp=100, backupsPerApp=0
+    )
+    snaps = fleet.listing("snapshots")
+    snaps["items"] = snaps["items"][:rows]
+    return snaps
+
+
+def renderJson(ctx, rows):
+    snaps = renderRows(rows)
+    return lambda: json.dumps(snaps), rows
+
+
+def renderYaml(ctx, rows):
+    """The same YAML getSnaps(output="yaml") dumps, with libyaml if it's available"""
+    snaps = renderRows(rows)
+    return lambda: astraOutput.yamlDump(snaps), rows
+
+
+def renderTable(ctx, rows):
+    """The same table getSnaps(output="table") builds"""
+    snaps = renderRows(rows)
+    tabHeader = ["appID", "snapshotName", "snapshotID", "snapshotState"]
+
+    def render():
+        tabData = [[s["appID"], s["name"], s["id"], s["state"]] for s in snaps["items"]]
+        return tabulate(tabData, tabHeader, tablefmt="grid")
+
+    return render, rows
+
+
+def renderStream(output, rows):
+    """Streaming snapshots through an astraOutput.streamRenderer 100 batches at a time, the way
+    getSnaps() prints each app's snapshots as they arrive"""
+    snaps = renderRows(rows)["items"]
+    size = max(rows // 100, 1)
+    batches = [snaps[i : i + size] for i in range(0, rows, size)]
+
+    def render():
+        out = io.StringIO()
+        with astraOutput.streamRenderer(output, astraSDK.getSnaps.streamColumns, out=out) as r:
+            for batch in batches:
+                r.write(batch)
+        return out
+
+    return render, rows
+
+
+def renderNdjson(ctx, rows):
+    return renderStream("ndjson", rows)
+
+
+def renderCsv(ctx, rows):
+    return renderStream("csv", rows)
+
+
+def renderYamlStream(ctx, rows):
+    return renderStream("yaml", rows)
+
+
+def jsonPayload(kind, count):
+    """A single API response of count namespaces or app assets, as the JSON text (UTF-8 bytes)
+    the API returns"""
+    if kind == "namespaces":
+        fleet = astraFleet.astraFleet(
+            apps=1, clusters=10, namespacesPerCluster=count // 10, snapshotsPerApp=0
+        )
+    else:
+        fleet = astraFleet.astraFleet(apps=1, assetsPerApp=count, snapshotsPerApp=0)
+    listing = fleet.listing(kind)
+    listing["items"] = listing["items"][:count]
+    return json.dumps(listing).encode("utf-8")
+
+
+def jsonDecode(kind, count):
+    """astraOutput.jsonLoads(), as jsonifyResults() decodes every response"""
+    payload = jsonPayload(kind, count)
+    return lambda: astraOutput.jsonLoads(payload), count
+
+
+def jsonEncode(kind, count):
+    """astraOutput.jsonDumps() of every object in a listing, as ndjson output and the inventory
+    caches encode them"""
+    items = json.loads(jsonPayload(kind, count))["items"]
+    return lambda: [astraOutput.jsonDumps(obj) for obj in items], count
+
+
+def jsonDecodeNamespaces(ctx, count):
+    return jsonDecode("namespaces", count)
+
+
+def jsonEncodeNamespaces(ctx, count):
+    return jsonEncode("namespaces", count)
+
+
+def jsonDecodeAssets(ctx, count):
+    return jsonDecode("assets", count)
+
+
+def jsonEncodeAssets(ctx, count):
+    return jsonEncode("assets", count)
+
+
+def filterSelect(ctx, rows):
+    """Compiling a filter expression, and picking out the newest 10 snapshots matching it"""
+    snaps = renderRows(rows)["items"]
+
+    def select():
+        return astraFilter.select(snaps, "state=completed and name~hourly-* and age<30d", "age", 10)
+
+    return select, rows
+
+
+def byAge(ctx, rows):
+    """The inventory's newest 10 snapshots of the last 30 days, from its cached column of
+    creation epochs"""
+    inv = astraInventory.inventory()
+    inv.load("snapshots", renderRows(rows))
+    inv.epochColumn("snapshots")
+
+    def newest():
+        return inv.byAge("snapshots", maxAge=30 * 86400, limit=10)
+
+    return newest, rows
+
+
+def rpoReport(ctx, apps):
+    """astraReport's RPO figures for every app, each with 50 snapshots and 20 backups, from an
+    inventory that's already loaded"""
+    fleet = astraFleet.astraFleet(apps=apps, clusters=3, snapshotsPerApp=50, backupsPerApp=20)
+    inv = astraInventory.inventory()
+    for kind in ("apps", "snapshots", "backups"):
+        inv.load(kind, fleet.listing(kind))
+    return lambda: astraReport.rpoReport(inventory=inv).main(), apps
+
+
+def waiter(ctx, apps):
+    """toolkit.py's snapshot waiter, for a snapshot which has completed by the first poll"""
+    mock = ctx.startMock(apps=apps, snapshotsPerApp=1, snapSeconds=0)
+    appID = next(iter(mock.apps))
+
+    def wait():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return toolkit.doProtectionTask(
+                "snapshot", appID, f"bench-{time.monotonic_ns()}", False
+            )
+
+    return wait, 1
+
+
+def bulkSnapshots(ctx, apps):
+    """astraBulk snapshotting every app, 8 requests at a time, then waiting on all of them
+    with its batched poller, for snapshots which have completed by the first poll"""
+    ctx.startMock(apps=apps, snapshotsPerApp=1, snapSeconds=0)
+    appList = astraSDK.getApps().main()["items"]
+    bulk = astraBulk.bulkProtect("snapshot", interval=0)
+    return lambda: bulk.main(appList, f"bench-{time.monotonic_ns()}"), apps
+
+
+def coldStart(ctx, toolkitArgs):
+    """A complete toolkit.py process, run through a symlink so that it picks up the
+    config.yaml of the mock server rather than the one next to toolkit.py"""
+    ctx.startMock(apps=10)
+    link = os.path.join(ctx.tmpDir, "toolkit.py")
+    if not os.path.exists(link):
+        os.symlink(os.path.join(toolkitDir, "toolkit.py"), link)
+
+    def run():
+        ret = subprocess.run([sys.executable, link] + toolkitArgs, stdout=subprocess.DEVNULL)
+        if ret.returncode:
+            raise SystemExit(f"toolkit.py {' '.join(toolkitArgs)} returned {ret.returncode}")
+
+    return run, 1
+
+
+# name, setup function, argument, whether the argument is scaled by --scale, rounds
+cases = [
+    ("fanOut/getSnaps/apps={}", fanOut, 10, True, None),
+    ("fanOut/getSnaps/apps={}", fanOut, 100, True, None),
+    ("fanOut/getSnaps/apps={}", fanOut, 1000, True, None),
+    ("namespaces/getNamespaces/namespaces={}", namespaces, 1000, True, None),
+    ("namespaces/getNamespaces/namespaces={}", namespaces, 10000, True, None),
+    ("namespaces/getNamespaces/namespaces={}", namespaces, 50000, True, 3),
+    ("render/json/rows={}", renderJson, 100000, True, None),
+    ("render/yaml/rows={}", renderYaml, 100000, True, 3),
+    ("render/table/rows={}", renderTable, 100000, True, 3),
+    ("render/ndjson/rows={}", renderNdjson, 100000, True, None),
+    ("render/csv/rows={}", renderCsv, 100000, True, None),
+    ("render/yamlStream/rows={}", renderYamlStream, 100000, True, 3),
+    ("json/decode/namespaces={}", jsonDecodeNamespaces, 50000, True, None),
+    ("json/encode/namespaces={}", jsonEncodeNamespaces, 50000, True, None),
+    ("json/decode/assets={}", jsonDecodeAssets, 50000, True, None),
+    ("json/encode/assets={}", jsonEncodeAssets, 50000, True, None),
+    ("filter/select/rows={}", filterSelect, 100000, True, None),
+    ("age/byAge/snapshots={}", byAge, 100000, True, None),
+    ("report/rpo/apps={}", rpoReport, 2000, True, None),
+    ("waiter/doProtectionTask/apps={}", waiter, 10, True, None),
+    ("waiter/doProtectionTask/apps={}", waiter, 100, True, None),
+    ("bulk/snapshots/apps={}", bulkSnapshots, 100, True, None),
+    ("cli/coldStart/{}", coldStart, ["-h"], False, None),
+    ("cli/coldStart/{}", coldStart, ["list", "clouds"], False, None),
+]
+
+
+def caseName(template, arg):
+    return template.format("_".join(arg) if isinstance(arg, list) else arg)
+
+
+def runCase(ctx, setup, arg, rounds):
+    """Time rounds calls of the function set up by setup(ctx, arg), after one untimed warm up
+    call.  Like timeit, garbage collection is disabled while timing."""
+    func, items = setup(ctx, arg)
+    requestsBefore = None
+    times = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()
+        if ctx.mock:
+            requestsBefore = ctx.mock.requestCount
+        for _ in range(rounds):
+            gcEnabled = gc.isenabled()
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                func()
+                times.append(time.perf_counter() - start)
+            finally:
+                if gcEnabled:
+                    gc.enable()
+    result = {"times": times, "items": items}
+    if requestsBefore is not None:
+        result["apiCalls"] = (ctx.mock.requestCount - requestsBefore) / rounds
+    return result
+
+
+def mannWhitney(baseline, current):
+    """One-sided Mann-Whitney U test: the p-value of the current timings being no slower than
+    the baseline ones, using the normal approximation with tie and continuity corrections.
+    Unlike a t-test it makes no assumption of normally distributed timings."""
+    n1, n2 = len(current), len(baseline)
+    n = n1 + n2
+    if not n1 or not n2:
+        return None
+    combined = sorted([(t, 1) for t in current] + [(t, 0) for t in baseline])
+    ranks = [0.0] * n
+    ties = 0.0
+    i = 0
+    while i < n:
+        j = i
+        while j + 1 < n and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        ties += (j - i + 1) ** 3 - (j - i + 1)
+        i = j + 1
+    u = sum(r for r, (_, which) in zip(ranks, combined) if which) - n1 * (n1 + 1) / 2
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1))))
+    if not sigma:
+        return 1.0
+    return 1 - statistics.NormalDist().cdf((u - n1 * n2 / 2 - 0.5) / sigma)
+
+
+def compare(results, baseline, threshold, alpha):
+    """Add a verdict to each result: REGRESSION when the median is more than threshold slower
+    than the baseline median and the slowdown is statistically significant at alpha"""
+    for name, result in results.items():
+        base = baseline["results"].get(name)
+        if not base:
+            result["verdict"] = "new"
+            continue
+        median = statistics.median(result["times"])
+        baseMedian = statistics.median(base["times"])
+        result["baselineMedian"] = baseMedian
+        result["change"] = median / baseMedian - 1
+        result["pSlower"] = mannWhitney(base["times"], result["times"])
+        pFaster = mannWhitney(result["times"], base["times"])
+        if result["change"] > threshold and result["pSlower"] < alpha:
+            result["verdict"] = "REGRESSION"
+        elif result["change"] < -threshold and pFaster < alpha:
+            result["verdict"] = "faster"
+        else:
+            result["verdict"] = "ok"
+
+
+def report(results, output):
+    if output == "json":
+        print(json.dumps(results))
+        return
+    tabHeader = ["case", "rounds", "median (s)", "min (s)", "items/s", "apiCalls"]
+    if any("verdict" in r for r in results.values()):
+        tabHeader += ["baseline (s)", "change", "p", "verdict"]
+    tabData = []
+    for name, r in results.items():
+        median = statistics.median(r["times"])
+        row = [
+            name,
+            len(r["times"]),
+            f"{median:.4f}",
+            f"{min(r['times']):.4f}",
+            f"{r['items'] / median:,.0f}" if median else "",
+            f"{r['apiCalls']:g}" if "apiCalls" in r else "",
+        ]
+        if "verdict" in r:
+            if "baselineMedian" in r:
+                row += [f"{r['baselineMedian']:.4f}", f"{r['change']:+.1%}", f"{r['pSlower']:.3f}"]
+            else:
+                row += ["", "", ""]
+            row.append(r["verdict"])
+        tabData.append(row)
+    print(tabulate(tabData, tabHeader, tablefmt="grid"))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the astraSDK and toolkit.py hot paths, and compare the results "
+        "against a saved baseline"
+    )
+    parser.add_argument(
+        "-c",
+        "--cases",
+        nargs="*",
+        default=["*"],
+        help="glob patterns of the cases to run (default: all), see --list",
+    )
+    parser.add_argument("-l", "--list", action="store_true", help="list the cases and exit")
+    parser.add_argument("-n", "--rounds", default=5, type=int, help="timed runs per case")
+    parser.add_argument(
+        "--scale",
+        default=1.0,
+        type=float,
+        help="multiply the size of each case by this, for example 0.1 for a quick run",
+    )
+    parser.add_argument("-s", "--save", help="save the results as a baseline to this file")
+    parser.add_argument("-b", "--baseline", help="compare the results against this baseline")
+    parser.add_argument(
+        "-t",
+        "--threshold",
+        default=0.1,
+        type=float,
+        help="slowdown of the median, relative to the baseline, which counts as a regression",
+    )
+    parser.add_argument(
+        "-a",
+        "--alpha",
+        default=0.05,
+        type=float,
+        help="significance level a slowdown must reach to count as a regression",
+    )
+    parser.add_argument("-o", "--output", default="table", choices=["json", "table"])
+    args = parser.parse_args()
+
+    selected = []
+    for template, setup, arg, scaled, rounds in cases:
+        if scaled:
+            arg = max(int(arg * args.scale), 1)
+        name = caseName(template, arg)
+        if any(fnmatch.fnmatch(name, pattern) for pattern in args.cases):
+            selected.append((name, setup, arg, rounds or args.rounds))
+    if args.list:
+        for name, _, _, rounds in selected:
+            print(f"{name} (rounds={rounds})")
+        return
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpDir:
+        # getConfig() looks next to sys.argv[0] first
+        sys.argv[0] = os.path.join(tmpDir, "astraBench.py")
+        for name, setup, arg, rounds in selected:
+            print(f"{name}...", end="", file=sys.stderr)
+            sys.stderr.flush()
+            ctx = benchContext(tmpDir)
+            try:
+                results[name] = runCase(ctx, setup, arg, rounds)
+            finally:
+                ctx.close()
+            print(f" {statistics.median(results[name]['times']):.4f}s", file=sys.stderr)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(
+                {
+                    "created": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "scale": args.scale,
+                    "json": astraOutput.jsonBackend,
+                    "yamlDumper": astraOutput.yamlDumper.__name__,
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+    if baseline:
+        compare(results, baseline, args.threshold, args.alpha)
+    report(results, args.output)
+    if any(r.get("verdict") == "REGRESSION" for r in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
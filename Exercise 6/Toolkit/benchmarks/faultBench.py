@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+"""
+   Copyright 2021 NetApp, Inc
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from tabulate import tabulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import astraMock  # noqa: E402
+import astraSDK  # noqa: E402
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def waitFor(check, timeout, pollInterval):
+    """Call check() every pollInterval seconds until it returns True or False, or until
+    timeout seconds have elapsed (which counts as failure)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        ret = check()
+        if ret is not None:
+            return ret
+        time.sleep(pollInterval)
+    return False
+
+
+def findState(objects, objID):
+    if not isinstance(objects, dict):
+        return None
+    for obj in objects["items"]:
+        if obj["id"] == objID:
+            return obj["state"]
+    return None
+
+
+def benchGetBackups(appID, args):
+    return isinstance(astraSDK.getBackups().main(), dict)
+
+
+def benchTakeSnap(appID, args):
+    snapID = astraSDK.takeSnap().main(appID, f"bench-{time.monotonic_ns()}")
+    if not snapID or snapID is True:
+        return False
+
+    def check():
+        state = findState(astraSDK.getSnaps().main(appFilter=appID), snapID)
+        if state == "completed":
+            return True
+        elif state == "failed":
+            return False
+
+    return waitFor(check, args.timeout, args.pollInterval)
+
+
+def benchRestoreApp(appID, args):
+    snaps = astraSDK.getSnaps().main(appFilter=appID)
+    if not isinstance(snaps, dict) or not snaps["items"]:
+        return False
+    if not astraSDK.restoreApp().main(appID, snapshotID=snaps["items"][0]["id"]):
+        return False
+
+    def check():
+        state = findState(astraSDK.getApps().main(), appID)
+        if state == "ready":
+            return True
+        elif state == "failed":
+            return False
+
+    return waitFor(check, args.timeout, args.pollInterval)
+
+
+scenarios = {
+    "getBackups": benchGetBackups,
+    "takeSnap+wait": benchTakeSnap,
+    "restoreApp+wait": benchRestoreApp,
+}
+
+
+def runScenario(func, appIDs, args):
+    """Run func args.iterations times, returning the success rate and latency percentiles.
+    SystemExit is caught as well, as that's how apicall() reports transport failures."""
+    latencies = []
+    successes = 0
+    for counter in range(args.iterations):
+        appID = appIDs[counter % len(appIDs)]
+        start = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                ok = func(appID, args)
+        except (Exception, SystemExit):
+            ok = False
+        latencies.append(time.perf_counter() - start)
+        if ok:
+            successes += 1
+    return {
+        "successRate": successes / args.iterations,
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure astraSDK success rate and latency under injected API faults"
+    )
+    parser.add_argument(
+        "-p",
+        "--profiles",
+        nargs="*",
+        default=list(astraMock.astraMock.faultProfiles),
+        choices=list(astraMock.astraMock.faultProfiles),
+        help="fault profiles to run (default: all)",
+    )
+    parser.add_argument(
+        "-s",
+        "--scenarios",
+        nargs="*",
+        default=list(scenarios),
+        choices=list(scenarios),
+        help="scenarios to run (default: all)",
+    )
+    parser.add_argument("-n", "--iterations", default=20, type=int, help="runs per scenario")
+    parser.add_argument("-a", "--apps", default=20, type=int, help="apps in the mock fleet")
+    parser.add_argument("-l", "--latency", default=0.005, type=float, help="base API latency")
+    parser.add_argument("--snapSeconds", default=0.2, type=float)
+    parser.add_argument("--restoreSeconds", default=0.2, type=float)
+    parser.add_argument("--pollInterval", default=0.1, type=float)
+    parser.add_argument("-t", "--timeout", default=10, type=float, help="max wait per operation")
+    parser.add_argument("-o", "--output", default="table", choices=["json", "table"])
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmpDir:
+        # getConfig() looks next to sys.argv[0] first
+        sys.argv[0] = os.path.join(tmpDir, "faultBench.py")
+        for profile in args.profiles:
+            mock = astraMock.astraMock(
+                apps=args.apps,
+                latency=args.latency,
+                snapSeconds=args.snapSeconds,
+                restoreSeconds=args.restoreSeconds,
+                faults=profile,
+            )
+            appIDs = list(mock.apps)
+            with mock:
+                mock.writeConfig(tmpDir)
+                for name in args.scenarios:
+                    result = runScenario(scenarios[name], appIDs, args)
+                    result.update({"profile": profile, "scenario": name})
+                    results.append(result)
+                    print(f"{profile:>10} {name:<16} done", file=sys.stderr)
+            for result in results:
+                if result["profile"] == profile:
+                    result["faultsInjected"] = dict(mock.faultCounts)
+
+    if args.output == "json":
+        print(json.dumps(results))
+    else:
+        tabHeader = ["profile", "scenario", "successRate", "p50 (s)", "p99 (s)"]
+        tabData = [
+            [
+                r["profile"],
+                r["scenario"],
+                f"{r['successRate']:.0%}",
+                f"{r['p50']:.3f}",
+                f"{r['p99']:.3f}",
+            ]
+            for r in results
+        ]
+        print(tabulate(tabData, tabHeader, tablefmt="grid"))
+
+
+if __name__ == "__main__":
+    main()
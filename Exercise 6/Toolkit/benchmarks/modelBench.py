@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""
+   Copyright 2021 NetApp, Inc
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from tabulate import tabulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import astraFleet  # noqa: E402
+import astraModels  # noqa: E402
+
+
+def measure(build):
+    """Return what build() returns, the bytes it holds on to, and how long it took.  It's
+    timed on a separate run, as tracing the allocations slows it down several times over."""
+    gc.collect()
+    start = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    ret = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return ret, size, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the memory held by raw SDK dicts and by astraModels objects"
+    )
+    parser.add_argument("-n", "--count", default=100000, type=int, help="objects per kind")
+    parser.add_argument(
+        "-k",
+        "--kinds",
+        nargs="*",
+        default=["snapshots", "backups", "apps"],
+        choices=["snapshots", "backups", "apps", "namespaces", "hooks"],
+    )
+    parser.add_argument("-o", "--output", default="table", choices=["json", "table"])
+    args = parser.parse_args()
+
+    perApp = 100
+    fleet = astraFleet.astraFleet(
+        apps=max(args.count // perApp, 1) if {"snapshots", "backups"} & set(args.kinds) else 1,
+        clusters=4,
+        snapshotsPerApp=perApp,
+        backupsPerApp=perApp,
+        hooksPerApp=0,
+        assetsPerApp=0,
+    )
+    results = []
+    for kind in args.kinds:
+        if kind == "apps":
+            source = astraFleet.astraFleet(apps=args.count, snapshotsPerApp=0, backupsPerApp=0)
+        elif kind == "namespaces":
+            source = astraFleet.astraFleet(
+                apps=1, clusters=10, namespacesPerCluster=args.count // 10 - 4
+            )
+        elif kind == "hooks":
+            source = astraFleet.astraFleet(
+                apps=args.count // 10, hooksPerApp=10, snapshotsPerApp=0, backupsPerApp=0
+            )
+        else:
+            source = fleet
+        # Start from the JSON text, as the SDK does, so nothing is shared with the fleet
+        text = json.dumps(source.listing(kind)["items"][: args.count])
+        count = len(json.loads(text))
+        del source
+
+        raw, rawSize, rawTime = measure(lambda: json.loads(text))
+        for keepRaw in (True, False):
+            models, size, elapsed = measure(
+                lambda raw=raw, keepRaw=keepRaw: astraModels.fromList(kind, raw, keepRaw=keepRaw)
+            )
+            results.append(
+                {
+                    "kind": kind,
+                    "count": count,
+                    "keepRaw": keepRaw,
+                    "dictBytes": rawSize,
+                    "modelBytes": size,
+                    "saved": 1 - size / rawSize,
+                    "loadSeconds": rawTime,
+                    "buildSeconds": elapsed,
+                }
+            )
+            del models
+        del raw
+
+    if args.output == "json":
+        print(json.dumps(results))
+    else:
+        tabHeader = [
+            "kind",
+            "count",
+            "keepRaw",
+            "dict MB",
+            "model MB",
+            "saved",
+            "json.loads (s)",
+            "build (s)",
+        ]
+        tabData = [
+            [
+                r["kind"],
+                r["count"],
+                r["keepRaw"],
+                f"{r['dictBytes'] / 2**20:.1f}",
+                f"{r['modelBytes'] / 2**20:.1f}",
+                f"{r['saved']:.0%}",
+                f"{r['loadSeconds']:.3f}",
+                f"{r['buildSeconds']:.3f}",
+            ]
+            for r in results
+        ]
+        print(tabulate(tabData, tabHeader, tablefmt="grid"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+   Copyright 2021 NetApp, Inc
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+toolkitDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time a toolkit.py command replayed from a recorded cassette, for example:\n"
+        "  ASTRATOOLKITS_RECORD=list.jsonl.gz ./toolkit.py list snapshots\n"
+        "  python benchmarks/replayBench.py list.jsonl.gz -- list snapshots",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("cassette", help="cassette file recorded with ASTRATOOLKITS_RECORD")
+    parser.add_argument("-n", "--iterations", default=5, type=int, help="number of runs")
+    parser.add_argument(
+        "-s",
+        "--speed",
+        default=0,
+        type=float,
+        help="recorded latency multiplier (0: no latency, 1: original latency)",
+    )
+    # Everything after "--" is passed through to toolkit.py untouched
+    argv = sys.argv[1:]
+    toolkitArgs = argv[argv.index("--") + 1 :] if "--" in argv else []
+    args = parser.parse_args(argv[: argv.index("--")] if "--" in argv else argv)
+    if not toolkitArgs:
+        parser.error("toolkit.py arguments must be given after '--'")
+
+    env = dict(os.environ)
+    env.pop("ASTRATOOLKITS_RECORD", None)
+    env["ASTRATOOLKITS_REPLAY"] = os.path.abspath(args.cassette)
+    env["ASTRATOOLKITS_REPLAY_SPEED"] = str(args.speed)
+    timings = []
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+        ret = subprocess.run(
+            [sys.executable, os.path.join(toolkitDir, "toolkit.py")] + toolkitArgs,
+            env=env,
+            stdout=subprocess.DEVNULL,
+        )
+        timings.append(time.perf_counter() - start)
+        if ret.returncode:
+            raise SystemExit(f"toolkit.py {' '.join(toolkitArgs)} returned {ret.returncode}")
+    print(
+        f"toolkit.py {' '.join(toolkitArgs)}: runs={len(timings)} "
+        f"min={min(timings):.3f}s median={statistics.median(timings):.3f}s "
+        f"max={max(timings):.3f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+"""
+   Copyright 2021 NetApp, Inc
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from tabulate import tabulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import astraInventory  # noqa: E402
+import astraMock  # noqa: E402
+import astraSDK  # noqa: E402
+import astraSync  # noqa: E402
+
+
+def churn(mock, fraction):
+    """Create, complete and delete roughly fraction of the mock's snapshots and backups, the
+    way a normal protection schedule would between two refreshes"""
+    apps = list(mock.apps)
+    changes = max(int(sum(len(s) for s in mock.snaps.values()) * fraction), 1)
+    for counter in range(changes):
+        appID = apps[counter % len(apps)]
+        mock.dispatch("post", f"k8s/v1/apps/{appID}/appSnaps", {"name": f"churn-{counter}"})
+        oldest = next(iter(mock.snaps[appID]), None)
+        if oldest:
+            mock.dispatch("delete", f"k8s/v1/apps/{appID}/appSnaps/{oldest}", None)
+        if counter % 4 == 0:
+            mock.dispatch("post", f"k8s/v1/apps/{appID}/appBackups", {"name": f"churn-{counter}"})
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare a full crawl of an account with an incremental inventory refresh"
+    )
+    parser.add_argument("-a", "--apps", default=200, type=int)
+    parser.add_argument("--snapshotsPerApp", default=50, type=int)
+    parser.add_argument("--backupsPerApp", default=20, type=int)
+    parser.add_argument("-l", "--latency", default=0.0, type=float, help="API latency")
+    parser.add_argument(
+        "-c", "--churn", default=0.01, type=float, help="fraction of snapshots changed"
+    )
+    parser.add_argument("-o", "--output", default="table", choices=["json", "table"])
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmpDir:
+        # getConfig() looks next to sys.argv[0] first
+        sys.argv[0] = os.path.join(tmpDir, "syncBench.py")
+        mock = astraMock.astraMock(
+            apps=args.apps,
+            snapshotsPerApp=args.snapshotsPerApp,
+            backupsPerApp=args.backupsPerApp,
+            latency=args.latency,
+        )
+        with mock:
+            mock.writeConfig(tmpDir)
+
+            before = mock.requestCount
+            start = time.perf_counter()
+            astraSDK.getApps().main()
+            astraSDK.getSnaps().main()
+            astraSDK.getBackups().main()
+            astraSDK.getHooks().main()
+            results.append(
+                {
+                    "run": "SDK crawl (list apps/snapshots/backups/hooks)",
+                    "calls": mock.requestCount - before,
+                    "seconds": time.perf_counter() - start,
+                }
+            )
+
+            sync = astraSync.inventorySync(astraInventory.inventory())
+            stats = sync.refresh()
+            results.append(dict(stats, run="initial sync (every kind)"))
+            stats = sync.refresh()
+            results.append(dict(stats, run="refresh, no changes"))
+            # Make sure the new objects get a later modificationTimestamp than the watermark
+            time.sleep(1)
+            changes = churn(mock, args.churn)
+            stats = sync.refresh()
+            results.append(dict(stats, run=f"refresh, {changes} snapshots churned"))
+
+            inventorySnaps = set(sync.inventory.objects["snapshots"])
+            mockSnaps = {snapID for snaps in mock.snaps.values() for snapID in snaps}
+            if inventorySnaps != mockSnaps:
+                raise SystemExit("inventory out of sync with the mock server")
+
+    if args.output == "json":
+        print(json.dumps(results))
+    else:
+        tabHeader = ["run", "calls", "KB", "added", "changed", "removed", "seconds"]
+        tabData = [
+            [
+                r["run"],
+                r["calls"],
+                f"{r['bytes'] / 1024:,.0f}" if "bytes" in r else "",
+                r.get("added", ""),
+                r.get("changed", ""),
+                r.get("removed", ""),
+                f"{r['seconds']:.3f}",
+            ]
+            for r in results
+        ]
+        print(tabulate(tabData, tabHeader, tablefmt="grid"))
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,7 @@
 """
 
 import sys
+import astraInventory
 import astraSDK
 import getopt
 
@@ -76,12 +77,11 @@ except NameError:
     sys.exit(0)
 
 try:
-    appGet = astraSDK.getApps().main(cluster=cluster_name, namespace=application_name)
-
-    for i in appGet:
-        if appGet[i][0] == application_name:
-            print(i)
-            appId = i
+    app = astraInventory.getInventory().first(
+        "apps", name=application_name, clusterName=cluster_name
+    )
+    print(app.id)
+    appId = app.id
 
     backupId = astraSDK.takeBackup().main(appID=appId, backupName=backup_name)
 except Exception:
@@ -16,6 +16,7 @@
 """
 
 import sys
+import astraInventory
 import astraSDK
 import getopt
 
@@ -72,12 +73,11 @@ except NameError:
     sys.exit(0)
 
 try:
-    appGet = astraSDK.getApps().main(cluster=cluster_name, namespace=application_name)
-
-    for i in appGet:
-        if appGet[i][0] == application_name:
-            print(i)
-            appId = i
+    app = astraInventory.getInventory().first(
+        "apps", name=application_name, clusterName=cluster_name
+    )
+    print(app.id)
+    appId = app.id
 
     snapId = astraSDK.takeSnap().main(appID=appId, snapName=snapshot_name)
 except Exception:
@@ -17,9 +17,13 @@
 
 import time
 from func_timeout import func_timeout, FunctionTimedOut
+import astraInventory
 import astraSDK
 import argparse
 
+# Every lookup below shares one inventory, so each kind of object is only fetched once
+inventory = astraInventory.getInventory()
+
 errorText = """
 ----Error----
 Possible Issues:
@@ -50,23 +54,19 @@ class SnapshotDoesNotExistinAstraControl(Exception):
 
 
 def getAppID(app_name):
-    Apps = astraSDK.getApps().main()
-    for key1 in Apps:
-        if Apps[key1][0] == app_name:
-            app_id = key1
-            return app_id
+    app = inventory.first("apps", name=app_name)
+    if app:
+        return app.id
     error = "Application " + app_name + " does not exist in Astra Control"
     print("Error: " + error)
     raise AppDoesNotExistinAstraControl(error)
 
 
 def getBackupID(app_name, backup_name):
-    Backups = astraSDK.getBackups().main(appFilter=app_name)
-    for key1 in Backups:
-        for key2 in Backups[key1]:
-            if key2 == backup_name:
-                backup_id = Backups[key1][key2][0]
-                return backup_id
+    app = inventory.first("apps", name=app_name)
+    backup = app and inventory.first("backups", appID=app.id, name=backup_name)
+    if backup:
+        return backup.id
     error = (
         "Backup "
         + backup_name
@@ -79,12 +79,10 @@ def getBackupID(app_name, backup_name):
 
 
 def getSnapshotID(app_name, snap_name):
-    Snapshots = astraSDK.getSnaps().main(appFilter=app_name)
-    for key1 in Snapshots:
-        for key2 in Snapshots[key1]:
-            if key2 == snap_name:
-                snapshot_id = Snapshots[key1][key2][0]
-                return snapshot_id
+    app = inventory.first("apps", name=app_name)
+    snapshot = app and inventory.first("snapshots", appID=app.id, name=snap_name)
+    if snapshot:
+        return snapshot.id
     error = (
         "Snapshot "
         + snap_name
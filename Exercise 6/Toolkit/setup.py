@@ -10,7 +10,24 @@ with open("requirements.txt", "r") as req:
 setuptools.setup(
     name="actoolkit",
     version="2.2.1",
-    py_modules=["toolkit", "astraSDK"],
+    py_modules=[
+        "toolkit",
+        "astraSDK",
+        "astraMock",
+        "astraFleet",
+        "astraModels",
+        "astraInventory",
+        "astraJournal",
+        "astraSync",
+        "astraStore",
+        "astraFilter",
+        "astraOutput",
+        "astraTime",
+        "astraReport",
+        "astraBulk",
+        "astraApply",
+        "astraTasks",
+    ],
     author="Michael Haigh",
     author_email="Michael.Haigh@netapp.com",
     description="Toolkit and SDK for interacting with Astra Control",
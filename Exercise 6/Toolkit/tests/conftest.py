@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The toolkit's modules aren't a package, they're imported from the directory above
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from astraMock import astraMockServer  # noqa: E402,F401
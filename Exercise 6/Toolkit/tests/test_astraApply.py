@@ -0,0 +1,89 @@
+import collections
+import pytest
+
+import astraApply
+import astraOutput
+import astraSDK
+
+
+@pytest.mark.parametrize("astraMockServer", [{"apps": 4}], indirect=True)
+def test_apply_converges(astraMockServer, tmp_path):
+    apps = astraSDK.getApps().main()["items"]
+    spec = {
+        "scripts": [{"name": "freeze", "source": "fsfreeze -f /data"}],
+        "schedules": [
+            {"granularity": "daily", "hour": 3, "snapshotRetention": 2, "backupRetention": 2}
+        ],
+        "apps": [
+            {
+                "name": app["name"],
+                "cluster": app["clusterName"],
+                "hooks": [{"name": "freeze", "script": "freeze", "operation": "pre-snapshot"}],
+            }
+            for app in apps
+        ]
+        + [{"name": "newapp", "cluster": "cluster-0", "namespace": "unmanaged-0"}],
+    }
+    path = tmp_path / "desired.yaml"
+    path.write_text(astraOutput.yamlDump(spec))
+
+    first = astraApply.reconciler().main(astraApply.loadSpec(path))
+    states = collections.Counter((row["kind"], row["state"]) for row in first["items"])
+    assert states == {
+        ("script", "created"): 1,
+        ("app", "unchanged"): 4,
+        ("app", "managed"): 1,
+        ("schedule", "created"): 5,
+        ("hook", "created"): 4,
+    }
+
+    again = astraApply.reconciler().main(astraApply.loadSpec(path))
+    assert len(again["items"]) == len(first["items"])
+    assert {row["state"] for row in again["items"]} == {"unchanged"}
+
+
+def hookSpec(apps, source, operation):
+    return {
+        "scripts": [{"name": "freeze", "source": source}],
+        "apps": [
+            {
+                "name": app["name"],
+                "cluster": app["clusterName"],
+                "hooks": [{"name": "freeze", "script": "freeze", "operation": operation}],
+            }
+            for app in apps
+        ],
+    }
+
+
+@pytest.mark.parametrize("astraMockServer", [{"apps": 3}], indirect=True)
+def test_apply_updates(astraMockServer, tmp_path):
+    apps = astraSDK.getApps().main()["items"]
+    path = tmp_path / "desired.yaml"
+    path.write_text(astraOutput.yamlDump(hookSpec(apps, "echo one", "pre-snapshot")))
+    astraApply.reconciler().main(astraApply.loadSpec(path))
+
+    path.write_text(astraOutput.yamlDump(hookSpec(apps, "echo two", "post-backup")))
+    changed = astraApply.reconciler().main(astraApply.loadSpec(path))
+    states = collections.Counter((row["kind"], row["state"]) for row in changed["items"])
+    assert states[("script", "updated")] == 1 and states[("hook", "updated")] == 3
+
+    again = astraApply.reconciler().main(astraApply.loadSpec(path))
+    assert {row["state"] for row in again["items"]} == {"unchanged"}
+
+
+@pytest.mark.parametrize(
+    "astraMockServer", [{"apps": 10, "faults": {"lost": 0.3}, "seed": 2}], indirect=True
+)
+def test_apply_lost_posts(astraMockServer, tmp_path):
+    mock = astraMockServer
+    apps = list(mock.apps.values())
+    path = tmp_path / "desired.yaml"
+    path.write_text(astraOutput.yamlDump(hookSpec(apps, "echo one", "pre-snapshot")))
+    results = astraApply.reconciler().main(astraApply.loadSpec(path))
+    assert mock.faultCounts["lost"] > 0
+    assert {row["state"] for row in results["items"] if row["kind"] != "app"} == {"created"}
+    # Each POST whose response was lost was found by its key, rather than made again
+    assert [s["name"] for s in mock.scripts.values()].count("freeze") == 1
+    hooks = collections.Counter(h["appID"] for h in mock.hooks.values() if h["name"] == "freeze")
+    assert hooks == {app["id"]: 1 for app in apps}
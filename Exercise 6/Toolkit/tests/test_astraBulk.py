@@ -0,0 +1,301 @@
+import pytest
+
+import astraBulk
+import astraInventory
+import astraSDK
+import astraTime
+
+DAY = 86400
+
+
+@pytest.mark.parametrize(
+    "astraMockServer", [{"apps": 12, "clusters": 2, "snapSeconds": 0.3}], indirect=True
+)
+def test_bulk_snapshots(astraMockServer):
+    mock = astraMockServer
+    apps = astraSDK.getApps().main()["items"]
+    cluster = apps[0]["clusterName"]
+    selected = astraBulk.selectApps(apps, cluster=cluster)
+    assert selected and all(app["clusterName"] == cluster for app in selected)
+    assert len(selected) < len(apps)
+
+    results = astraBulk.bulkProtect("snapshot", concurrency=4, interval=0.1).main(
+        selected, "pre-maint"
+    )
+    rows = {row["appID"]: row for row in results["items"]}
+    assert set(rows) == {app["id"] for app in selected}
+    assert {row["state"] for row in rows.values()} == {"completed"}
+    assert all(row["attempts"] == 1 for row in rows.values())
+    for app in apps:
+        taken = [
+            snap["id"] for snap in mock.snaps[app["id"]].values() if snap["name"] == "pre-maint"
+        ]
+        assert taken == ([rows[app["id"]]["protectionID"]] if app["id"] in rows else [])
+
+
+@pytest.mark.parametrize("astraMockServer", [{"apps": 6, "snapSeconds": 10}], indirect=True)
+def test_bulk_snapshots_background(astraMockServer):
+    apps = astraSDK.getApps().main()["items"]
+    results = astraBulk.bulkProtect("snapshot").main(apps, "quick", background=True)
+    assert {row["state"] for row in results["items"]} == {"submitted"}
+
+
+@pytest.mark.parametrize(
+    "astraMockServer", [{"apps": 12, "clusters": 2, "backupSeconds": 0.3}], indirect=True
+)
+def test_backup_scheduler_caps(astraMockServer):
+    mock = astraMockServer
+    apps = astraSDK.getApps().main()["items"]
+    clusterOf = {app["id"]: app["clusterID"] for app in apps}
+    peaks = {"all": 0}
+    dispatch = mock.dispatch
+
+    def counting(method, endpoint, body, params=None):
+        ret = dispatch(method, endpoint, body, params)
+        if method == "post" and endpoint.endswith("/appBackups"):
+            inFlight = [
+                clusterOf[appID]
+                for appID, backups in mock.backups.items()
+                for backup in backups.values()
+                if backup["state"] == "pending"
+            ]
+            peaks["all"] = max(peaks["all"], len(inFlight))
+            for clusterID in set(inFlight):
+                peaks[clusterID] = max(peaks.get(clusterID, 0), inFlight.count(clusterID))
+        return ret
+
+    mock.dispatch = counting
+    results = astraBulk.backupScheduler(maxInFlight=3, perCluster=2, interval=0.1).main(
+        apps, "nightly"
+    )
+    assert {row["state"] for row in results["items"]} == {"completed"}
+    for app in apps:
+        taken = [b for b in mock.backups[app["id"]].values() if b["name"] == "nightly"]
+        assert len(taken) == 1
+    assert 0 < peaks.pop("all") <= 3
+    assert peaks and all(peak <= 2 for peak in peaks.values())
+    assert all(row["protectionID"] for row in results["items"])
+
+
+def setSnapshots(mock, states):
+    """Give each app's snapshots, youngest first, an age of i days and an hour and a state of
+    states, returning {appID: [snapshot IDs, youngest first]}"""
+    now = astraTime.currentEpoch()
+    ids = {}
+    for appID, snaps in mock.snaps.items():
+        ids[appID] = []
+        for i, (snapID, snap) in enumerate(snaps.items()):
+            snap["state"] = states[i]
+            snap["metadata"]["creationTimestamp"] = astraTime.formatTimestamp(now - i * DAY - 3600)
+            ids[appID].append(snapID)
+    return ids
+
+
+# The five snapshots of each app, youngest first
+states = ["completed", "failed", "completed", "completed", "pending"]
+
+
+@pytest.mark.parametrize(
+    "keepLast, keepDays, pruned",
+    [
+        # The youngest two completed ones are kept, failed ones don't count, pending ones stay
+        (2, None, [1, 3]),
+        # Everything older than 2 days goes, but pending ones stay
+        (None, 2, [2, 3]),
+        # An object either keeps is kept
+        (2, 2, [3]),
+    ],
+)
+@pytest.mark.parametrize("astraMockServer", [{"apps": 3, "snapshotsPerApp": 5}], indirect=True)
+def test_retention_plan(astraMockServer, keepLast, keepDays, pruned):
+    ids = setSnapshots(astraMockServer, states)
+    inv = astraInventory.inventory()
+    assert inv.ensure("apps") and inv.ensure("snapshots")
+    plan = astraBulk.retentionPlan(inv, "snapshots", keepLast, keepDays)
+    assert {obj.id for obj in plan} == {appIDs[i] for appIDs in ids.values() for i in pruned}
+    # Oldest first
+    epochs = [obj.createdEpoch for obj in plan]
+    assert epochs == sorted(epochs)
+
+
+def test_retention_plan_needs_a_policy():
+    with pytest.raises(ValueError):
+        astraBulk.retentionPlan(astraInventory.inventory(), "snapshots")
+
+
+@pytest.mark.parametrize("astraMockServer", [{"apps": 3, "snapshotsPerApp": 5}], indirect=True)
+def test_prune(astraMockServer):
+    mock = astraMockServer
+    ids = setSnapshots(mock, states)
+    appID = next(iter(mock.apps))
+
+    dryRun = astraBulk.pruner(inventory=astraInventory.inventory()).main(
+        ["snapshots"], keepLast=2, app=appID, dryRun=True
+    )
+    assert {row["id"] for row in dryRun["items"]} == {ids[appID][1], ids[appID][3]}
+    assert {row["state"] for row in dryRun["items"]} == {"planned"}
+    assert all(len(snaps) == 5 for snaps in mock.snaps.values())
+
+    # An object deleted behind the inventory's back is gone, rather than failed
+    inv = astraInventory.inventory()
+    assert inv.ensure("apps") and inv.ensure("snapshots")
+    del mock.snaps[appID][ids[appID][1]]
+    results = astraBulk.pruner(inventory=inv, concurrency=2).main(
+        ["snapshots"], keepLast=2, app=appID
+    )
+    assert {row["id"]: row["state"] for row in results["items"]} == {
+        ids[appID][1]: "gone",
+        ids[appID][3]: "deleted",
+    }
+    assert set(mock.snaps[appID]) == {ids[appID][i] for i in (0, 2, 4)}
+    assert all(len(mock.snaps[other]) == 5 for other in mock.snaps if other != appID)
+    # The inventory is kept up to date, so a second run has nothing left to prune
+    again = astraBulk.pruner(inventory=inv).main(["snapshots"], keepLast=2, app=appID)
+    assert again["items"] == []
+
+
+hourly = astraBulk.policySchedule(
+    {"granularity": "hourly", "snapshotRetention": 2, "backupRetention": 0}
+)
+daily = astraBulk.policySchedule(
+    {"granularity": "daily", "hour": 2, "snapshotRetention": 7, "backupRetention": 7}
+)
+
+
+def test_planner_hash():
+    planner = astraBulk.schedulePlanner("hash", window=3)
+    plans = [planner.plan(f"app-{i}", [hourly, daily]) for i in range(200)]
+    # The same app always gets the same slots
+    assert astraBulk.schedulePlanner("hash", window=3).plan("app-0", [hourly, daily]) == plans[0]
+    assert {plan[1]["hour"] for plan in plans} == {"2", "3", "4"}
+    assert len({plan[0]["minute"] for plan in plans}) > 40
+    assert all(plan[0]["hour"] == "*" for plan in plans)
+
+
+def test_planner_balance():
+    planner = astraBulk.schedulePlanner("balance")
+    plans = [planner.plan(f"app-{i}", [hourly]) for i in range(120)]
+    # Every minute of the hour is taken, by two apps each
+    assert sorted(int(plan[0]["minute"]) for plan in plans) == sorted(list(range(60)) * 2)
+    assert set(planner.load) == {2}
+
+    # An app's current schedule inside the window stays put, rather than moving
+    current = [dict(hourly, minute="17")]
+    assert planner.plan("app-0", [hourly], current)[0]["minute"] == "17"
+    assert astraBulk.schedulePlanner("none").plan("app-0", [hourly]) == [hourly]
+    with pytest.raises(ValueError):
+        astraBulk.schedulePlanner("random")
+
+
+@pytest.mark.parametrize("astraMockServer", [{"apps": 30}], indirect=True)
+def test_apply_policy_balanced(astraMockServer):
+    mock = astraMockServer
+    apps = astraSDK.getApps().main()["items"]
+    planner = astraBulk.schedulePlanner("balance")
+    results = astraBulk.policyApplier(concurrency=4).main(apps, [hourly], planner=planner)
+    assert {row["state"] for row in results["items"]} == {"created"}
+    minutes = [
+        schedule["minute"]
+        for schedules in mock.schedules.values()
+        for schedule in schedules.values()
+    ]
+    assert len(minutes) == len(set(minutes)) == 30
+
+    # Applying the policy again keeps every schedule where it is
+    again = astraBulk.policyApplier().main(
+        apps, [hourly], planner=astraBulk.schedulePlanner("balance")
+    )
+    assert {row["state"] for row in again["items"]} == {"unchanged"}
+
+
+@pytest.mark.parametrize("astraMockServer", [{"apps": 4}], indirect=True)
+def test_apply_policy_updates(astraMockServer):
+    mock = astraMockServer
+    apps = astraSDK.getApps().main()["items"]
+    astraBulk.policyApplier().main(apps, [hourly, daily])
+
+    later = dict(daily, hour="5", backupRetention="14")
+    planned = astraBulk.policyApplier().main(apps, [later], dryRun=True)
+    assert {row["state"] for row in planned["items"]} == {"planned"}
+    assert all(
+        schedule["hour"] == "2"
+        for schedules in mock.schedules.values()
+        for schedule in schedules.values()
+        if schedule["granularity"] == "daily"
+    )
+
+    results = astraBulk.policyApplier().main(apps, [later])
+    assert {(row["action"], row["state"]) for row in results["items"]} == {("update", "updated")}
+    for app in apps:
+        schedules = {s["granularity"]: s for s in mock.schedules[app["id"]].values()}
+        # The hourly schedule, which the policy no longer has, is left as it was
+        assert set(schedules) == {"hourly", "daily"}
+        assert schedules["hourly"]["minute"] == hourly["minute"]
+        assert (schedules["daily"]["hour"], schedules["daily"]["backupRetention"]) == ("5", "14")
+
+
+@pytest.mark.parametrize(
+    "policy, error",
+    [
+        ("- granularity: daily\n  snapshotRetention: 7\n  backupRetention: 7\n", "require hour"),
+        ("schedules: []\n", "list of schedules"),
+        ("- {granularity: yearly}\n", "granularity must be"),
+        (
+            "- {granularity: hourly, hour: 3, snapshotRetention: 1, backupRetention: 1}\n",
+            "not specify hour",
+        ),
+        ("- {granularity: hourly, snapshotRetention: 99, backupRetention: 1}\n", "from 0 to 59"),
+        (
+            "- {granularity: hourly, snapshotRetention: 1, backupRetention: 1}\n" * 2,
+            "same granularity",
+        ),
+    ],
+)
+def test_load_policy_invalid(tmp_path, policy, error):
+    path = tmp_path / "policy.yaml"
+    path.write_text(policy)
+    with pytest.raises(ValueError, match=error):
+        astraBulk.loadPolicy(str(path))
+
+
+def test_load_policy(tmp_path):
+    path = tmp_path / "policy.yaml"
+    path.write_text(
+        "schedules:\n"
+        "- {granularity: hourly, minute: 15, snapshotRetention: 2, backupRetention: 0}\n"
+        "- {granularity: daily, hour: 2, snapshotRetention: 7, backupRetention: 7}\n"
+    )
+    assert astraBulk.loadPolicy(str(path)) == [dict(hourly, minute="15"), daily]
+    with pytest.raises(ValueError, match="not read"):
+        astraBulk.loadPolicy(str(tmp_path / "missing.yaml"))
+
+
+@pytest.mark.parametrize("astraMockServer", [{"apps": 2, "clusters": 2}], indirect=True)
+def test_bulk_manage(astraMockServer):
+    mock = astraMockServer
+    clusterID = next(c["id"] for c in mock.clusters.values() if c["name"] == "cluster-0")
+    wanted = {"unmanaged-0", "unmanaged-1", "unmanaged-2"}
+
+    planned = astraBulk.bulkManage().main("cluster-0", ["unmanaged-[0-2]"], dryRun=True)
+    assert {row["namespace"] for row in planned["items"]} == wanted
+    assert len(mock.apps) == 2
+
+    results = astraBulk.bulkManage().main("cluster-0", ["unmanaged-[0-2]"], protect=True)
+    assert {row["state"] for row in results["items"]} == {"managed"}
+    for row in results["items"]:
+        app = mock.apps[row["appID"]]
+        assert (app["name"], app["clusterID"]) == (row["namespace"], clusterID)
+        assert row["schedules"] == len(mock.schedules[row["appID"]])
+        assert row["schedules"] == len(astraBulk.defaultSchedules)
+    states = {
+        ns["name"]: ns["namespaceState"]
+        for ns in mock.namespaces.values()
+        if ns["clusterID"] == clusterID
+    }
+    assert {name for name, state in states.items() if state == "managed"} >= wanted
+    assert states["unmanaged-3"] == "discovered"
+
+    # The namespaces are part of apps now, so there's nothing left to manage
+    again = astraBulk.bulkManage().main("cluster-0", ["unmanaged-[0-2]"])
+    assert again == {"items": []}
+    assert astraBulk.bulkManage().main("no-such-cluster") is False
@@ -0,0 +1,111 @@
+import pytest
+import time
+
+import astraFilter
+import astraSDK
+
+now = time.time()
+objects = [
+    {
+        "name": "a",
+        "state": "ready",
+        "clusterName": "prod-east",
+        "namespaces": ["x", "y"],
+        "metadata": {"creationTimestamp": astraFilter.timestamp(now - 3600)},
+        "size": 3,
+        "protected": True,
+    },
+    {
+        "name": "b",
+        "state": "failed",
+        "clusterName": "dev",
+        "namespaces": ["z"],
+        "metadata": {"creationTimestamp": astraFilter.timestamp(now - 3 * 86400)},
+        "size": 10,
+        "protected": False,
+    },
+    {
+        "name": "c",
+        "state": "ready",
+        "clusterName": "prod-west",
+        "namespaces": [],
+        "metadata": {},
+        "labels": {"tier": {"name": "db"}},
+    },
+]
+
+
+def names(where, sortBy=None, limit=None):
+    return [obj["name"] for obj in astraFilter.select(objects, where, sortBy, limit)]
+
+
+@pytest.mark.parametrize(
+    "where, expected",
+    [
+        (None, ["a", "b", "c"]),
+        ("state=ready", ["a", "c"]),
+        ("state!=ready", ["b"]),
+        ("state=ready and clusterName~prod* and age<2h", ["a"]),
+        ("not state=ready or size>5", ["b"]),
+        ("(state=failed or name='c') and clusterName!~prod-w*", ["b"]),
+        ("size>=3 and size<5", ["a"]),
+        ("namespaces=y", ["a"]),
+        ("protected=true", ["a"]),
+        ("age>1d", ["b"]),
+        ("labels.tier.name=db", ["c"]),
+    ],
+)
+def test_select_where(where, expected):
+    assert names(where) == expected
+
+
+@pytest.mark.parametrize(
+    "sortBy, limit, expected",
+    [
+        ("name:desc", None, ["c", "b", "a"]),
+        ("-name", None, ["c", "b", "a"]),
+        ("age", 2, ["a", "b"]),
+        ("size:desc", 2, ["b", "a"]),
+        ("size", None, ["a", "b", "c"]),
+        ("state,name:desc", None, ["b", "c", "a"]),
+        ("state,name:desc", 2, ["b", "c"]),
+    ],
+)
+def test_select_sort_limit(sortBy, limit, expected):
+    assert names(None, sortBy, limit) == expected
+
+
+def test_select_sorts_mixed_types():
+    mixed = [{"n": "x"}, {"n": 2}, {"n": None}, {"n": 1.5}]
+    assert [obj["n"] for obj in astraFilter.select(mixed, None, "n")] == [1.5, 2, "x", None]
+    assert [obj["n"] for obj in astraFilter.select(mixed, None, "n:desc")] == ["x", 2, 1.5, None]
+
+
+@pytest.mark.parametrize(
+    "where", ["state=", "state==", "state=ready and", "foo", "(state=a", "age=2h", "age<2x"]
+)
+def test_parse_errors(where):
+    with pytest.raises(ValueError):
+        astraFilter.filterExpression(where)
+
+
+def test_server_filter():
+    expression = astraFilter.filterExpression(
+        "state=ready and clusterName~prod* and age<2h and size=3"
+    )
+    server = expression.serverFilter({"state", "clusterName"})
+    assert server.startswith("state eq 'ready' and metadata.creationTimestamp gt '")
+    assert "clusterName" not in server and "size" not in server
+    # An or can't be split into terms the server checks and ones only the client does
+    assert astraFilter.filterExpression("state=ready or age<2h").serverFilter({"state"}) is None
+
+
+@pytest.mark.parametrize("astraMockServer", [{"apps": 10, "snapshotsPerApp": 5}], indirect=True)
+def test_list_where_sort_limit(astraMockServer):
+    snaps = astraSDK.getSnaps().main(where="state=completed", sortBy="age", limit=7)
+    everything = astraSDK.getSnaps().main()["items"]
+    newest = sorted(everything, key=lambda s: s["metadata"]["creationTimestamp"], reverse=True)
+    assert snaps["items"] == newest[:7]
+    appID = next(iter(astraMockServer.apps))
+    hooks = astraSDK.getHooks().main(where=f"appID={appID}")["items"]
+    assert hooks and all(hook["appID"] == appID for hook in hooks)
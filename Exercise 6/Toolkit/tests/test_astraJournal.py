@@ -0,0 +1,57 @@
+import pytest
+
+import astraBulk
+import astraJournal
+import astraSDK
+
+job = {"command": "create snapshots", "name": "nightly"}
+
+
+def test_reopen_needs_resume(tmp_path):
+    path = tmp_path / "nightly.journal"
+    with astraJournal.journal(path, job) as log:
+        log.record("app-1", "planned")
+    with pytest.raises(ValueError):
+        astraJournal.journal(path, job)
+    with pytest.raises(ValueError):
+        astraJournal.journal(path, dict(job, name="weekly"), resume=True)
+    with astraJournal.journal(path, job, resume=True) as log:
+        assert log.event("app-1") == "planned"
+
+
+@pytest.mark.parametrize("astraMockServer", [{"apps": 3, "snapSeconds": 0.3}], indirect=True)
+def test_resume_snapshots(astraMockServer, tmp_path):
+    mock = astraMockServer
+    apps = astraSDK.getApps().main()["items"]
+    done, waiting, todo = apps
+    # A run which was cut short: one app's snapshot completed, and another's submitted
+    doneID = astraSDK.takeSnap().main(done["id"], "nightly")
+    waitingID = astraSDK.takeSnap().main(waiting["id"], "nightly")
+    path = tmp_path / "nightly.journal"
+    with astraJournal.journal(path, job) as log:
+        for app in apps:
+            log.record(app["id"], "planned")
+        log.record(done["id"], "submitted", doneID, name="nightly", attempts=1)
+        log.record(done["id"], "completed", doneID, attempts=1)
+        log.record(waiting["id"], "submitted", waitingID, name="nightly", attempts=1)
+
+    with astraJournal.journal(path, job, resume=True) as log:
+        results = astraBulk.bulkProtect("snapshot", interval=0.1, journal=log).main(apps, "nightly")
+        assert log.counts() == {"completed": 3}
+
+    rows = {row["appID"]: row for row in results["items"]}
+    assert all(row["state"] == "completed" for row in rows.values())
+    assert rows[done["id"]]["protectionID"] == doneID
+    assert rows[waiting["id"]]["protectionID"] == waitingID
+    # Only the app with nothing journaled past planned had another snapshot taken
+    nightly = {
+        app["id"]: [
+            snap["id"] for snap in mock.snaps[app["id"]].values() if snap["name"] == "nightly"
+        ]
+        for app in apps
+    }
+    assert nightly == {
+        done["id"]: [doneID],
+        waiting["id"]: [waitingID],
+        todo["id"]: [rows[todo["id"]]["protectionID"]],
+    }
@@ -0,0 +1,132 @@
+import pytest
+
+import astraBulk
+import astraInventory
+import astraReport
+import astraSDK
+import astraTime
+
+NOW = 10 * 86400
+
+
+@pytest.mark.parametrize("planner", [None, "balance"])
+@pytest.mark.parametrize("astraMockServer", [{"apps": 20}], indirect=True)
+def test_schedule_load(astraMockServer, planner):
+    apps = astraSDK.getApps().main()["items"]
+    hourly = astraBulk.policySchedule(
+        {"granularity": "hourly", "snapshotRetention": 2, "backupRetention": 0}
+    )
+    daily = astraBulk.policySchedule(
+        {"granularity": "daily", "hour": 2, "snapshotRetention": 7, "backupRetention": 7}
+    )
+    astraBulk.policyApplier().main(
+        apps, [hourly, daily], planner=planner and astraBulk.schedulePlanner(planner)
+    )
+    report = astraReport.scheduleLoadReport().main()
+    summary = report["summary"]
+    assert summary["apps"] == 20 and summary["schedules"] == 40
+    assert len(report["items"]) == 60
+    assert sum(row["hourly"] for row in report["items"]) == 20
+    assert sum(row["total"] for row in report["items"]) == 40
+    if planner:
+        # Spread out, each minute of the hour has at most an hourly and a daily start
+        assert summary["peak"] <= 2 and summary["minutesUsed"] >= 20
+    else:
+        # Every app's schedules start on the hour
+        assert summary["peak"] == 40 and summary["peakStart"] == ":00"
+
+    byDay = astraReport.scheduleLoadReport().main(day=True)
+    # An hourly schedule starts 24 times a day
+    assert sum(row["total"] for row in byDay["items"]) == 20 * 24 + 20
+
+
+@pytest.fixture(params=["numpy", "pure Python"])
+def numpyOrNot(request, monkeypatch):
+    """Each test runs with NumPy (when it's installed) and without it"""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(astraReport, "numpy", None)
+
+
+def rpoInventory():
+    """Four apps: a with recent snapshots and a backup, b with only a backup 30 hours ago (and a
+    failed snapshot), c with nothing, and d, on another cluster, with a snapshot from before
+    the window and one half an hour ago"""
+    inv = astraInventory.inventory()
+    inv.load(
+        "apps",
+        [
+            {"id": name, "name": name, "clusterID": cluster, "clusterName": cluster}
+            for name, cluster in [("a", "c0"), ("b", "c0"), ("c", "c0"), ("d", "c1")]
+        ],
+    )
+
+    def points(appID, state, *hours):
+        return [
+            {
+                "id": f"{appID}-{hour}",
+                "name": f"{appID}-{hour}",
+                "appID": appID,
+                "state": state,
+                "metadata": {
+                    "creationTimestamp": astraTime.formatTimestamp(NOW - int(hour * 3600))
+                },
+            }
+            for hour in hours
+        ]
+
+    inv.load(
+        "snapshots",
+        points("a", "completed", 1, 5)
+        + points("b", "failed", 1)
+        + points("d", "completed", 0.5, 200),
+    )
+    inv.load("backups", points("a", "completed", 2) + points("b", "completed", 30))
+    return inv
+
+
+def test_rpo_report(numpyOrNot):
+    report = astraReport.rpoReport(inventory=rpoInventory()).main(target=24, window=7, now=NOW)
+    rows = report["items"]
+    # Worst first
+    assert [row["appID"] for row in rows] == ["c", "b", "a", "d"]
+    figures = {
+        row["appID"]: (
+            row["snapshots"],
+            row["backups"],
+            row["rpoHours"],
+            row["maxGapHours"],
+            row["compliant"],
+        )
+        for row in rows
+    }
+    assert figures == {
+        "a": (2, 1, 1.0, 3.0, True),
+        "b": (0, 1, 30.0, 30.0, False),
+        "c": (0, 0, None, None, False),
+        "d": (2, 0, 0.5, 0.5, True),
+    }
+    assert rows[2]["lastBackup"] == astraTime.formatTimestamp(NOW - 7200)
+    assert rows[2]["backupHours"][22] == 1 and sum(rows[2]["backupHours"]) == 1
+    assert report["summary"] == {
+        "apps": 4,
+        "compliant": 2,
+        "unprotected": 1,
+        "coverage": 50.0,
+        "targetHours": 24,
+        "windowDays": 7,
+    }
+
+    cluster = astraReport.rpoReport(inventory=rpoInventory()).main(cluster="c1", now=NOW)
+    assert [row["appID"] for row in cluster["items"]] == ["d"]
+
+
+def test_rpo_report_hours(numpyOrNot):
+    report = astraReport.rpoReport(inventory=rpoInventory()).main(hours=True)
+    byHour = {row["hour"]: row for row in report["items"]}
+    assert len(byHour) == 24
+    assert sum(row["snapshots"] for row in byHour.values()) == 4
+    assert byHour[23]["snapshots"] == 2
+    assert (byHour[22]["backups"], byHour[22]["appsBackedUp"]) == (1, 1)
+    assert (byHour[18]["backups"], byHour[18]["appsBackedUp"]) == (1, 1)
@@ -0,0 +1,107 @@
+import collections
+import pytest
+import requests
+
+import astraSDK
+import astraTime
+
+
+@pytest.fixture(autouse=True)
+def labelsKept(monkeypatch):
+    """Each test starts out not knowing whether the server drops labels"""
+    monkeypatch.setattr(astraSDK.SDKCommon, "dropsLabels", False)
+
+
+@pytest.mark.parametrize(
+    "astraMockServer", [{"apps": 20, "faults": {"lost": 0.3}, "seed": 3}], indirect=True
+)
+def test_create_after_lost_post(astraMockServer):
+    mock = astraMockServer
+    apps = list(mock.apps.values())
+    snapIDs = [astraSDK.takeSnap().main(app["id"], "idem") for app in apps]
+    assert mock.faultCounts["lost"] > 0
+    assert all(isinstance(snapID, str) for snapID in snapIDs)
+    # A POST whose response was lost is found by its key, rather than made again
+    counts = collections.Counter(
+        appID
+        for appID, snaps in mock.snaps.items()
+        for snap in snaps.values()
+        if snap["name"] == "idem"
+    )
+    assert counts == {app["id"]: 1 for app in apps}
+    for app, snapID in zip(apps, snapIDs):
+        assert mock.snaps[app["id"]][snapID]["name"] == "idem"
+
+
+@pytest.mark.parametrize("astraMockServer", [{"apps": 1}], indirect=True)
+def test_unlabeled_object_not_ours(astraMockServer):
+    mock = astraMockServer
+    appID = next(iter(mock.apps))
+    # Someone else's snapshot of the same name, made just now without any labels
+    status, other = mock.dispatch(
+        "post", f"k8s/v1/apps/{appID}/appSnaps", {"type": "application/astra-appSnap", "name": "x"}
+    )
+    assert status == 201
+    sdk = astraSDK.SDKCommon()
+    url = f"{sdk.base}k8s/v1/apps/{appID}/appSnaps"
+    headers = dict(sdk.headers, accept="application/astra-appSnap+json")
+    since = astraTime.currentEpoch()
+    assert sdk.findCreated(url, headers, "x", "our-key", since) is None
+
+    # Once a created object comes back without its label, name and age have to do
+    dispatch = mock.dispatch
+
+    def dropLabels(method, endpoint, body, params=None):
+        if isinstance(body, dict):
+            body.pop("metadata", None)
+        return dispatch(method, endpoint, body, params)
+
+    mock.dispatch = dropLabels
+    assert astraSDK.takeSnap().main(appID, "y")
+    assert astraSDK.SDKCommon.dropsLabels
+    assert sdk.findCreated(url, headers, "x", "our-key", since)["id"] == other["id"]
+
+
+@pytest.mark.parametrize(
+    "astraMockServer", [{"apps": 5, "faults": {"throttle": 0.5, "retryAfter": 3}}], indirect=True
+)
+def test_create_waits_retry_after(astraMockServer, monkeypatch):
+    mock = astraMockServer
+    sleeps = []
+    monkeypatch.setattr(astraSDK.time, "sleep", sleeps.append)
+    monkeypatch.setattr(astraSDK.SDKCommon, "postRetries", 10)
+    for appID in mock.apps:
+        assert astraSDK.takeSnap().main(appID, "throttled")
+    assert mock.faultCounts["throttle"] > 0
+    assert sleeps and set(sleeps) == {3.0}
+
+
+def test_retry_delay():
+    response = requests.models.Response()
+    assert astraSDK.SDKCommon.retryDelay(None, 1) == 1
+    assert astraSDK.SDKCommon.retryDelay(response, 3) == 4
+    assert astraSDK.SDKCommon.retryDelay(response, 9) == 10
+    response.headers["Retry-After"] = "7"
+    assert astraSDK.SDKCommon.retryDelay(response, 1) == 7
+    response.headers["Retry-After"] = "Wed, 21 Oct 2015 07:28:00 GMT"
+    assert astraSDK.SDKCommon.retryDelay(response, 1) == 0
+
+
+@pytest.mark.parametrize("astraMockServer", [{"apps": 1}], indirect=True)
+def test_uncertain_post_unchecked_exits(astraMockServer, monkeypatch):
+    appID = next(iter(astraMockServer.apps))
+    send = astraSDK.SDKCommon.send
+
+    def gatewayTimeout(self, method, url, *args, **kwargs):
+        if method == "get":
+            raise requests.exceptions.ConnectionError("listing failed")
+        if method == "post":
+            ret = requests.models.Response()
+            ret.status_code, ret.reason = 504, "Gateway Timeout"
+            return ret
+        return send(self, method, url, *args, **kwargs)
+
+    monkeypatch.setattr(astraSDK.time, "sleep", lambda seconds: None)
+    monkeypatch.setattr(astraSDK.SDKCommon, "send", gatewayTimeout)
+    with pytest.raises(SystemExit, match="504 - Gateway Timeout"):
+        astraSDK.takeSnap().main(appID, "x")
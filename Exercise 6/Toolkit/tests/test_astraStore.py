@@ -0,0 +1,47 @@
+import pytest
+
+import astraSDK
+import astraStore
+
+
+def count(store, table, where=""):
+    return store.query(f"SELECT count(*) AS n FROM {table} {where}")["items"][0]["n"]
+
+
+@pytest.mark.parametrize(
+    "astraMockServer", [{"apps": 6, "snapshotsPerApp": 3, "backupsPerApp": 0}], indirect=True
+)
+def test_sync_and_query(astraMockServer, tmp_path):
+    mock = astraMockServer
+    path = tmp_path / "inventory.db"
+    store = astraStore.inventoryStore(path)
+    first = store.sync()
+    assert first["added"] > 0
+    assert count(store, "apps") == len(mock.apps)
+    assert count(store, "snapshots") == sum(len(snaps) for snaps in mock.snaps.values())
+    byCluster = store.query(
+        "SELECT clusterName, count(*) AS apps FROM apps GROUP BY clusterName ORDER BY clusterName"
+    )
+    assert sum(row["apps"] for row in byCluster["items"]) == len(mock.apps)
+
+    # Without a backup, every app is unprotected
+    unprotected = store.report("unprotected", hours=24)
+    assert {row["appID"] for row in unprotected["items"]} == set(mock.apps)
+    assert store.query("SELECT nonsense FROM nowhere") is False
+
+    apps = list(mock.apps)
+    newID = astraSDK.takeSnap().main(apps[0], "new")
+    goneID = next(iter(mock.snaps[apps[1]]))
+    assert astraSDK.destroySnapshot().main(apps[1], goneID)
+
+    # A second store on the same file carries on from the first one's sync
+    again = astraStore.inventoryStore(path)
+    changes = again.sync()
+    assert changes["added"] == changes["removed"] == 1
+    assert count(again, "snapshots", f"WHERE id = '{newID}'") == 1
+    assert count(again, "snapshots", f"WHERE id = '{goneID}'") == 0
+    assert count(again, "snapshots") == sum(len(snaps) for snaps in mock.snaps.values())
+    raw = again.query(
+        "SELECT json_extract(raw, '$.name') AS name FROM snapshots WHERE id = ?", [newID]
+    )
+    assert raw["items"] == [{"name": "new"}]
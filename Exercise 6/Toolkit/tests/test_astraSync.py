@@ -0,0 +1,84 @@
+import pytest
+import time
+
+import astraInventory
+import astraSDK
+import astraSync
+
+
+def objectCount(mock):
+    return (
+        len(mock.apps)
+        + sum(len(snaps) for snaps in mock.snaps.values())
+        + sum(len(backups) for backups in mock.backups.values())
+        + len(mock.hooks)
+        + len(mock.clouds)
+        + len(mock.clusters)
+        + len(mock.namespaces)
+        + len(mock.scripts)
+    )
+
+
+@pytest.mark.parametrize("astraMockServer", [{"apps": 10, "snapshotsPerApp": 4}], indirect=True)
+def test_incremental_refresh(astraMockServer, monkeypatch):
+    mock = astraMockServer
+    inv = astraInventory.inventory()
+    sync = astraSync.inventorySync(inv)
+    first = sync.refresh()
+    assert first["added"] == objectCount(mock)
+
+    # With nothing changed, only the ids and modification times are listed
+    params = []
+    get = astraSync.inventorySync.get
+    monkeypatch.setattr(
+        astraSync.inventorySync,
+        "get",
+        lambda self, endpoint, p: params.append(p) or get(self, endpoint, p),
+    )
+    again = sync.refresh()
+    assert again["added"] == again["changed"] == again["removed"] == 0
+    assert again["unchanged"] == objectCount(mock)
+    assert all(p == {"include": "id,metadata.modificationTimestamp"} for p in params)
+    assert again["bytes"] < first["bytes"] / 2
+
+    apps = list(mock.apps)
+    newID = astraSDK.takeSnap().main(apps[0], "new")
+    goneID = next(iter(mock.snaps[apps[1]]))
+    assert astraSDK.destroySnapshot().main(apps[1], goneID)
+    unmanaged = len(mock.snaps[apps[2]]) + len(mock.backups[apps[2]])
+    unmanaged += len([hook for hook in mock.hooks.values() if hook["appID"] == apps[2]])
+    assert astraSDK.unmanageApp().main(apps[2])
+    params.clear()
+    changes = sync.refresh()
+    assert changes["added"] == 1 and inv.get("snapshots", newID).appID == apps[0]
+    assert inv.get("snapshots", goneID) is None
+    # An unmanaged app's snapshots, backups and hooks go with it
+    assert inv.get("apps", apps[2]) is None and not inv.find("snapshots", appID=apps[2])
+    assert changes["removed"] == 1 + 1 + unmanaged
+    assert sync.changes["snapshots"] >= {newID, goneID}
+    # The changed snapshot collection was listed in full with a filter on modification time
+    assert any("metadata.modificationTimestamp ge" in p.get("filter", "") for p in params)
+
+    # modificationTimestamp has whole seconds, so a change must be a second on to be seen
+    time.sleep(1.1)
+    assert astraSDK.restoreApp().main(apps[3], snapshotID=next(iter(mock.snaps[apps[3]])))
+    changes = sync.refresh(["apps"])
+    assert changes["changed"] == 1 and sync.changes["apps"] == {apps[3]}
+    assert inv.get("apps", apps[3]).state == mock.apps[apps[3]]["state"]
+
+
+@pytest.mark.parametrize("astraMockServer", [{"apps": 5}], indirect=True)
+def test_save_and_load(astraMockServer, tmp_path):
+    inv = astraInventory.inventory()
+    sync = astraSync.inventorySync(inv)
+    assert sync.refresh()
+    sync.save(tmp_path / "inventory.jsonl.gz")
+
+    loaded = astraInventory.inventory()
+    resumed = astraSync.inventorySync(loaded)
+    assert resumed.load(tmp_path / "inventory.jsonl.gz")
+    for kind in ("apps", "snapshots", "backups", "hooks"):
+        assert set(loaded.objects[kind]) == set(inv.objects[kind])
+    # A sync resumed from the file is incremental straight away
+    changes = resumed.refresh()
+    assert changes["added"] == changes["changed"] == changes["removed"] == 0
@@ -0,0 +1,50 @@
+import pytest
+
+import astraSDK
+import astraTime
+
+
+def test_parse_timestamp():
+    assert astraTime.parseTimestamp("2022-07-20T18:19:35Z") == 1658341175
+    assert astraTime.parseTimestamp("2022-07-20T18:19:35.5+00:00") == 1658341175
+    assert astraTime.parseTimestamp("not a time") is None
+    assert astraTime.parseTimestamp(None) is None
+
+
+@pytest.fixture(params=["numpy", "array"])
+def numpyOrNot(request, monkeypatch):
+    """Each test runs with NumPy (when it's installed) and without it"""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(astraTime, "numpy", None)
+
+
+def test_age_mask(numpyOrNot):
+    epochs = astraTime.column([None, 100, 5000, 5990])
+    assert list(astraTime.ageMask(epochs, now=6000)) == [1, 2, 3]
+    assert list(astraTime.ageMask(epochs, maxAge=1000, now=6000)) == [2, 3]
+    assert list(astraTime.ageMask(epochs, minAge=60, now=6000)) == [1, 2]
+    # A maxAge reaching back before the epoch still leaves out objects without one
+    assert list(astraTime.ageMask(epochs, maxAge=10**9, now=6000)) == [1, 2, 3]
+
+
+def test_age_order(numpyOrNot):
+    epochs = astraTime.column([100, None, 5000, 300])
+    assert list(astraTime.ageOrder(epochs)) == [2, 3, 0, 1]
+    assert list(astraTime.ageOrder(epochs, youngestFirst=False)) == [0, 3, 2, 1]
+    assert list(astraTime.ageOrder(epochs, youngestFirst=False, limit=2)) == [0, 3]
+
+
+@pytest.mark.parametrize("astraMockServer", [{"apps": 1, "clusters": 1}], indirect=True)
+def test_namespaces_minute_filter(astraMockServer):
+    namespaces = [
+        ns for ns in astraMockServer.namespaces.values() if ns["name"].startswith("unmanaged-")
+    ]
+    namespaces[0]["metadata"]["creationTimestamp"] = astraTime.formatTimestamp(
+        astraTime.currentEpoch() - 30
+    )
+    namespaces[1]["metadata"].pop("creationTimestamp")
+    namespaces[2]["metadata"]["creationTimestamp"] = "yesterday"
+    recent = astraSDK.getNamespaces().main(minuteFilter=5)
+    assert [ns["name"] for ns in recent["items"]] == [namespaces[0]["name"]]
@@ -16,23 +16,42 @@
 """
 
 try:
+    from . import astraApply
+    from . import astraBulk
+    from . import astraFilter
+    from . import astraInventory
+    from . import astraJournal
+    from . import astraOutput
+    from . import astraReport
     from . import astraSDK
+    from . import astraStore
+    from . import astraTasks
+    from . import astraTime
 except ImportError:
+    import astraApply
+    import astraBulk
+    import astraFilter
+    import astraInventory
+    import astraJournal
+    import astraOutput
+    import astraReport
     import astraSDK
+    import astraStore
+    import astraTasks
+    import astraTime
 
 
 import argparse
 import dns.resolver
+import functools
 import json
 import os
 import subprocess
 import sys
 import tempfile
 import time
-import yaml
 import kubernetes
 import base64
-from datetime import datetime, timedelta
 
 
 def subKeys(subObject, key):
@@ -131,7 +150,7 @@ def updateHelm():
         "https://charts.cloudbees.com/public/cloudbees": None,
     }
     if ret != 1:
-        retYaml = yaml.load(ret, Loader=yaml.SafeLoader)
+        retYaml = astraOutput.yamlLoad(ret)
         # Adding support for user-defined repos
         for item in retYaml:
             if item.get("url") not in repos:
@@ -230,7 +249,7 @@ def doProtectionTask(protectionType, appID, name, background):
 
 def stsPatch(patch, stsName):
     """Patch and restart a statefulset"""
-    patchYaml = yaml.dump(patch)
+    patchYaml = astraOutput.yamlDump(patch)
     tmp = tempfile.NamedTemporaryFile()
     tmp.write(bytes(patchYaml, "utf-8"))
     tmp.seek(0)
@@ -269,15 +288,30 @@ class toolkit:
         setStr = createHelmStr("set", setValues)
         valueStr = createHelmStr("values", fileValues)
 
-        nsObj = astraSDK.getNamespaces(verbose=verbose)
-        retval = run("kubectl get ns -o json", captureOutput=True)
-        retvalJSON = json.loads(retval)
-        for item in retvalJSON["items"]:
-            if item["metadata"]["name"] == namespace:
-                print(f"Namespace {namespace} already exists!")
-                sys.exit(24)
-        run(f"kubectl create namespace {namespace}")
-        run(f"kubectl config set-context --current --namespace={namespace}")
+        # The steps run as a graph, so that Astra Control's apps and clusters are read while
+        # the namespace is created and the chart installed, and the schedules created at once
+        graph = astraTasks.taskGraph()
+        graph.add("readAstra", lambda: astraSDK.getNamespaces(verbose=verbose))
+
+        def checkNamespace():
+            retval = run("kubectl get ns -o json", captureOutput=True)
+            retvalJSON = json.loads(retval)
+            for item in retvalJSON["items"]:
+                if item["metadata"]["name"] == namespace:
+                    print(f"Namespace {namespace} already exists!")
+                    sys.exit(24)
+
+        graph.add("checkNamespace", checkNamespace)
+        graph.add(
+            "createNamespace",
+            lambda _: run(f"kubectl create namespace {namespace}"),
+            after=["checkNamespace"],
+        )
+        graph.add(
+            "setContext",
+            lambda _: run(f"kubectl config set-context --current --namespace={namespace}"),
+            after=["createNamespace"],
+        )
         """if chartName == "gitlab":
             gitalyStorageClass = None
             # Are we running on GKE?
@@ -398,74 +432,80 @@ class toolkit:
             stsPatch(gitalyPatch, f"{appName}-gitaly")
 
         else:"""
-        run(f"helm install {appName} {chart}{setStr}{valueStr}")
-        print("Waiting for Astra to discover the namespace.", end="")
-        sys.stdout.flush()
+        graph.add(
+            "helmInstall",
+            lambda _: run(f"helm install {appName} {chart}{setStr}{valueStr}"),
+            after=["setContext"],
+        )
 
-        appID = ""
-        while not appID:
-            # It takes Astra some time to realize new apps have been installed
-            time.sleep(3)
-            print(".", end="")
+        def discover(nsObj, _):
+            print("Waiting for Astra to discover the namespace.", end="")
             sys.stdout.flush()
-            namespaces = nsObj.main()
-            # Cycle through the apps and see if one matches our new namespace
-            for ns in namespaces["items"]:
-                # Check to make sure our namespace name matches, it's in a discovered state,
-                # and that it's a recently created namespace (less than 10 minutes old)
-                if (
-                    ns["name"] == namespace
-                    and ns["namespaceState"] == "discovered"
-                    and (
-                        datetime.utcnow()
-                        - datetime.strptime(
-                            ns["metadata"]["creationTimestamp"], "%Y-%m-%dT%H:%M:%SZ"
-                        )
-                    )
-                    < timedelta(minutes=10)
-                ):
-                    print(" Namespace discovered!")
-                    sys.stdout.flush()
-                    time.sleep(3)
-                    print(f"Managing app: {ns['name']}.", end="")
-                    sys.stdout.flush()
-                    rc = astraSDK.manageApp(verbose=verbose).main(
-                        ns["name"], ns["name"], ns["clusterID"]
+            # It takes Astra some time to realize new apps have been installed, but a namespace
+            # more than 10 minutes old isn't taken as ours, so there's no waiting any longer
+            deadline = time.monotonic() + 600
+            while time.monotonic() < deadline:
+                if graph.stopping.wait(3):
+                    return None
+                print(".", end="")
+                sys.stdout.flush()
+                namespaces = nsObj.main()
+                now = astraTime.currentEpoch()
+                # Cycle through the apps and see if one matches our new namespace
+                for ns in namespaces["items"]:
+                    # Check to make sure our namespace name matches, it's in a discovered
+                    # state, and that it's a recently created namespace (less than 10 minutes
+                    # old, and one without a creation time that parses isn't)
+                    created = astraTime.parseTimestamp(
+                        ns.get("metadata", {}).get("creationTimestamp")
                     )
-                    appID = rc["id"]
-                    print(" Success!")
-                    sys.stdout.flush()
-                    break
+                    if (
+                        ns["name"] == namespace
+                        and ns["namespaceState"] == "discovered"
+                        and created is not None
+                        and now - created < 600
+                    ):
+                        print(" Namespace discovered!")
+                        sys.stdout.flush()
+                        graph.stopping.wait(3)
+                        return ns
+            raise SystemExit(f"Astra didn't discover namespace {namespace} within 10 minutes")
+
+        def manage(ns):
+            print(f"Managing app: {ns['name']}.", end="")
+            sys.stdout.flush()
+            rc = astraSDK.manageApp(verbose=verbose).main(ns["name"], ns["name"], ns["clusterID"])
+            print(" Success!")
+            periods = ", ".join(schedule["granularity"] for schedule in astraBulk.defaultSchedules)
+            print(f"Setting {periods} protection policies on {rc['id']}")
+            sys.stdout.flush()
+            return rc["id"]
+
+        graph.add("discover", discover, after=["readAstra", "helmInstall"])
+        graph.add("manage", manage, after=["discover"])
 
-        # Create a protection policy on that namespace (using its appID)
-        backupRetention = "1"
-        snapshotRetention = "1"
-        minute = "0"
+        # Create a protection policy on that namespace (using its appID), at minutes of its
+        # own, rather than on the hour like every other app, a schedule at a time
         cpp = astraSDK.createProtectionpolicy(quiet=True)
-        cppData = {
-            "hourly": {"dayOfWeek": "*", "dayOfMonth": "*", "hour": "*"},
-            "daily": {"dayOfWeek": "*", "dayOfMonth": "*", "hour": "2"},
-            "weekly": {"dayOfWeek": "0", "dayOfMonth": "*", "hour": "2"},
-            "monthly": {"dayOfWeek": "*", "dayOfMonth": "1", "hour": "2"},
-        }
-        for period in cppData:
-            print(f"Setting {period} protection policy on {appID}")
-            dayOfWeek = cppData[period]["dayOfWeek"]
-            dayOfMonth = cppData[period]["dayOfMonth"]
-            hour = cppData[period]["hour"]
-            cppRet = cpp.main(
-                period,
-                snapshotRetention,
-                backupRetention,
-                dayOfWeek,
-                dayOfMonth,
-                hour,
-                minute,
-                appID,
-            )
-            if cppRet is False:
+
+        def protect(schedule, appID):
+            period = schedule["granularity"]
+            schedules = astraBulk.schedulePlanner().plan(appID, [schedule])
+            if not astraBulk.createSchedules(appID, schedules, cpp):
                 raise SystemExit(f"cpp.main({period}...) returned False")
 
+        for schedule in astraBulk.defaultSchedules:
+            graph.add(
+                f"{schedule['granularity']}Schedule",
+                functools.partial(protect, schedule),
+                after=["manage"],
+            )
+        try:
+            graph.run()
+        finally:
+            if verbose:
+                graph.showTimings()
+
     def clone(
         self,
         cloneAppName,
@@ -480,18 +520,35 @@ class toolkit:
         verbose,
     ):
         """Create a clone."""
-        # Check to see if cluster-level resources are needed to be manually created
-        needsIngressclass = False
-        appAssets = astraSDK.getAppAssets(verbose=verbose).main(appIDstr)
-        for asset in appAssets["items"]:
-            if asset["assetName"] == "cjoc" and asset["assetType"] == "Ingress":
-                needsIngressclass = True
-        # Clone 'ingressclass' cluster object
-        if needsIngressclass and sourceClusterID != clusterID:
-            if not cloneNamespace:
-                cloneNamespace = cloneAppName
+        # The steps run as a graph, so that the destination cluster is read while the source
+        # app's assets are
+        graph = astraTasks.taskGraph()
+
+        def readAssets():
+            # Check to see if cluster-level resources are needed to be manually created
+            appAssets = astraSDK.getAppAssets(verbose=verbose).main(appIDstr)
+            return any(
+                asset["assetName"] == "cjoc" and asset["assetType"] == "Ingress"
+                for asset in appAssets["items"]
+            )
+
+        def readClusters():
+            # Only a clone to another cluster can need its ingressclass copied
+            if sourceClusterID == clusterID:
+                return None
             clusters = astraSDK.getClusters().main(hideUnmanaged=True)
-            contexts, _ = kubernetes.config.list_kube_config_contexts()
+            try:
+                contexts, _ = kubernetes.config.list_kube_config_contexts()
+            except kubernetes.config.ConfigException:
+                contexts = []
+            return clusters, contexts
+
+        def copyIngressclass(needsIngressclass, clusterState):
+            # Clone 'ingressclass' cluster object
+            if not (needsIngressclass and sourceClusterID != clusterID):
+                return cloneNamespace
+            namespace = cloneNamespace or cloneAppName
+            clusters, contexts = clusterState
             # Loop through clusters and contexts, find matches and open api_client
             for cluster in clusters["items"]:
                 for context in contexts:
@@ -517,13 +574,11 @@ class toolkit:
                 sourceIngress = json.loads(sourceResp.data)
                 del sourceIngress["metadata"]["resourceVersion"]
                 del sourceIngress["metadata"]["creationTimestamp"]
-                sourceIngress["metadata"]["labels"]["app.kubernetes.io/instance"] = cloneNamespace
-                sourceIngress["metadata"]["annotations"][
-                    "meta.helm.sh/release-name"
-                ] = cloneNamespace
+                sourceIngress["metadata"]["labels"]["app.kubernetes.io/instance"] = namespace
+                sourceIngress["metadata"]["annotations"]["meta.helm.sh/release-name"] = namespace
                 sourceIngress["metadata"]["annotations"][
                     "meta.helm.sh/release-namespace"
-                ] = cloneNamespace
+                ] = namespace
             except:
                 # In the event the sourceCluster no longer exists or isn't in kubeconfig
                 sourceIngress = {
@@ -534,15 +589,15 @@ class toolkit:
                         "generation": 1,
                         "labels": {
                             "app.kubernetes.io/component": "controller",
-                            "app.kubernetes.io/instance": cloneNamespace,
+                            "app.kubernetes.io/instance": namespace,
                             "app.kubernetes.io/managed-by": "Helm",
                             "app.kubernetes.io/name": "ingress-nginx",
                             "app.kubernetes.io/version": "1.1.0",
                             "helm.sh/chart": "ingress-nginx-4.0.13",
                         },
                         "annotations": {
-                            "meta.helm.sh/release-name": cloneNamespace,
-                            "meta.helm.sh/release-namespace": cloneNamespace,
+                            "meta.helm.sh/release-name": namespace,
+                            "meta.helm.sh/release-namespace": namespace,
                         },
                         "managedFields": [
                             {
@@ -585,21 +640,30 @@ class toolkit:
                 body = json.loads(e.body)
                 if not (body.get("reason") == "AlreadyExists"):
                     raise SystemExit(f"Error: Kubernetes resource creation failed\n{e}")
+            return namespace
+
+        def submitClone(namespace):
+            cloneRet = astraSDK.cloneApp(verbose=verbose).main(
+                cloneAppName,
+                clusterID,
+                sourceClusterID,
+                cloneNamespace=namespace,
+                backupID=backupID,
+                snapshotID=snapshotID,
+                sourceAppID=sourceAppID,
+            )
+            if cloneRet:
+                print("Submitting clone succeeded.")
+            else:
+                print("Submitting clone failed.")
+            return cloneRet
 
-        cloneRet = astraSDK.cloneApp(verbose=verbose).main(
-            cloneAppName,
-            clusterID,
-            sourceClusterID,
-            cloneNamespace=cloneNamespace,
-            backupID=backupID,
-            snapshotID=snapshotID,
-            sourceAppID=sourceAppID,
-        )
-        if cloneRet:
-            print("Submitting clone succeeded.")
+        def waitReady(cloneRet):
+            if not cloneRet:
+                return
             if background:
                 print(f"Background clone flag selected, run 'list apps' to get status.")
-                return True
+                return
             print("Waiting for clone to become available.", end="")
             sys.stdout.flush()
             appID = cloneRet.get("id")
@@ -616,8 +680,19 @@ class toolkit:
                             print(".", end="")
                             sys.stdout.flush()
                             time.sleep(3)
-        else:
-            print("Submitting clone failed.")
+
+        graph.add("readAssets", readAssets)
+        graph.add("readClusters", readClusters)
+        graph.add("copyIngressclass", copyIngressclass, after=["readAssets", "readClusters"])
+        graph.add("clone", submitClone, after=["copyIngressclass"])
+        graph.add("waitReady", waitReady, after=["clone"])
+        try:
+            results = graph.run()
+        finally:
+            if verbose:
+                graph.showTimings()
+        if results["clone"] and background:
+            return True
 
 
 def main():
@@ -653,6 +728,11 @@ def main():
             "define": False,
             "destroy": False,
             "unmanage": False,
+            "sync": False,
+            "query": False,
+            "report": False,
+            "prune": False,
+            "apply": False,
         }
 
         firstverbfoundPosition = None
@@ -705,6 +785,10 @@ def main():
             if verbPosition and counter < verbPosition and (item == "-f" or item == "--fast"):
                 plaidMode = True
 
+        # Objects fetched to populate the choices below are kept here, so they don't need to be
+        # fetched (or scanned for) again once the arguments have been parsed
+        inventory = astraInventory.getInventory()
+
         if not plaidMode:
             # It isn't intuitive, however only one key in verbs can be True
             if verbs["deploy"]:
@@ -713,41 +797,23 @@ def main():
                     chartsList.append(chart["name"])
 
             elif verbs["clone"]:
-                apps = astraSDK.getApps().main()
-                for app in apps["items"]:
-                    appList.append(app["id"])
+                appList = inventory.ids("apps")
                 destCluster = astraSDK.getClusters().main(hideUnmanaged=True)
                 for cluster in destCluster["items"]:
                     destclusterList.append(cluster["id"])
-                backups = astraSDK.getBackups().main()
-                for backup in backups["items"]:
-                    backupList.append(backup["id"])
-                snapshots = astraSDK.getSnaps().main()
-                for snap in snapshots["items"]:
-                    snapshotList.append(snap["id"])
+                backupList = inventory.ids("backups")
+                snapshotList = inventory.ids("snapshots")
 
             elif verbs["restore"]:
-                for app in astraSDK.getApps().main()["items"]:
-                    appList.append(app["id"])
+                appList = inventory.ids("apps")
 
                 # This expression translates to "Is there an arg after the verb we found?"
                 if len(sys.argv) - verbPosition >= 2:
-                    # If that arg after the verb "restore" matches an appID then
+                    # If either of the two args after the verb "restore" matches an appID then
                     # populate the lists of backups and snapshots for that appID
-                    backups = astraSDK.getBackups().main()
-                    for backup in backups["items"]:
-                        if backup["appID"] == sys.argv[verbPosition + 1] or (
-                            len(sys.argv) > verbPosition + 2
-                            and backup["appID"] == sys.argv[verbPosition + 2]
-                        ):
-                            backupList.append(backup["id"])
-                    snapshots = astraSDK.getSnaps().main()
-                    for snapshot in snapshots["items"]:
-                        if snapshot["appID"] == sys.argv[verbPosition + 1] or (
-                            len(sys.argv) > verbPosition + 2
-                            and snapshot["appID"] == sys.argv[verbPosition + 2]
-                        ):
-                            snapshotList.append(snapshot["id"])
+                    for arg in dict.fromkeys(sys.argv[verbPosition + 1 : verbPosition + 3]):
+                        backupList += inventory.ids("backups", appID=arg)
+                        snapshotList += inventory.ids("snapshots", appID=arg)
             elif (
                 verbs["create"]
                 and len(sys.argv) - verbPosition >= 2
@@ -800,26 +866,14 @@ def main():
 
             elif verbs["destroy"] and len(sys.argv) - verbPosition >= 2:
                 if sys.argv[verbPosition + 1] == "backup" and len(sys.argv) - verbPosition >= 3:
-                    for app in astraSDK.getApps().main()["items"]:
-                        appList.append(app["id"])
-                    backups = astraSDK.getBackups().main()
-                    for backup in backups["items"]:
-                        if backup["appID"] == sys.argv[verbPosition + 2]:
-                            backupList.append(backup["id"])
+                    appList = inventory.ids("apps")
+                    backupList = inventory.ids("backups", appID=sys.argv[verbPosition + 2])
                 if sys.argv[verbPosition + 1] == "hook" and len(sys.argv) - verbPosition >= 3:
-                    for app in astraSDK.getApps().main()["items"]:
-                        appList.append(app["id"])
-                    hooks = astraSDK.getHooks().main()
-                    for hook in hooks["items"]:
-                        if hook["appID"] == sys.argv[verbPosition + 2]:
-                            hookList.append(hook["id"])
+                    appList = inventory.ids("apps")
+                    hookList = inventory.ids("hooks", appID=sys.argv[verbPosition + 2])
                 elif sys.argv[verbPosition + 1] == "snapshot" and len(sys.argv) - verbPosition >= 3:
-                    for app in astraSDK.getApps().main()["items"]:
-                        appList.append(app["id"])
-                    snapshots = astraSDK.getSnaps().main()
-                    for snapshot in snapshots["items"]:
-                        if snapshot["appID"] == sys.argv[verbPosition + 2]:
-                            snapshotList.append(snapshot["id"])
+                    appList = inventory.ids("apps")
+                    snapshotList = inventory.ids("snapshots", appID=sys.argv[verbPosition + 2])
                 elif sys.argv[verbPosition + 1] == "script" and len(sys.argv) - verbPosition >= 3:
                     for script in astraSDK.getScripts().main()["items"]:
                         scriptList.append(script["id"])
@@ -847,10 +901,30 @@ def main():
         "-o",
         "--output",
         default="table",
-        choices=["json", "yaml", "table"],
+        choices=["json", "yaml", "table", "ndjson", "csv"],
         help="command output format",
     )
+    parser.add_argument(
+        "--stream",
+        default=False,
+        action="store_true",
+        help="print table and yaml listings row by row as they arrive (ndjson and csv always are)",
+    )
     parser.add_argument("-q", "--quiet", default=False, action="store_true", help="supress output")
+    parser.add_argument(
+        "--postTimeout",
+        default=astraSDK.SDKCommon.postTimeout,
+        type=float,
+        help="seconds to wait for the response to a request creating a snapshot, backup, app or "
+        + f"hook (default: {astraSDK.SDKCommon.postTimeout})",
+    )
+    parser.add_argument(
+        "--postRetries",
+        default=astraSDK.SDKCommon.postRetries,
+        type=int,
+        help="times to try again a create request which timed out, after checking it didn't "
+        + f"create anything (default: {astraSDK.SDKCommon.postRetries})",
+    )
     parser.add_argument(
         "-f",
         "--fast",
@@ -898,6 +972,26 @@ def main():
         "unmanage",
         help="Unmanage an object",
     )
+    parserSync = subparsers.add_parser(
+        "sync",
+        help="Sync objects into a local SQLite inventory",
+    )
+    parserQuery = subparsers.add_parser(
+        "query",
+        help="Query the local SQLite inventory",
+    )
+    parserReport = subparsers.add_parser(
+        "report",
+        help="Report on the fleet's protection",
+    )
+    parserPrune = subparsers.add_parser(
+        "prune",
+        help="Delete the snapshots and backups a retention policy doesn't keep",
+    )
+    parserApply = subparsers.add_parser(
+        "apply",
+        help="Bring apps, schedules, hooks and scripts to the state of a YAML file",
+    )
     #######
     # End of top level subcommands
     #######
@@ -966,6 +1060,49 @@ def main():
     # end of list 'X'
     #######
 
+    #######
+    # list 'X' filter, sort and limit args and flags (shared by every objectType)
+    #######
+    for subparserListX in [
+        subparserListApps,
+        subparserListAssets,
+        subparserListBackups,
+        subparserListClouds,
+        subparserListClusters,
+        subparserListHooks,
+        subparserListNamespaces,
+        subparserListScripts,
+        subparserListSnapshots,
+        subparserListStorageClasses,
+    ]:
+        subparserListX.add_argument(
+            "--filter",
+            dest="where",
+            metavar="EXPRESSION",
+            default=None,
+            type=astraFilter.argType,
+            help="Only show objects matching this expression, for instance "
+            + "'state=ready and clusterName~prod* and age<2h'",
+        )
+        subparserListX.add_argument(
+            "--sort",
+            dest="sortBy",
+            metavar="FIELDS",
+            default=None,
+            type=astraFilter.sortArgType,
+            help="Comma separated fields to sort by, each descending if suffixed with ':desc' "
+            + "(for instance 'clusterName,age:desc')",
+        )
+        subparserListX.add_argument(
+            "--limit",
+            default=None,
+            type=int,
+            help="Only show this many objects (the first ones after sorting)",
+        )
+    #######
+    # end of list 'X' filter, sort and limit args and flags
+    #######
+
     #######
     # list apps args and flags
     #######
@@ -1108,6 +1245,10 @@ def main():
         "backup",
         help="create backup",
     )
+    subparserCreateBackups = subparserCreate.add_parser(
+        "backups",
+        help="create a backup of many apps, a few at a time",
+    )
     subparserCreateHook = subparserCreate.add_parser(
         "hook",
         help="create hook (executionHook)",
@@ -1116,6 +1257,10 @@ def main():
         "protectionpolicy",
         help="create protectionpolicy",
     )
+    subparserCreateProtectionpolicies = subparserCreate.add_parser(
+        "protectionpolicies",
+        help="apply a protection policy file to many apps at once",
+    )
     subparserCreateScript = subparserCreate.add_parser(
         "script",
         help="create script (hookSource)",
@@ -1124,6 +1269,10 @@ def main():
         "snapshot",
         help="create snapshot",
     )
+    subparserCreateSnapshots = subparserCreate.add_parser(
+        "snapshots",
+        help="create a snapshot of many apps at once",
+    )
     #######
     # end of create 'X'
     #######
@@ -1151,6 +1300,102 @@ def main():
     # end of create backups args and flags
     #######
 
+    #######
+    # create backups (of many apps) args and flags
+    #######
+    subparserCreateBackups.add_argument(
+        "name",
+        help="Name of the backup to be taken of each app",
+    )
+    subparserCreateBackups.add_argument(
+        "--all",
+        default=False,
+        action="store_true",
+        help="Back up every managed app",
+    )
+    subparserCreateBackups.add_argument(
+        "-c",
+        "--cluster",
+        default=None,
+        help="Back up the apps of this cluster (name or ID)",
+    )
+    subparserCreateBackups.add_argument(
+        "-l",
+        "--label",
+        action="append",
+        default=None,
+        help="Back up the apps with this label, name=value or just name (can be repeated, "
+        + "apps must have every one)",
+    )
+    subparserCreateBackups.add_argument(
+        "-m",
+        "--maxInFlight",
+        default=10,
+        type=int,
+        help="the most backups in progress at once (default: 10)",
+    )
+    subparserCreateBackups.add_argument(
+        "-p",
+        "--perCluster",
+        default=3,
+        type=int,
+        help="the most backups in progress at once from any one cluster (default: 3)",
+    )
+    subparserCreateBackups.add_argument(
+        "-r",
+        "--rate",
+        default=None,
+        type=float,
+        help="the most backups to start an hour (default: no limit)",
+    )
+    subparserCreateBackups.add_argument(
+        "--control",
+        default=None,
+        help="file to read a new rate (or a YAML mapping of rate, maxInFlight and perCluster) "
+        + "from whenever it's modified during the run",
+    )
+    subparserCreateBackups.add_argument(
+        "--concurrency",
+        default=8,
+        type=int,
+        help="the most requests listing app assets or backups in flight at once (default: 8)",
+    )
+    subparserCreateBackups.add_argument(
+        "--retries",
+        default=1,
+        type=int,
+        help="times to try again the apps whose backup failed (default: 1)",
+    )
+    subparserCreateBackups.add_argument(
+        "-t",
+        "--timeout",
+        default=None,
+        type=float,
+        help="minutes to run for in all (default: no limit)",
+    )
+    subparserCreateBackups.add_argument(
+        "-i",
+        "--interval",
+        default=5,
+        type=float,
+        help="seconds between checks on the backups in progress (default: 5)",
+    )
+    subparserCreateBackups.add_argument(
+        "--journal",
+        default=None,
+        help="file to journal each app's backup in as the job goes, so that it can be resumed",
+    )
+    subparserCreateBackups.add_argument(
+        "--resume",
+        default=False,
+        action="store_true",
+        help="carry on from the --journal of a job that was cut short, rather than starting "
+        + "again",
+    )
+    #######
+    # end of create backups (of many apps) args and flags
+    #######
+
     #######
     # create hooks args and flags
     #######
@@ -1248,6 +1493,69 @@ def main():
     # end of create protectionpolicy args and flags
     #######
 
+    #######
+    # create protectionpolicies args and flags
+    #######
+    subparserCreateProtectionpolicies.add_argument(
+        "-f",
+        "--from",
+        dest="policyFile",
+        required=True,
+        help="YAML file of the policy's schedules, each of granularity, minute, hour, "
+        + "dayOfWeek, dayOfMonth, snapshotRetention and backupRetention",
+    )
+    group = subparserCreateProtectionpolicies.add_mutually_exclusive_group(required=True)
+    group.add_argument(
+        "--apps",
+        dest="where",
+        metavar="EXPRESSION",
+        default=None,
+        type=astraFilter.argType,
+        help="Apply the policy to the apps matching this expression, for instance "
+        + "'clusterName=prod-east and name~shop-*'",
+    )
+    group.add_argument(
+        "--all",
+        default=False,
+        action="store_true",
+        help="Apply the policy to every managed app",
+    )
+    subparserCreateProtectionpolicies.add_argument(
+        "-n",
+        "--dryRun",
+        default=False,
+        action="store_true",
+        help="show which schedules would be created or updated, without changing them",
+    )
+    subparserCreateProtectionpolicies.add_argument(
+        "-s",
+        "--stagger",
+        default="hash",
+        choices=astraBulk.schedulePlanner.methods,
+        help="how to spread the apps' schedules over the minutes (and --window hours) from "
+        + "the policy's: by a hash of each app's ID, by balancing against the existing "
+        + "schedules of every app, or not at all (default: hash)",
+    )
+    subparserCreateProtectionpolicies.add_argument(
+        "-w",
+        "--window",
+        default=1,
+        type=int,
+        choices=range(1, 25),
+        metavar="HOURS",
+        help="hours from a daily, weekly or monthly schedule's own hour it can be moved "
+        + "within (default: 1, just the minute)",
+    )
+    subparserCreateProtectionpolicies.add_argument(
+        "--concurrency",
+        default=8,
+        type=int,
+        help="the most apps to update the schedules of at once (default: 8)",
+    )
+    #######
+    # end of create protectionpolicies args and flags
+    #######
+
     #######
     # create script args and flags
     #######
@@ -1292,6 +1600,82 @@ def main():
     # end of create snapshot args and flags
     #######
 
+    #######
+    # create snapshots args and flags
+    #######
+    subparserCreateSnapshots.add_argument(
+        "name",
+        help="Name of the snapshot to be taken of each app",
+    )
+    subparserCreateSnapshots.add_argument(
+        "--all",
+        default=False,
+        action="store_true",
+        help="Snapshot every managed app",
+    )
+    subparserCreateSnapshots.add_argument(
+        "-c",
+        "--cluster",
+        default=None,
+        help="Snapshot the apps of this cluster (name or ID)",
+    )
+    subparserCreateSnapshots.add_argument(
+        "-l",
+        "--label",
+        action="append",
+        default=None,
+        help="Snapshot the apps with this label, name=value or just name (can be repeated, "
+        + "apps must have every one)",
+    )
+    subparserCreateSnapshots.add_argument(
+        "--concurrency",
+        default=8,
+        type=int,
+        help="the most snapshot requests in flight at once (default: 8)",
+    )
+    subparserCreateSnapshots.add_argument(
+        "--retries",
+        default=1,
+        type=int,
+        help="times to try again the apps whose snapshot failed (default: 1)",
+    )
+    subparserCreateSnapshots.add_argument(
+        "-t",
+        "--timeout",
+        default=None,
+        type=float,
+        help="minutes to wait for every snapshot to complete (default: no limit)",
+    )
+    subparserCreateSnapshots.add_argument(
+        "-i",
+        "--interval",
+        default=5,
+        type=float,
+        help="seconds between checks on the snapshots in progress (default: 5)",
+    )
+    subparserCreateSnapshots.add_argument(
+        "-b",
+        "--background",
+        default=False,
+        action="store_true",
+        help="Start the snapshots without waiting for them to complete",
+    )
+    subparserCreateSnapshots.add_argument(
+        "--journal",
+        default=None,
+        help="file to journal each app's snapshot in as the job goes, so that it can be resumed",
+    )
+    subparserCreateSnapshots.add_argument(
+        "--resume",
+        default=False,
+        action="store_true",
+        help="carry on from the --journal of a job that was cut short, rather than starting "
+        + "again",
+    )
+    #######
+    # end of create snapshots args and flags
+    #######
+
     #######
     # manage 'X'
     #######
@@ -1299,6 +1683,10 @@ def main():
         "app",
         help="manage app",
     )
+    subparserManageApps = subparserManage.add_parser(
+        "apps",
+        help="manage many of a cluster's namespaces as apps at once",
+    )
     subparserManageCluster = subparserManage.add_parser(
         "cluster",
         help="manage cluster",
@@ -1333,6 +1721,48 @@ def main():
     # end of manage app args and flags
     #######
 
+    #######
+    # manage apps args and flags
+    #######
+    subparserManageApps.add_argument(
+        "-c",
+        "--cluster",
+        required=True,
+        help="The managed cluster (name or ID) whose namespaces to manage",
+    )
+    subparserManageApps.add_argument(
+        "-m",
+        "--match",
+        action="append",
+        default=None,
+        help="Only manage the namespaces whose name matches this shell style pattern, such as "
+        + "'team-*' (can be repeated, namespaces can match any of them; default: every one)",
+    )
+    subparserManageApps.add_argument(
+        "-p",
+        "--protect",
+        default=False,
+        action="store_true",
+        help="give each app the hourly, daily, weekly and monthly protection policy that "
+        + "deploy gives the apps it deploys",
+    )
+    subparserManageApps.add_argument(
+        "-n",
+        "--dryRun",
+        default=False,
+        action="store_true",
+        help="show which namespaces would be managed, without managing them",
+    )
+    subparserManageApps.add_argument(
+        "--concurrency",
+        default=8,
+        type=int,
+        help="the most apps to manage at once (default: 8)",
+    )
+    #######
+    # end of manage apps args and flags
+    #######
+
     #######
     # manage cluster args and flags
     #######
@@ -1599,6 +2029,243 @@ def main():
     # end of restore args and flags
     #######
 
+    #######
+    # sync args and flags
+    #######
+    parserSync.add_argument(
+        "kinds",
+        nargs="*",
+        help="kinds of objects to sync, any of "
+        + ", ".join(astraStore.inventoryStore.kinds)
+        + " (default: all of them)",
+    )
+    parserSync.add_argument(
+        "-d",
+        "--database",
+        default=None,
+        help=f"SQLite file (default: {astraStore.inventoryStore.defaultPath})",
+    )
+    parserSync.add_argument(
+        "--full",
+        default=False,
+        action="store_true",
+        help="fetch every object again rather than just those which changed",
+    )
+    #######
+    # end of sync args and flags
+    #######
+
+    #######
+    # query args and flags
+    #######
+    group = parserQuery.add_mutually_exclusive_group(required=True)
+    group.add_argument(
+        "sql",
+        nargs="?",
+        default=None,
+        help="SQL to run, with a table per kind of object: "
+        + ", ".join(astraStore.inventoryStore.kinds),
+    )
+    group.add_argument(
+        "-r",
+        "--report",
+        choices=astraStore.inventoryStore.reports,
+        default=None,
+        help="canned report to run: "
+        + "; ".join(f"{k}: {v[0]}" for k, v in astraStore.inventoryStore.reports.items()),
+    )
+    parserQuery.add_argument(
+        "-d",
+        "--database",
+        default=None,
+        help=f"SQLite file (default: {astraStore.inventoryStore.defaultPath})",
+    )
+    parserQuery.add_argument(
+        "-H",
+        "--hours",
+        default=24,
+        type=float,
+        help="the report's cutoff, in hours before now (default: 24)",
+    )
+    parserQuery.add_argument(
+        "--refresh",
+        default=False,
+        action="store_true",
+        help="sync the changes since the last sync before running the query",
+    )
+    #######
+    # end of query args and flags
+    #######
+
+    #######
+    # report args and flags
+    #######
+    subparserReport = parserReport.add_subparsers(
+        title="reportType", dest="reportType", required=True
+    )
+    subparserReportRpo = subparserReport.add_parser(
+        "rpo",
+        help="time since each app's latest snapshot and backup, gaps, counts and backup hours",
+    )
+    subparserReportRpo.add_argument(
+        "-c",
+        "--cluster",
+        default=None,
+        help="Only report on the apps of this cluster (name or ID)",
+    )
+    subparserReportRpo.add_argument(
+        "-t",
+        "--target",
+        default=24,
+        type=float,
+        help="the RPO in hours each app's latest snapshot or backup must be within (default: 24)",
+    )
+    subparserReportRpo.add_argument(
+        "-w",
+        "--window",
+        default=7,
+        type=float,
+        help="days to look for the longest gap between snapshots and backups over (default: 7)",
+    )
+    subparserReportRpo.add_argument(
+        "--hours",
+        default=False,
+        action="store_true",
+        help="report the fleet's snapshots and backups per hour of the day (UTC) instead",
+    )
+    subparserReportRpo.add_argument(
+        "-d",
+        "--database",
+        default=None,
+        help="report on this local SQLite inventory (see sync) rather than Astra Control",
+    )
+    subparserReportScheduleLoad = subparserReport.add_parser(
+        "schedule-load",
+        help="how many of the fleet's schedules start at each minute",
+    )
+    subparserReportScheduleLoad.add_argument(
+        "-c",
+        "--cluster",
+        default=None,
+        help="Only report on the apps of this cluster (name or ID)",
+    )
+    subparserReportScheduleLoad.add_argument(
+        "--day",
+        default=False,
+        action="store_true",
+        help="a row for each minute of the day schedules start at, rather than of the hour",
+    )
+    subparserReportScheduleLoad.add_argument(
+        "--concurrency",
+        default=8,
+        type=int,
+        help="the most apps to list the schedules of at once (default: 8)",
+    )
+    #######
+    # end of report args and flags
+    #######
+
+    #######
+    # prune args and flags
+    #######
+    parserPrune.add_argument(
+        "kinds",
+        nargs="*",
+        help="kinds of objects to prune, snapshots and/or backups (default: both)",
+    )
+    parserPrune.add_argument(
+        "-k",
+        "--keepLast",
+        default=None,
+        type=int,
+        help="keep the latest this many completed snapshots (or backups) of each app",
+    )
+    parserPrune.add_argument(
+        "--keepDays",
+        default=None,
+        type=float,
+        help="keep every snapshot (or backup) taken within this many days",
+    )
+    parserPrune.add_argument(
+        "-c",
+        "--cluster",
+        default=None,
+        help="Only prune the apps of this cluster (name or ID)",
+    )
+    parserPrune.add_argument(
+        "--app",
+        default=None,
+        help="Only prune this app (name or ID)",
+    )
+    parserPrune.add_argument(
+        "-n",
+        "--dryRun",
+        default=False,
+        action="store_true",
+        help="show what would be deleted, without deleting anything",
+    )
+    parserPrune.add_argument(
+        "--concurrency",
+        default=8,
+        type=int,
+        help="the most deletes in flight at once (default: 8)",
+    )
+    parserPrune.add_argument(
+        "-r",
+        "--rate",
+        default=None,
+        type=float,
+        help="the most deletes to start a second (default: no limit)",
+    )
+    parserPrune.add_argument(
+        "-d",
+        "--database",
+        default=None,
+        help="plan from this local SQLite inventory (see sync) rather than Astra Control",
+    )
+    parserPrune.add_argument(
+        "--journal",
+        default=None,
+        help="file to journal each delete in as the job goes, so that it can be resumed",
+    )
+    parserPrune.add_argument(
+        "--resume",
+        default=False,
+        action="store_true",
+        help="carry on from the --journal of a job that was cut short, rather than starting "
+        + "again",
+    )
+    #######
+    # end of prune args and flags
+    #######
+
+    #######
+    # apply args and flags
+    #######
+    parserApply.add_argument(
+        "-f",
+        "--from",
+        dest="specFile",
+        required=True,
+        help="YAML file of the desired scripts, and apps with their schedules and hooks",
+    )
+    parserApply.add_argument(
+        "-n",
+        "--dryRun",
+        default=False,
+        action="store_true",
+        help="show what would be created, updated and managed, without changing anything",
+    )
+    parserApply.add_argument(
+        "--concurrency",
+        default=8,
+        type=int,
+        help="the most calls to make at once (default: 8)",
+    )
+    #######
+    # end of apply args and flags
+    #######
+
     args = parser.parse_args()
     # print(f"args: {args}")
     if hasattr(args, "granularity"):
@@ -1630,6 +2297,74 @@ def main():
                 raise argparse.ArgumentError(granArg, " monthly requires -M / --dayOfMonth")
             args.dayOfWeek = "*"
 
+    if args.subcommand == "sync":
+        # choices can't be used with nargs="*" positional arguments, they're checked here instead
+        for kind in args.kinds:
+            if kind not in astraStore.inventoryStore.kinds:
+                parserSync.error(f"argument kinds: invalid choice: '{kind}'")
+
+    if args.subcommand == "create" and args.objectType == "snapshots":
+        if args.all == bool(args.cluster or args.label):
+            subparserCreateSnapshots.error("either --all, or --cluster and/or --label is required")
+    if args.subcommand == "create" and args.objectType == "backups":
+        if args.all == bool(args.cluster or args.label):
+            subparserCreateBackups.error("either --all, or --cluster and/or --label is required")
+
+    if args.subcommand == "create" and args.objectType == "protectionpolicies":
+        try:
+            args.schedules = astraBulk.loadPolicy(args.policyFile)
+        except ValueError as e:
+            subparserCreateProtectionpolicies.error(str(e))
+    if args.subcommand == "prune":
+        for kind in args.kinds:
+            if kind not in astraBulk.pruner.collections:
+                parserPrune.error(f"argument kinds: invalid choice: '{kind}'")
+        args.kinds = args.kinds or list(astraBulk.pruner.collections)
+        if args.keepLast is None and args.keepDays is None:
+            parserPrune.error("at least one of --keepLast and --keepDays is required")
+    # The bulk jobs which can be journaled, with what identifies each job (so that a journal
+    # isn't resumed by a different one)
+    journalParser = None
+    if args.subcommand == "create" and args.objectType in ("snapshots", "backups"):
+        if args.objectType == "snapshots":
+            journalParser = subparserCreateSnapshots
+        else:
+            journalParser = subparserCreateBackups
+        job = {
+            "command": f"create {args.objectType}",
+            "name": args.name,
+            "all": args.all,
+            "cluster": args.cluster,
+            "label": args.label,
+        }
+    elif args.subcommand == "prune":
+        journalParser = parserPrune
+        job = {
+            "command": "prune",
+            "kinds": args.kinds,
+            "keepLast": args.keepLast,
+            "keepDays": args.keepDays,
+            "cluster": args.cluster,
+            "app": args.app,
+        }
+    if journalParser is not None:
+        if args.resume and not args.journal:
+            journalParser.error("--resume requires --journal")
+        if args.journal:
+            try:
+                args.journal = astraJournal.journal(args.journal, job, resume=args.resume)
+            except (OSError, ValueError) as e:
+                journalParser.error(str(e))
+    if args.subcommand == "apply":
+        try:
+            args.spec = astraApply.loadSpec(args.specFile)
+        except ValueError as e:
+            parserApply.error(str(e))
+
+    astraSDK.SDKCommon.stream = args.stream
+    astraSDK.SDKCommon.postTimeout = args.postTimeout
+    astraSDK.SDKCommon.postRetries = args.postRetries
+
     tk = toolkit()
     if args.subcommand == "deploy":
         tk.deploy(
@@ -1645,6 +2380,9 @@ def main():
             rc = astraSDK.getApps(quiet=args.quiet, verbose=args.verbose, output=args.output).main(
                 namespace=args.namespace,
                 cluster=args.cluster,
+                where=args.where,
+                sortBy=args.sortBy,
+                limit=args.limit,
             )
             if rc is False:
                 print("astraSDK.getApps() failed")
@@ -1654,7 +2392,7 @@ def main():
         elif args.objectType == "assets":
             rc = astraSDK.getAppAssets(
                 quiet=args.quiet, verbose=args.verbose, output=args.output
-            ).main(args.appID)
+            ).main(args.appID, where=args.where, sortBy=args.sortBy, limit=args.limit)
             if rc is False:
                 print("astraSDK.getAppAssets() failed")
             else:
@@ -1662,7 +2400,7 @@ def main():
         elif args.objectType == "backups":
             rc = astraSDK.getBackups(
                 quiet=args.quiet, verbose=args.verbose, output=args.output
-            ).main(appFilter=args.app)
+            ).main(appFilter=args.app, where=args.where, sortBy=args.sortBy, limit=args.limit)
             if rc is False:
                 print("astraSDK.getBackups() failed")
                 sys.exit(1)
@@ -1671,7 +2409,7 @@ def main():
         elif args.objectType == "clouds":
             rc = astraSDK.getClouds(
                 quiet=args.quiet, verbose=args.verbose, output=args.output
-            ).main()
+            ).main(where=args.where, sortBy=args.sortBy, limit=args.limit)
             if rc is False:
                 print("astraSDK.getClouds() failed")
                 sys.exit(1)
@@ -1680,7 +2418,13 @@ def main():
         elif args.objectType == "clusters":
             rc = astraSDK.getClusters(
                 quiet=args.quiet, verbose=args.verbose, output=args.output
-            ).main(hideManaged=args.hideManaged, hideUnmanaged=args.hideUnmanaged)
+            ).main(
+                hideManaged=args.hideManaged,
+                hideUnmanaged=args.hideUnmanaged,
+                where=args.where,
+                sortBy=args.sortBy,
+                limit=args.limit,
+            )
             if rc is False:
                 print("astraSDK.getClusters() failed")
                 sys.exit(1)
@@ -1688,7 +2432,7 @@ def main():
                 sys.exit(0)
         elif args.objectType == "hooks":
             rc = astraSDK.getHooks(quiet=args.quiet, verbose=args.verbose, output=args.output).main(
-                appFilter=args.app
+                appFilter=args.app, where=args.where, sortBy=args.sortBy, limit=args.limit
             )
             if rc is False:
                 print("astraSDK.getHooks() failed")
@@ -1703,6 +2447,9 @@ def main():
                 nameFilter=args.nameFilter,
                 showRemoved=args.showRemoved,
                 minuteFilter=args.minutes,
+                where=args.where,
+                sortBy=args.sortBy,
+                limit=args.limit,
             )
             if rc is False:
                 print("astraSDK.getNamespaces() failed")
@@ -1715,7 +2462,12 @@ def main():
                 args.output = "json"
             rc = astraSDK.getScripts(
                 quiet=args.quiet, verbose=args.verbose, output=args.output
-            ).main(scriptSourceName=args.getScriptSource)
+            ).main(
+                scriptSourceName=args.getScriptSource,
+                where=args.where,
+                sortBy=args.sortBy,
+                limit=args.limit,
+            )
             if rc is False:
                 print("astraSDK.getScripts() failed")
                 sys.exit(1)
@@ -1728,7 +2480,7 @@ def main():
                 sys.exit(0)
         elif args.objectType == "snapshots":
             rc = astraSDK.getSnaps(quiet=args.quiet, verbose=args.verbose, output=args.output).main(
-                appFilter=args.app
+                appFilter=args.app, where=args.where, sortBy=args.sortBy, limit=args.limit
             )
             if rc is False:
                 print("astraSDK.getSnaps() failed")
@@ -1738,7 +2490,7 @@ def main():
         elif args.objectType == "storageclasses":
             rc = astraSDK.getStorageClasses(
                 quiet=args.quiet, verbose=args.verbose, output=args.output
-            ).main()
+            ).main(where=args.where, sortBy=args.sortBy, limit=args.limit)
             if rc is False:
                 print("astraSDK.getStorageClasses() failed")
                 sys.exit(1)
@@ -1782,6 +2534,38 @@ def main():
                 sys.exit(1)
             else:
                 sys.exit(0)
+        elif args.objectType == "protectionpolicies":
+            apps = astraSDK.getApps().main(where=args.where)
+            if apps is False:
+                print("astraSDK.getApps() failed")
+                sys.exit(1)
+            if not apps["items"]:
+                print("No apps match")
+                sys.exit(1)
+            loadApps = []
+            if args.stagger == "balance" and args.where is not None:
+                # Balance against the schedules of every app, not just those being changed
+                loadApps = astraSDK.getApps().main()
+                if loadApps is False:
+                    print("astraSDK.getApps() failed")
+                    sys.exit(1)
+                loadApps = loadApps["items"]
+            rc = astraBulk.policyApplier(
+                quiet=args.quiet,
+                verbose=args.verbose,
+                output=args.output,
+                concurrency=args.concurrency,
+            ).main(
+                apps["items"],
+                args.schedules,
+                dryRun=args.dryRun,
+                planner=astraBulk.schedulePlanner(args.stagger, args.window),
+                loadApps=loadApps,
+            )
+            if any(row["state"] in ("failed", "listFailed") for row in rc["items"]):
+                sys.exit(1)
+            else:
+                sys.exit(0)
         elif args.objectType == "script":
             with open(args.filePath, encoding="utf8") as f:
                 encodedStr = base64.b64encode(f.read().rstrip().encode("utf-8")).decode("utf-8")
@@ -1799,6 +2583,64 @@ def main():
                 sys.exit(1)
             else:
                 sys.exit(0)
+        elif args.objectType == "backups":
+            apps = astraSDK.getApps().main()
+            if apps is False:
+                print("astraSDK.getApps() failed")
+                sys.exit(1)
+            apps = astraBulk.selectApps(apps["items"], args.cluster, args.label)
+            if not apps:
+                print("No apps match")
+                sys.exit(1)
+            rc = astraBulk.backupScheduler(
+                quiet=args.quiet,
+                verbose=args.verbose,
+                output=args.output,
+                maxInFlight=args.maxInFlight,
+                perCluster=args.perCluster,
+                rate=args.rate,
+                control=args.control,
+                concurrency=args.concurrency,
+                interval=args.interval,
+                journal=args.journal,
+            ).main(
+                apps,
+                args.name,
+                retries=args.retries,
+                timeout=None if args.timeout is None else args.timeout * 60,
+            )
+            if any(row["state"] not in ("completed", "submitted") for row in rc["items"]):
+                sys.exit(1)
+            else:
+                sys.exit(0)
+        elif args.objectType == "snapshots":
+            apps = astraSDK.getApps().main()
+            if apps is False:
+                print("astraSDK.getApps() failed")
+                sys.exit(1)
+            apps = astraBulk.selectApps(apps["items"], args.cluster, args.label)
+            if not apps:
+                print("No apps match")
+                sys.exit(1)
+            rc = astraBulk.bulkProtect(
+                "snapshot",
+                quiet=args.quiet,
+                verbose=args.verbose,
+                output=args.output,
+                concurrency=args.concurrency,
+                interval=args.interval,
+                journal=args.journal,
+            ).main(
+                apps,
+                args.name,
+                retries=args.retries,
+                timeout=None if args.timeout is None else args.timeout * 60,
+                background=args.background,
+            )
+            if any(row["state"] not in ("completed", "submitted") for row in rc["items"]):
+                sys.exit(1)
+            else:
+                sys.exit(0)
 
     elif args.subcommand == "manage" or args.subcommand == "define":
         if args.objectType == "app":
@@ -1810,6 +2652,20 @@ def main():
                 sys.exit(1)
             else:
                 sys.exit(0)
+        if args.objectType == "apps":
+            rc = astraBulk.bulkManage(
+                quiet=args.quiet,
+                verbose=args.verbose,
+                output=args.output,
+                concurrency=args.concurrency,
+            ).main(args.cluster, args.match, protect=args.protect, dryRun=args.dryRun)
+            if rc is False:
+                print("astraBulk.bulkManage() failed")
+                sys.exit(1)
+            elif any(row["state"] not in ("managed", "planned") for row in rc["items"]):
+                sys.exit(1)
+            else:
+                sys.exit(0)
         if args.objectType == "cluster":
             rc = astraSDK.manageCluster(quiet=args.quiet, verbose=args.verbose).main(
                 args.clusterID, args.storageClassID
@@ -1898,6 +2754,99 @@ def main():
             print("Submitting restore job failed.")
             sys.exit(3)
 
+    elif args.subcommand == "sync":
+        rc = astraStore.inventoryStore(
+            args.database, quiet=args.quiet, verbose=args.verbose, output=args.output
+        ).sync(kinds=args.kinds, full=args.full)
+        if rc is False:
+            print("astraStore.inventoryStore().sync() failed")
+            sys.exit(1)
+        else:
+            sys.exit(0)
+    elif args.subcommand == "query":
+        store = astraStore.inventoryStore(
+            args.database, quiet=args.quiet, verbose=args.verbose, output=args.output
+        )
+        if args.refresh:
+            store.quiet = True
+            if store.sync() is False:
+                print("astraStore.inventoryStore().sync() failed")
+                sys.exit(1)
+            store.quiet = args.quiet
+        if args.report:
+            rc = store.report(args.report, hours=args.hours)
+        else:
+            rc = store.query(args.sql)
+        if rc is False:
+            print("astraStore.inventoryStore().query() failed")
+            sys.exit(1)
+        else:
+            sys.exit(0)
+    elif args.subcommand == "report":
+        if args.reportType == "rpo":
+            rc = astraReport.rpoReport(
+                database=args.database, quiet=args.quiet, verbose=args.verbose, output=args.output
+            ).main(cluster=args.cluster, target=args.target, window=args.window, hours=args.hours)
+            if rc is False:
+                print("astraReport.rpoReport() failed")
+                sys.exit(1)
+            else:
+                sys.exit(0)
+        elif args.reportType == "schedule-load":
+            rc = astraReport.scheduleLoadReport(
+                quiet=args.quiet,
+                verbose=args.verbose,
+                output=args.output,
+                concurrency=args.concurrency,
+            ).main(cluster=args.cluster, day=args.day)
+            if rc is False:
+                print("astraReport.scheduleLoadReport() failed")
+                sys.exit(1)
+            else:
+                sys.exit(0)
+
+    elif args.subcommand == "prune":
+        rc = astraBulk.pruner(
+            database=args.database,
+            quiet=args.quiet,
+            verbose=args.verbose,
+            output=args.output,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            journal=args.journal,
+        ).main(
+            args.kinds,
+            keepLast=args.keepLast,
+            keepDays=args.keepDays,
+            cluster=args.cluster,
+            app=args.app,
+            dryRun=args.dryRun,
+        )
+        if rc is False:
+            print("astraBulk.pruner() failed")
+            sys.exit(1)
+        elif any(row["state"] in ("failed", "notStarted") for row in rc["items"]):
+            sys.exit(1)
+        else:
+            sys.exit(0)
+    elif args.subcommand == "apply":
+        rc = astraApply.reconciler(
+            quiet=args.quiet,
+            verbose=args.verbose,
+            output=args.output,
+            concurrency=args.concurrency,
+        ).main(args.spec, dryRun=args.dryRun)
+        if rc is False:
+            print("astraApply.reconciler() failed")
+            sys.exit(1)
+        elif any(
+            row["state"] in ("failed", "skipped", "listFailed", "noCluster", "noScript")
+            for row in rc["items"]
+        ):
+            sys.exit(1)
+        else:
+            sys.exit(0)
+
     elif args.subcommand == "clone":
         if not args.cloneAppName:
             args.cloneAppName = input("App name for the clone: ")
@@ -1909,32 +2858,20 @@ def main():
         # Determine sourceClusterID and the appID (appID could be provided by args.sourceAppID,
         # however if it's not that value will be 'None', and if so it needs to stay 'None' when
         # a backup or snapshot ID is provided for the app to be cloned from the correctly).
+        # The inventory was populated while building the choices lists, unless in plaidMode, in
+        # which case it fetches what's needed here.
         sourceClusterID = ""
         appIDstr = ""
-        # Handle -f/--fast/plaidMode cases
-        if plaidMode:
-            apps = astraSDK.getApps().main()
+        inventory = astraInventory.getInventory()
         if args.sourceAppID:
-            for app in apps["items"]:
-                if app["id"] == args.sourceAppID:
-                    sourceClusterID = app["clusterID"]
-                    appIDstr = app["id"]
+            app = inventory.get("apps", args.sourceAppID)
         elif args.backupID:
-            if plaidMode:
-                backups = astraSDK.getBackups().main()
-            for app in apps["items"]:
-                for backup in backups["items"]:
-                    if app["id"] == backup["appID"] and backup["id"] == args.backupID:
-                        sourceClusterID = app["clusterID"]
-                        appIDstr = app["id"]
+            app = inventory.appOf("backups", args.backupID)
         elif args.snapshotID:
-            if plaidMode:
-                snapshots = astraSDK.getSnaps().main()
-            for app in apps["items"]:
-                for snapshot in snapshots["items"]:
-                    if app["id"] == snapshot["appID"] and snapshot["id"] == args.snapshotID:
-                        sourceClusterID = app["clusterID"]
-                        appIDstr = app["id"]
+            app = inventory.appOf("snapshots", args.snapshotID)
+        if app:
+            sourceClusterID = app.clusterID
+            appIDstr = app.id
         # Ensure appIDstr is not equal to "", if so bad values were passed in with plaidMode
         if appIDstr == "":
             print(
@@ -1958,4 +2895,9 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    except BrokenPipeError:
+        # Streamed output piped into something like head, which exited once it had enough
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)